@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Per-batch throughput of the field normalizer.
+
+Records parsed from the fixtures in benchmarks/fixtures are repeated up to each
+batch size and normalized with normalizer.normalize_frame (vectorized columns,
+as used by the Parquet sink), the vectorized path of normalizer.normalize_records
+(columns plus conversion back to dictionaries) and normalize_record on single
+records. normalize_records itself switches between the two at
+config.NORMALIZE_VECTORIZED_MIN_RECORDS; compare the vectorized and per-record
+rows to check that threshold.
+
+Usage:
+    python benchmarks/normalize_bench.py
+    python benchmarks/normalize_bench.py --batch-size 500 --batch-size 5000 --json normalize.json
+    python benchmarks/normalize_bench.py --compare normalize.json --threshold 0.2
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+# 크롤러 모듈은 import 시점에 crawler.log 핸들러를 등록하므로 먼저 로깅을 설정
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "carku"))
+
+import pandas as pd
+from bs4 import BeautifulSoup
+import config
+import normalizer
+import offline_parser
+import carku_crawling
+
+def load_fixture(name):
+    """픽스처 HTML 로드"""
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+def sample_records():
+    """
+    Build sample records from the fixtures.
+
+    Returns:
+        dict: Source name -> (records, fields) where every other record has detail fields merged
+    """
+    encar = offline_parser.parse_encar_list_html(load_fixture("encar_list.html"))
+    encar_detail = offline_parser.parse_encar_detail_html(load_fixture("encar_detail.html"))
+    for car in encar[::2]:
+        car.update(encar_detail)
+
+    carku = carku_crawling.scrape_car_data_from_page(BeautifulSoup(load_fixture("carku_list.html"), "html.parser"))
+    carku_detail = load_fixture("carku_detail.html")
+    carku = [
+        carku_crawling.extract_detail_page_data(car, carku_detail, i + 1) if i % 2 == 0 else car
+        for i, car in enumerate(carku)
+    ]
+
+    return {
+        "encar": (encar, normalizer.ENCAR_FIELDS),
+        "carku": (carku, normalizer.CARKU_FIELDS),
+    }
+
+# 값 종류별로 결과 타입 범위를 벗어나는 값 (배치 전체가 실패하지 않고 해당 필드만 결측이어야 함)
+OVERFLOW_VALUES = {"price": "99999999억", "mileage": "3" + "0" * 400 + "km", "number": "99999999999"}
+
+def vectorized(func):
+    """config.NORMALIZE_VECTORIZED_MIN_RECORDS와 관계없이 normalize_records가 벡터화 경로를 쓰도록 감싼 함수"""
+    def run(*args):
+        saved = config.NORMALIZE_VECTORIZED_MIN_RECORDS
+        config.NORMALIZE_VECTORIZED_MIN_RECORDS = 0
+        try:
+            return func(*args)
+        finally:
+            config.NORMALIZE_VECTORIZED_MIN_RECORDS = saved
+    return run
+
+def check_batch_parity(records, fields):
+    """배치 정규화 결과가 레코드 단위 결과와 같고 범위를 벗어난 값이 결측인지 확인"""
+    overflow = {source: OVERFLOW_VALUES[kind] for _, kind, sources in fields if kind in OVERFLOW_VALUES for source in sources}
+    records = records + [dict(records[0], **overflow)]
+    expected = [normalizer.normalize_record(record, fields) for record in records]
+    actual = vectorized(normalizer.normalize_records)(records, fields)
+    if actual != expected:
+        diff = sorted({k for e, a in zip(expected, actual) for k in e if e.get(k) != a.get(k)})
+        raise AssertionError(f"배치 정규화 결과가 레코드 단위 결과와 다릅니다: {diff}")
+    overflowed = [target for target, kind, _ in fields if kind in OVERFLOW_VALUES and actual[-1][target] is not None]
+    if overflowed:
+        raise AssertionError(f"범위를 벗어난 값이 결측으로 처리되지 않았습니다: {overflowed}")
+
+def make_batch(records, batch_size):
+    """레코드를 반복해 batch_size 크기의 배치 생성"""
+    return [records[i % len(records)] for i in range(batch_size)]
+
+def run_case(func, batches, warmup):
+    """
+    Run one case over a list of batches.
+
+    Returns:
+        dict: rows_per_sec and ms_per_batch
+    """
+    for _ in range(warmup):
+        func(batches[0])
+
+    rows = 0
+    start = time.perf_counter()
+    for batch in batches:
+        func(batch)
+        rows += len(batch)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+        "ms_per_batch": elapsed * 1000 / len(batches),
+    }
+
+def build_cases(fields):
+    """
+    Build the benchmark cases for one record source.
+
+    Returns:
+        list: (name, func) pairs where func(batch) normalizes one batch
+    """
+    return [
+        ("normalize_frame", lambda batch: normalizer.normalize_frame(pd.DataFrame(batch), fields)),
+        ("normalize_records", vectorized(lambda batch: normalizer.normalize_records(batch, fields))),
+        ("normalize_record x N", lambda batch: [normalizer.normalize_record(record, fields) for record in batch]),
+    ]
+
+def compare_results(results, baseline_path, threshold):
+    """
+    Compare results against a saved baseline.
+
+    Returns:
+        list: Names of cases whose rows/sec dropped by more than the threshold
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]["rows_per_sec"]
+        if expected and result["rows_per_sec"] < expected * (1 - threshold):
+            regressions.append(key)
+            print(f"REGRESSION {key}: {result['rows_per_sec']:.1f} rows/s (baseline {expected:.1f} rows/s)")
+    return regressions
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="필드 정규화 배치 처리량 벤치마크")
+    parser.add_argument("--batch-size", type=int, action="append", help="배치 크기 (여러 번 지정 가능, 기본값: 100, 1000, 10000)")
+    parser.add_argument("--batches", type=int, default=5, help="배치 크기별 반복 횟수 (기본값: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="워밍업 반복 횟수 (기본값: 1)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON 파일 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="허용 성능 저하 비율 (기본값: 0.2)")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    batch_sizes = args.batch_size or [100, 1000, 10000]
+
+    results = {}
+    print(f"{'case':<24} {'source':<8} {'batch':>7} {'rows/s':>12} {'ms/batch':>10}")
+    for source, (records, fields) in sample_records().items():
+        check_batch_parity(records, fields)
+        for batch_size in batch_sizes:
+            batch = make_batch(records, batch_size)
+            for name, func in build_cases(fields):
+                result = run_case(func, [batch] * args.batches, args.warmup)
+                results[f"{name}[{source},{batch_size}]"] = result
+                print(f"{name:<24} {source:<8} {batch_size:>7} "
+                      f"{result['rows_per_sec']:>12.1f} {result['ms_per_batch']:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Parser microbenchmarks over the recorded HTML fixtures in benchmarks/fixtures.
+
+Each case runs one parser entry point against one fixture with one backend
+and reports records/sec, milliseconds per page and the peak memory allocated
+while parsing a single page.
+
+Usage:
+    python benchmarks/parser_bench.py
+    python benchmarks/parser_bench.py --iterations 200 --json bench.json
+    python benchmarks/parser_bench.py --compare bench.json --threshold 0.2
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+# 크롤러 모듈은 import 시점에 crawler.log 핸들러를 등록하므로 먼저 로깅을 설정
+logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "carku"))
+
+from bs4 import BeautifulSoup
+import offline_parser
+import carku_crawling
+import carku_detail_parser
+
+def load_fixture(name):
+    """픽스처 HTML 로드"""
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+def available_backends():
+    """설치된 파서 백엔드 목록"""
+    backends = ["html.parser"]
+    if importlib.util.find_spec("lxml") is not None:
+        backends.append("lxml")
+    if offline_parser.LexborHTMLParser is not None:
+        backends.append("selectolax")
+    return backends
+
+def check_detail_parity(car_template):
+    """고속 상세 파서 결과가 BeautifulSoup 파서 결과와 같은지 확인"""
+    html = load_fixture("carku_detail.html")
+    expected = carku_crawling.extract_detail_page_data(dict(car_template), html, 1, parser="html.parser")
+    actual = carku_detail_parser.extract_detail_page_data(dict(car_template), html, 1)
+    if actual != expected:
+        diff = sorted(k for k in expected if expected.get(k) != actual.get(k))
+        raise AssertionError(f"고속 상세 파서 결과가 다릅니다: {diff}")
+
+def build_cases(backends):
+    """
+    Build the list of benchmark cases.
+
+    Args:
+        backends: Available parser backends
+
+    Returns:
+        list: (name, backend, fixture, func) tuples where func(html) returns the number of records
+    """
+    carku_list_html = load_fixture("carku_list.html")
+    car_template = carku_crawling.scrape_car_data_from_page(BeautifulSoup(carku_list_html, "html.parser"))[0]
+
+    cases = []
+    if carku_detail_parser.is_available():
+        check_detail_parity(car_template)
+        cases.append((
+            "carku.fast_detail_parser", "lxml", "carku_detail.html",
+            lambda html: 1 if carku_detail_parser.extract_detail_page_data(dict(car_template), html, 1) else 0
+        ))
+
+    for backend in backends:
+        if backend != "selectolax":
+            # Carku 파서는 BeautifulSoup 트리 빌더만 지원
+            cases.append((
+                "carku.scrape_car_data_from_page", backend, "carku_list.html",
+                lambda html, b=backend: len(carku_crawling.scrape_car_data_from_page(BeautifulSoup(html, b)))
+            ))
+            cases.append((
+                "carku.extract_detail_page_data", backend, "carku_detail.html",
+                lambda html, b=backend: 1 if carku_crawling.extract_detail_page_data(dict(car_template), html, 1, parser=b) else 0
+            ))
+
+        cases.append((
+            "encar.parse_list", backend, "encar_list.html",
+            lambda html, b=backend: len(offline_parser.parse_encar_list_html(html, b))
+        ))
+        cases.append((
+            "encar.parse_detail_spec", backend, "encar_detail.html",
+            lambda html, b=backend: 1 if offline_parser.parse_encar_detail_html(html, b) else 0
+        ))
+
+    return cases
+
+def run_case(func, html, iterations, warmup):
+    """
+    Run a single benchmark case.
+
+    Returns:
+        dict: records_per_sec, ms_per_page and peak_kb
+    """
+    for _ in range(warmup):
+        func(html)
+
+    records = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        records += func(html)
+    elapsed = time.perf_counter() - start
+
+    # 한 페이지 파싱 동안의 최대 할당량 측정
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "records_per_sec": records / elapsed if elapsed > 0 else 0.0,
+        "ms_per_page": elapsed * 1000 / iterations,
+        "peak_kb": peak / 1024,
+    }
+
+def compare_results(results, baseline_path, threshold):
+    """
+    Compare results against a saved baseline.
+
+    Returns:
+        list: Names of cases whose records/sec dropped by more than the threshold
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        expected = baseline[key]["records_per_sec"]
+        if expected and result["records_per_sec"] < expected * (1 - threshold):
+            regressions.append(key)
+            print(f"REGRESSION {key}: {result['records_per_sec']:.1f} rec/s (baseline {expected:.1f} rec/s)")
+    return regressions
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="HTML 파서 마이크로벤치마크")
+    parser.add_argument("--iterations", type=int, default=50, help="케이스별 반복 횟수 (기본값: 50)")
+    parser.add_argument("--warmup", type=int, default=3, help="워밍업 반복 횟수 (기본값: 3)")
+    parser.add_argument("--backend", action="append", help="실행할 백엔드 (여러 번 지정 가능)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON 파일 경로")
+    parser.add_argument("--threshold", type=float, default=0.2, help="허용 성능 저하 비율 (기본값: 0.2)")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+
+    backends = available_backends()
+    if args.backend:
+        backends = [b for b in backends if b in args.backend]
+
+    fixtures = {}
+    results = {}
+
+    print(f"{'case':<34} {'backend':<12} {'rec/s':>10} {'ms/page':>9} {'peak KB':>9}")
+    for name, backend, fixture, func in build_cases(backends):
+        if fixture not in fixtures:
+            fixtures[fixture] = load_fixture(fixture)
+        result = run_case(func, fixtures[fixture], args.iterations, args.warmup)
+        results[f"{name}[{backend}]"] = result
+        print(f"{name:<34} {backend:<12} {result['records_per_sec']:>10.1f} "
+              f"{result['ms_per_page']:>9.3f} {result['peak_kb']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare and compare_results(results, args.compare, args.threshold):
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Module for a pool of warm standby WebDriver sessions.
+
+Launching Chrome and loading the first page takes tens of seconds, and the
+crawler used to pay that (plus a random pause) every time it reset a broken
+session. The pool keeps pre-launched sessions that have already loaded
+config.BROWSER_POOL_WARM_URL on standby: a reset takes one of them
+immediately, the broken session is quit on a background thread, and a
+replacement standby session is launched in the background as well.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import config
+import driver_setup
+
+class BrowserPool:
+    """Warm standby WebDriver sessions with background launch and teardown"""
+
+    def __init__(self, standby=None, factory=None, warm_url=None):
+        """
+        Create the pool; standby sessions are launched by fill().
+
+        Args:
+            standby: Number of sessions kept on standby (default: config.BROWSER_POOL_STANDBY)
+            factory: Function that creates a WebDriver (default: driver_setup.setup_driver)
+            warm_url: URL loaded by standby sessions before use (default: config.BROWSER_POOL_WARM_URL)
+        """
+        self.standby_count = config.BROWSER_POOL_STANDBY if standby is None else standby
+        self.factory = factory or driver_setup.setup_driver
+        self.warm_url = config.BROWSER_POOL_WARM_URL if warm_url is None else warm_url
+
+        self.standby = queue.Queue()
+        self.launching = 0
+        self.closed = False
+        self.lock = threading.Lock()
+        # 대기 세션이 추가되거나 생성이 끝나면 (실패 포함) acquire()를 깨움
+        self.ready = threading.Condition(self.lock)
+        self.executor = ThreadPoolExecutor(max_workers=self.standby_count + 1, thread_name_prefix="browser-pool")
+
+        self.acquire_count = 0
+        self.cold_start_count = 0
+        self.acquire_seconds = 0.0
+
+    def _launch(self):
+        """대기 세션 하나를 생성하고 워밍업한 뒤 대기열에 추가"""
+        driver = None
+        try:
+            driver = self.factory()
+            if self.warm_url:
+                driver_setup.navigate_to_url(driver, self.warm_url)
+        except Exception as e:
+            logging.error(f"대기 브라우저 세션 생성 중 오류 발생: {e}")
+            if driver:
+                self._teardown(driver)
+            driver = None
+        finally:
+            with self.lock:
+                self.launching -= 1
+                if driver is not None and not self.closed:
+                    self.standby.put(driver)
+                    logging.info(f"대기 브라우저 세션 준비 완료 (대기 중 {self.standby.qsize()}개)")
+                    driver = None
+                self.ready.notify_all()
+
+        # 생성 중에 풀이 닫힌 경우
+        if driver is not None:
+            self._teardown(driver)
+
+    def fill(self):
+        """대기 세션이 standby_count개가 되도록 백그라운드에서 생성"""
+        with self.lock:
+            if self.closed:
+                return
+            missing = self.standby_count - self.standby.qsize() - self.launching
+            self.launching += max(missing, 0)
+        for _ in range(missing):
+            self.executor.submit(self._launch)
+
+    def _is_alive(self, driver):
+        """대기 중에 세션이 끊기지 않았는지 확인"""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        """
+        Take a session, preferring a warm standby one.
+
+        A standby session that is still launching is waited for up to
+        config.BROWSER_POOL_ACQUIRE_TIMEOUT seconds; with nothing on standby or
+        launching (or once every launch failed), a session is created in the foreground.
+
+        Returns:
+            WebDriver: Session ready to crawl
+        """
+        start = time.time()
+        driver = None
+        while driver is None:
+            with self.ready:
+                self.ready.wait_for(
+                    lambda: not self.standby.empty() or self.launching == 0,
+                    timeout=max(config.BROWSER_POOL_ACQUIRE_TIMEOUT - (time.time() - start), 0)
+                )
+            try:
+                driver = self.standby.get_nowait()
+            except queue.Empty:
+                logging.info("대기 브라우저 세션이 없어 새 세션을 바로 생성합니다.")
+                driver = self.factory()
+                self.cold_start_count += 1
+                break
+
+            if not self._is_alive(driver):
+                logging.warning("대기 중 종료된 브라우저 세션을 폐기합니다.")
+                self.release(driver)
+                self.fill()
+                driver = None
+
+        elapsed = time.time() - start
+        self.acquire_count += 1
+        self.acquire_seconds += elapsed
+        logging.info(f"브라우저 세션 확보: {elapsed:.2f}초")
+
+        self.fill()
+        return driver
+
+    def _teardown(self, driver):
+        """세션 종료 (다른 세션의 Chrome 프로세스는 건드리지 않음)"""
+        driver_setup.cleanup_driver(driver)
+
+    def release(self, driver):
+        """
+        Quit a session on a background thread.
+
+        Args:
+            driver: WebDriver to quit
+        """
+        if driver is None:
+            return
+        try:
+            self.executor.submit(self._teardown, driver)
+        except RuntimeError:
+            # 풀이 이미 닫힌 경우
+            self._teardown(driver)
+
+    def close(self):
+        """Quit the standby sessions and wait for background launches and teardowns"""
+        with self.lock:
+            self.closed = True
+        while True:
+            try:
+                self.release(self.standby.get_nowait())
+            except queue.Empty:
+                break
+        self.executor.shutdown(wait=True)
+
+        if self.acquire_count:
+            logging.info(f"브라우저 세션 확보 {self.acquire_count}회 (평균 {self.acquire_seconds / self.acquire_count:.2f}초), "
+                         f"대기 세션 없이 새로 생성 {self.cold_start_count}회")
@@ -0,0 +1,378 @@
+"""
+Module for indexing records into OpenSearch with adaptively sized bulk requests.
+
+A fixed bulk size is either too small for throughput or large enough to make
+the cluster answer with es_rejected_execution (429). BatchSizeController
+grows the batch additively while requests finish under a target latency and
+halves it on a 429 or a timeout. BulkIndexer sends the buffered documents in
+batches of the current size and retries only the rejected items, with
+exponential backoff and full jitter, so a busy cluster sees fewer and smaller
+requests instead of a burst of immediate retries. Documents that still cannot
+be indexed go to a DiskSpool, if one is given, for a later replay. With a
+CircuitBreaker, connection failures open the circuit and actions are spooled
+without contacting the cluster until a probe succeeds.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from opensearchpy.exceptions import ConnectionError, ConnectionTimeout, TransportError
+from circuit_breaker import CircuitOpenError
+import config
+import opensearch_handler
+
+class BatchSizeController:
+    """Additive-increase / multiplicative-decrease control of the bulk batch size"""
+
+    def __init__(self, batch_size=None, min_size=None, max_size=None, step=None, target_latency=None):
+        """
+        Create the controller.
+
+        Args:
+            batch_size: Initial documents per request (default: config.BULK_BATCH_SIZE)
+            min_size: Lower bound (default: config.BULK_MIN_BATCH_SIZE)
+            max_size: Upper bound (default: config.BULK_MAX_BATCH_SIZE)
+            step: Documents added after a fast request (default: config.BULK_BATCH_STEP)
+            target_latency: Request latency in seconds below which the batch grows
+                (default: config.BULK_TARGET_LATENCY)
+        """
+        self.min_size = min_size or config.BULK_MIN_BATCH_SIZE
+        self.max_size = max_size or config.BULK_MAX_BATCH_SIZE
+        self.step = step or config.BULK_BATCH_STEP
+        self.target_latency = target_latency or config.BULK_TARGET_LATENCY
+        self.batch_size = min(max(batch_size or config.BULK_BATCH_SIZE, self.min_size), self.max_size)
+        self.smallest = self.largest = self.batch_size
+
+    def _set(self, batch_size):
+        self.batch_size = min(max(batch_size, self.min_size), self.max_size)
+        self.smallest = min(self.smallest, self.batch_size)
+        self.largest = max(self.largest, self.batch_size)
+
+    def observe(self, latency, sent):
+        """
+        Update the batch size after an accepted request.
+
+        Args:
+            latency: Request time in seconds
+            sent: Number of documents in the request
+        """
+        # 마지막 배치처럼 현재 크기보다 작은 요청은 크기를 늘릴 근거가 되지 않음
+        if latency < self.target_latency and sent >= self.batch_size:
+            self._set(self.batch_size + self.step)
+        elif latency > self.target_latency * 2:
+            self._set(self.batch_size * 3 // 4)
+
+    def backoff(self):
+        """Halve the batch size after a 429 or a timeout"""
+        self._set(self.batch_size // 2)
+
+class BulkIndexer:
+    """Pipeline stage that buffers records and indexes them with adaptive bulk requests"""
+
+    def __init__(self, client, index, controller=None, max_retries=None, flush_interval=None,
+                 refresh=True, metrics_filename=None, spool=None, breaker=None):
+        """
+        Create the stage.
+
+        Args:
+            client: OpenSearch client
+            index: Index or alias to write to
+            controller: BatchSizeController (default: one with the config values)
+            max_retries: Retries of rejected items before they are counted as failed
+                (default: config.BULK_MAX_RETRIES)
+            flush_interval: Maximum seconds a record waits in the buffer
+                (default: config.BULK_FLUSH_INTERVAL)
+            refresh: Whether to refresh the index on close (disable for bulk loads)
+            metrics_filename: JSON file the metrics are written to after each flush
+                (default: config.get_bulk_metrics_filename())
+            spool: spool.DiskSpool receiving actions that could not be indexed after
+                the retries or while the breaker is open (default: they are counted as failed)
+            breaker: circuit_breaker.CircuitBreaker guarding the bulk requests
+        """
+        self.client = client
+        self.index = index
+        self.controller = controller or BatchSizeController()
+        self.max_retries = config.BULK_MAX_RETRIES if max_retries is None else max_retries
+        self.flush_interval = flush_interval or config.BULK_FLUSH_INTERVAL
+        self.refresh = refresh
+        self.metrics_filename = metrics_filename or config.get_bulk_metrics_filename()
+        self.spool = spool
+        self.breaker = breaker
+
+        self.buffer = []
+        self.buffer_started = None
+        self.counters = {
+            'requests': 0,
+            'indexed': 0,
+            'rejected': 0,
+            'retried': 0,
+            'timeouts': 0,
+            'failed': 0,
+            'spooled': 0,
+        }
+        self.accepted = 0
+        self.latency_total = 0.0
+        self.sent_total = 0
+
+    def transform(self, records):
+        """
+        Convert buffered records to bulk actions right before they are sent.
+
+        Args:
+            records: List of records passed to write()
+
+        Returns:
+            list: Dictionaries with _index, _source and optionally _id
+        """
+        return [{'_index': self.index, '_source': record} for record in records]
+
+    def write(self, record):
+        """Buffer one record and flush when the batch is full or has waited too long"""
+        if not self.buffer:
+            self.buffer_started = time.monotonic()
+        self.buffer.append(record)
+
+        if (len(self.buffer) >= self.controller.batch_size
+                or time.monotonic() - self.buffer_started >= self.flush_interval):
+            self.flush()
+
+    def _send(self, actions):
+        """
+        Send one bulk request.
+
+        Returns:
+            list: Actions to retry (rejected with 429 or lost to a timeout)
+        """
+        body = []
+        for action in actions:
+            metadata = {'_index': action['_index']}
+            if action.get('_id'):
+                metadata['_id'] = action['_id']
+            body.append({'index': metadata})
+            body.append(action['_source'])
+
+        self.counters['requests'] += 1
+        start = time.monotonic()
+        try:
+            response = self.client.bulk(body=body, request_timeout=config.BULK_REQUEST_TIMEOUT)
+        except ConnectionTimeout:
+            # 응답을 받지 못한 요청은 전체를 다시 보냄
+            self.counters['timeouts'] += 1
+            self._record_failure()
+            self.controller.backoff()
+            logging.warning(f"bulk 요청 시간 초과 ({len(actions)}건), 배치 크기 {self.controller.batch_size}로 축소")
+            return actions
+        except ConnectionError as e:
+            self._record_failure()
+            logging.warning(f"bulk 요청 연결 오류 ({len(actions)}건): {e}")
+            return actions
+        except TransportError as e:
+            if isinstance(e.status_code, int) and e.status_code >= 500:
+                self._record_failure()
+                logging.warning(f"bulk 요청 서버 오류 ({e.status_code}, {len(actions)}건): {e}")
+                return actions
+            if e.status_code != 429:
+                raise
+            self._record_success()
+            self.counters['rejected'] += len(actions)
+            self.controller.backoff()
+            logging.warning(f"bulk 요청 거부됨 (429, {len(actions)}건), 배치 크기 {self.controller.batch_size}로 축소")
+            return actions
+        latency = time.monotonic() - start
+        self._record_success()
+
+        rejected = []
+        for action, item in zip(actions, response['items']):
+            result = next(iter(item.values()))
+            status = result.get('status', 500)
+            if status == 429:
+                rejected.append(action)
+            elif status >= 300:
+                self.counters['failed'] += 1
+                logging.error(f"문서 색인 실패 (status {status}): {result.get('error')}")
+            else:
+                self.counters['indexed'] += 1
+
+        self.accepted += 1
+        self.latency_total += latency
+        self.sent_total += len(actions)
+        if rejected:
+            self.counters['rejected'] += len(rejected)
+            self.controller.backoff()
+            logging.warning(f"bulk 항목 {len(rejected)}/{len(actions)}건 거부됨 (429), "
+                            f"배치 크기 {self.controller.batch_size}로 축소")
+        else:
+            self.controller.observe(latency, len(actions))
+        return rejected
+
+    def _record_success(self):
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def _record_failure(self):
+        if self.breaker is not None:
+            self.breaker.record_failure()
+
+    def _send_all(self, actions):
+        """현재 배치 크기로 나누어 전송하고 재시도할 액션 반환"""
+        retry = []
+        position = 0
+        while position < len(actions):
+            # 회로가 열리면 남은 액션은 보내지 않음
+            if self.breaker is not None and not self.breaker.allow():
+                retry.extend(actions[position:])
+                break
+            # 배치 크기는 요청마다 바뀔 수 있음
+            batch = actions[position:position + self.controller.batch_size]
+            try:
+                retry.extend(self._send(batch))
+            except TransportError as e:
+                # 재시도해도 같은 응답을 받을 요청 오류 (400 등): 버퍼에서 이미 빠진 남은 액션을 잃지 않도록 포기 처리
+                logging.error(f"bulk 요청 실패 ({e.status_code}, {len(actions) - position}건): {e}")
+                self._give_up(actions[position:])
+                break
+            position += len(batch)
+        return retry
+
+    def flush(self):
+        """
+        Index every buffered record.
+
+        Rejected items are retried up to max_retries times after a jittered
+        exponential backoff; items still rejected after that are written to the
+        spool, or counted as failed without one.
+        """
+        if not self.buffer:
+            return
+        records, self.buffer = self.buffer, []
+        actions = self.transform(records)
+
+        attempt = 0
+        while actions:
+            actions = self._send_all(actions)
+            if not actions:
+                break
+            attempt += 1
+            # 회로가 열려 있으면 재시도하며 기다리지 않고 바로 스풀로 보냄
+            if attempt > self.max_retries or (self.breaker is not None and not self.breaker.allow()):
+                self._give_up(actions)
+                break
+            # full jitter: 0 ~ 지수 백오프 사이에서 무작위로 대기
+            delay = min(config.BULK_BACKOFF_MAX, config.BULK_BACKOFF_BASE * 2 ** (attempt - 1))
+            self.counters['retried'] += len(actions)
+            time.sleep(random.uniform(0, delay))
+
+        self.write_metrics()
+
+    def _give_up(self, actions):
+        """색인하지 못한 액션을 스풀에 기록 (스풀이 없으면 실패로 집계)"""
+        if self.spool is None:
+            self.counters['failed'] += len(actions)
+            logging.error(f"색인하지 못한 문서 {len(actions)}건")
+            return
+
+        for action in actions:
+            self.spool.write(action)
+        self.counters['spooled'] += len(actions)
+        logging.warning(f"색인하지 못한 문서 {len(actions)}건을 스풀에 기록했습니다.")
+
+    def metrics(self):
+        """
+        Get the indexing metrics.
+
+        Returns:
+            dict: Current, smallest and largest batch size, mean documents and
+                latency per accepted request, and request/indexed/rejected/retried/
+                timeout/failed/spooled counters
+        """
+        accepted = self.accepted
+        return {
+            'index': self.index,
+            'batch_size': self.controller.batch_size,
+            'min_batch_size_used': self.controller.smallest,
+            'max_batch_size_used': self.controller.largest,
+            'mean_batch_docs': self.sent_total / accepted if accepted else 0.0,
+            'mean_latency_ms': self.latency_total * 1000 / accepted if accepted else 0.0,
+            **self.counters,
+            'circuit_state': self.breaker.state if self.breaker is not None else None,
+            'circuit_opened': self.breaker.open_count if self.breaker is not None else 0,
+        }
+
+    def write_metrics(self):
+        """Write the metrics to the metrics file"""
+        if not self.metrics_filename:
+            return
+        temp_filename = f"{self.metrics_filename}.tmp"
+        try:
+            with open(temp_filename, 'w', encoding='utf-8') as f:
+                json.dump(self.metrics(), f, indent=2)
+            os.replace(temp_filename, self.metrics_filename)
+        except OSError as e:
+            logging.warning(f"bulk 메트릭 저장 실패: {e}")
+
+    def offset(self):
+        """
+        Get how many documents were indexed, spooled or are still buffered.
+
+        Returns:
+            dict: indexed, failed, spooled and buffered document counts
+        """
+        return {
+            'indexed': self.counters['indexed'],
+            'failed': self.counters['failed'],
+            'spooled': self.counters['spooled'],
+            'buffered': len(self.buffer),
+        }
+
+    def close(self):
+        """Flush the remaining records, refresh the index and log the metrics"""
+        self.flush()
+        if self.spool is not None:
+            self.spool.close()
+        if self.refresh and (self.breaker is None or self.breaker.allow()):
+            try:
+                self.client.indices.refresh(index=self.index)
+            except Exception as e:
+                logging.error(f"인덱스 refresh 중 오류 발생: {e}")
+
+        metrics = self.metrics()
+        logging.info(
+            f"bulk 색인 완료: {metrics['indexed']}건 색인, 거부 {metrics['rejected']}건, "
+            f"시간 초과 {metrics['timeouts']}회, 실패 {metrics['failed']}건, 스풀 {metrics['spooled']}건, "
+            f"배치 크기 {metrics['min_batch_size_used']}~{metrics['max_batch_size_used']} (현재 {metrics['batch_size']})"
+        )
+
+class EncarBulkSink(BulkIndexer):
+    """BulkIndexer for Encar records with deterministic IDs, written to the partition of their crawling_time"""
+
+    def __init__(self, client, **kwargs):
+        super().__init__(client, config.ENCAR_INDEX_ALIAS, **kwargs)
+        self.partitions = set()
+        self.record_count = 0
+
+    def transform(self, records):
+        """Convert crawled records to v2 documents in one normalization pass"""
+        actions = opensearch_handler.build_encar_actions(records, self.record_count + 1)
+        self.record_count += len(records)
+
+        if config.ENCAR_INDEX_PARTITION:
+            for partition in {action['_index'] for action in actions} - self.partitions:
+                try:
+                    if self.breaker is not None:
+                        self.breaker.call(opensearch_handler.ensure_encar_partition, self.client, partition)
+                    else:
+                        opensearch_handler.ensure_encar_partition(self.client, partition)
+                    self.partitions.add(partition)
+                except CircuitOpenError:
+                    break
+                except Exception as e:
+                    logging.error(f"분할 인덱스 {partition} 준비 중 오류 발생: {e}")
+        return actions
+
+    def close(self):
+        """Flush the remaining records and log the index statistics"""
+        super().close()
+        if self.breaker is None or self.breaker.allow():
+            opensearch_handler.get_index_stats(self.client)
@@ -17,6 +17,7 @@ from selenium.common.exceptions import (
 )
 import config
 import driver_setup
+import deadline_watchdog
 
 def is_session_valid(driver):
     """
@@ -36,6 +37,22 @@ def is_session_valid(driver):
         logging.error("WebDriver 세션이 유효하지 않습니다.")
         return False
 
+def map_detail_key(key):
+    """
+    Map a detail spec label to the field name used in car records.
+    
+    Args:
+        key: Label text of a detail spec item
+        
+    Returns:
+        str: Mapped field name, or the label itself if it is not in config.DETAIL_KEY_MAPPING
+    """
+    # 툴팁 버튼이 있는 경우 제거
+    if "조회수" in key:
+        key = "조회수"
+    
+    return config.DETAIL_KEY_MAPPING.get(key, key)
+
 def get_car_detail_info(driver, detail_url, max_retries=2):
     detail_info = {}
     retry_count = 0
@@ -45,24 +62,16 @@ def get_car_detail_info(driver, detail_url, max_retries=2):
         try:
             # 세션 유효성 확인
             if not is_session_valid(driver):
-                logging.warning("세션이 유효하지 않아 드라이버를 재설정합니다.")
-                try:
-                    driver_setup.cleanup_driver(driver)
-                except:
-                    pass
-                
-                driver = driver_setup.setup_driver()
-                driver_setup.navigate_to_url(driver, config.BASE_URL)
-                time.sleep(config.get_page_load_wait())
-                
-                # 세션 재설정 후 상세 정보 가져오기 중단
-                return {"세션오류": "세션이 재설정되었습니다"}
+                # 드라이버 교체는 호출한 쪽(EncarCrawler.reset_driver)에서 대기 세션으로 처리
+                logging.warning("세션이 유효하지 않아 상세 정보 가져오기를 중단합니다.")
+                return {"세션오류": "세션이 유효하지 않습니다"}
             
             # 현재 열려있는 창 수 확인
             window_count_before = len(driver.window_handles)
             
-            # 새 탭에서 상세 페이지 열기
-            driver.execute_script(f"window.open('{detail_url}', '_blank');")
+            # 새 탭에서 상세 페이지 열기 (리소스 차단은 탭마다 적용되므로 빈 탭에 먼저 적용)
+            opened_url = "about:blank" if config.BLOCK_RESOURCES else detail_url
+            driver.execute_script(f"window.open('{opened_url}', '_blank');")
             
             # 새 탭으로 전환 (타임아웃 증가)
             WebDriverWait(driver, 5).until(  # 10초에서 30초로 증가
@@ -70,25 +79,30 @@ def get_car_detail_info(driver, detail_url, max_retries=2):
             )
             driver.switch_to.window(driver.window_handles[-1])
             
+            if config.BLOCK_RESOURCES:
+                driver_setup.apply_resource_blocking(driver)
+                driver.execute_script("window.location.href = arguments[0];", detail_url)
+            
             # 페이지 로드 대기 (대기 시간 증가)
             detail_wait_time = max(config.get_detail_page_load_wait(), 5)  # 최소 10초, 기본값의 2배
             time.sleep(detail_wait_time)
             
             # 세부정보 버튼 클릭
             try:
-                # 스크롤을 버튼 위치로 이동
-                detail_button = WebDriverWait(driver, 10).until(  # 10초에서 30초로 증가
-                    EC.presence_of_element_located((By.CSS_SELECTOR, config.SELECTORS["detail_button"]))
-                )
-                
-                # 버튼이 보이도록 스크롤
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", detail_button)
-                time.sleep(1)  # 스크롤 후 잠시 대기
-                
-                # 버튼 클릭
-                WebDriverWait(driver, 10).until(  # 10초에서 30초로 증가
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, config.SELECTORS["detail_button"]))
-                ).click()
+                with deadline_watchdog.deadline("click", driver):
+                    # 스크롤을 버튼 위치로 이동
+                    detail_button = WebDriverWait(driver, 10).until(  # 10초에서 30초로 증가
+                        EC.presence_of_element_located((By.CSS_SELECTOR, config.SELECTORS["detail_button"]))
+                    )
+                    
+                    # 버튼이 보이도록 스크롤
+                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", detail_button)
+                    time.sleep(1)  # 스크롤 후 잠시 대기
+                    
+                    # 버튼 클릭
+                    WebDriverWait(driver, 10).until(  # 10초에서 30초로 증가
+                        EC.element_to_be_clickable((By.CSS_SELECTOR, config.SELECTORS["detail_button"]))
+                    ).click()
                 
                 # 세부 정보 추출
                 detail_items = driver.find_elements(By.CSS_SELECTOR, config.SELECTORS["detail_items"])
@@ -97,33 +111,10 @@ def get_car_detail_info(driver, detail_url, max_retries=2):
                     try:
                         key_element = item.find_element(By.CSS_SELECTOR, config.SELECTORS["detail_key"])
                         key = key_element.text
-                        
-                        # 툴팁 버튼이 있는 경우 제거
-                        if "조회수" in key:
-                            key = "조회수"
-                        
                         value = item.find_element(By.CSS_SELECTOR, config.SELECTORS["detail_value"]).text
                         
                         # 키 이름 정리
-                        key_mapping = {
-                            "차량번호": "차량번호",
-                            "연식": "상세연식",
-                            "주행거리": "상세주행거리",
-                            "배기량": "배기량",
-                            "연료": "상세연료",
-                            "변속기": "변속기",
-                            "차종": "차종",
-                            "색상": "색상",
-                            "지역": "상세지역",
-                            "인승": "인승",
-                            "수입구분": "수입구분",
-                            "압류 · 저당": "압류저당",
-                            "조회수": "조회수",
-                            "찜": "찜수"
-                        }
-                        
-                        mapped_key = key_mapping.get(key, key)
-                        detail_info[mapped_key] = value
+                        detail_info[map_detail_key(key)] = value
                         
                     except Exception as e:
                         logging.warning(f"세부 정보 항목 추출 중 오류: {e}")
@@ -137,10 +128,14 @@ def get_car_detail_info(driver, detail_url, max_retries=2):
                 retry_count += 1
                 
             finally:
+                # 탭을 닫기 전에 상세 페이지 로드 통계 기록
+                driver_setup.page_load_stats.record(driver, "detail")
+                
                 # 탭 닫기
                 try:
-                    driver.close()
-                except (WebDriverException, InvalidSessionIdException):
+                    with deadline_watchdog.deadline("close_tab", driver):
+                        driver.close()
+                except (WebDriverException, InvalidSessionIdException, deadline_watchdog.DeadlineExceeded):
                     logging.warning("탭을 닫는 중 오류가 발생했습니다. 세션이 유효하지 않을 수 있습니다.")
                 
                 # 원래 탭으로 돌아가기
@@ -181,13 +176,13 @@ def get_car_detail_info(driver, detail_url, max_retries=2):
     
     return detail_info
 
-def extract_car_info(car, all_car_data):
+def extract_car_info(car, seen_car_ids):
     """
     Extract basic information from a car listing element.
     
     Args:
         car: Selenium WebElement representing a car listing
-        all_car_data: List of all car data collected so far (for duplicate checking)
+        seen_car_ids: Set of car IDs collected so far (for duplicate checking)
         
     Returns:
         dict or None: Dictionary with car information or None if it's a duplicate
@@ -199,7 +194,7 @@ def extract_car_info(car, all_car_data):
         car_id = impression_data.split("|")[0] if impression_data else None
         
         # 이미 처리한 차량인지 확인 (중복 방지)
-        if any(item.get("차량ID") == car_id for item in all_car_data):
+        if car_id in seen_car_ids:
             logging.info(f"차량 ID {car_id}는 이미 처리되었습니다. 건너뜁니다.")
             return None
         
@@ -235,14 +230,14 @@ def extract_car_info(car, all_car_data):
             price_value = price_element.find_element(By.CSS_SELECTOR, config.SELECTORS["car"]["price_value"]).text
             price_unit = price_element.text.replace(price_value, "").strip()
             full_price = price_value + price_unit
-        except:
+        except Exception:
             # 다른 가격 클래스 시도
             try:
                 price_element = car.find_element(By.CSS_SELECTOR, config.SELECTORS["car"]["price"])
                 price_value = price_element.find_element(By.CSS_SELECTOR, config.SELECTORS["car"]["price_value"]).text
                 price_unit = price_element.text.replace(price_value, "").strip()
                 full_price = price_value + price_unit
-            except:
+            except Exception:
                 price_value = "정보없음"
                 price_unit = ""
                 full_price = "정보없음"
@@ -254,7 +249,7 @@ def extract_car_info(car, all_car_data):
         ad_info = ""
         try:
             ad_info = car.find_element(By.CSS_SELECTOR, config.SELECTORS["car"]["ad_info"]).text
-        except:
+        except Exception:
             pass
         
         # 기본 데이터 저장
@@ -305,7 +300,7 @@ def accept_cookies_and_setup(self):
                     # Check if CAPTCHA is still present
                     try:
                         self.driver.find_element(By.CSS_SELECTOR, "iframe[title^='reCAPTCHA']")
-                    except:
+                    except Exception:
                         logging.info("CAPTCHA appears to be solved manually")
                         break
                         
@@ -315,12 +310,12 @@ def accept_cookies_and_setup(self):
                     submit_button.click()
                     logging.info("Submit button clicked after CAPTCHA verification")
                     time.sleep(2)
-                except:
+                except Exception:
                     logging.info("No Submit button found or already submitted")
                     
                 # Store flag indicating first CAPTCHA was solved manually
                 self.captcha_solved_manually = True
-        except:
+        except Exception:
             logging.info("No CAPTCHA on initial page load")
             
         # Accept cookies if button exists
@@ -367,7 +362,7 @@ def handle_captcha(self):
                         submit_button.click()
                         logging.info("Submit button clicked after CAPTCHA verification")
                         return True
-                    except:
+                    except Exception:
                         logging.warning("Submit button not found after CAPTCHA")
                         return False
                 except Exception as e:
@@ -386,13 +381,13 @@ def handle_captcha(self):
                     # Check if CAPTCHA is still present
                     try:
                         self.driver.find_element(By.CSS_SELECTOR, "iframe[title^='reCAPTCHA']")
-                    except:
+                    except Exception:
                         logging.info("CAPTCHA appears to be solved manually")
                         self.captcha_solved_manually = True
                         return True
                 
                 logging.warning("CAPTCHA verification timeout - user didn't complete verification")
                 return False
-    except:
+    except Exception:
         # No CAPTCHA found
         return True 
\ No newline at end of file
@@ -6,6 +6,18 @@ import logging
 import sys
 import random
 import os
+import carku_detail_parser
+
+# 상위 디렉토리의 공용 모듈 사용
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import normalizer
+import opensearch_handler
+import spool
+import work_queue
+from recycle_policy import RecyclePolicy
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from parse_stage import ParseStage
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
@@ -29,12 +41,25 @@ def create_opensearch_client():
     opensearch = OpenSearch(
         "http://14.6.96.11:1006",
         http_auth=("admin", "Myopensearch!1"),
-        timeout=180,
-        max_retries=30,
+        timeout=config.CARKU_OPENSEARCH_TIMEOUT,
+        max_retries=config.CARKU_OPENSEARCH_MAX_RETRIES,
         retry_on_timeout=True
     )
     return opensearch
 
+# OpenSearch 장애 시 요청을 보내지 않고 차량을 디스크 스풀에 기록
+# 문서 자체의 오류(매핑/파싱 오류 등 4xx)는 연결 실패로 세지 않음
+opensearch_breaker = CircuitBreaker("Carku OpenSearch", is_failure=opensearch_handler.is_unavailable_error)
+car_spool = None
+
+def spool_car(document, car_index):
+    """인덱싱하지 못한 차량을 스풀에 기록 (재전송: python run.py --replay-spool)"""
+    global car_spool
+    if car_spool is None:
+        car_spool = spool.DiskSpool()
+    car_spool.write(spool.make_action('carku_goods_detail', document))
+    logging.warning(f"차량 {car_index} 스풀에 기록")
+
 def create_carku_index(client):
     """카크 인덱스 생성"""
     index_name = 'carku_goods_detail'
@@ -94,7 +119,12 @@ def create_carku_index(client):
                         'seller_license': {'type': 'keyword'},
                         'seller_address': {'type': 'keyword'},
                         'seller_img_url': {'type': 'keyword'},
-                        'timestamp': {'type': 'date'}
+                        'timestamp': {'type': 'date'},
+                        # 정규화된 숫자/날짜 필드 (범위 검색용)
+                        'price_manwon': {'type': 'integer'},
+                        'mileage_km': {'type': 'integer'},
+                        'model_year': {'type': 'short'},
+                        'first_registration': {'type': 'date'}
                     }
                 }
             }
@@ -309,13 +339,17 @@ def fetch_detail_page(driver, detail_page, car_index, max_retries=3):
     logging.error(f"[차량 {car_index}] 상세 페이지 가져오기 최대 재시도 횟수 초과")
     return None
 
-def extract_detail_page_data(car_dict, html, car_index):
+def extract_detail_page_data(car_dict, html, car_index, parser=None):
     """상세 페이지에서 추가 데이터 추출"""
     if not html:
         return car_dict
     
+    # 파서를 지정하지 않으면 lxml 기반 고속 파서 사용
+    if parser is None and carku_detail_parser.is_available():
+        return carku_detail_parser.extract_detail_page_data(car_dict, html, car_index)
+    
     try:
-        detail_soup = BeautifulSoup(html, 'html.parser')
+        detail_soup = BeautifulSoup(html, parser or 'html.parser')
         
         # 상세 페이지 상단 정보 추출
         detail_top = detail_soup.select_one('div.detail-top')
@@ -491,12 +525,28 @@ def index_car_to_opensearch(client, car_dict, car_index):
         if not car_dict['vin']:
             logging.warning(f"차량 {car_index} 데이터 누락: vin(차대번호) 필드가 비어 있습니다.")
         
-        # OpenSearch에 인덱싱
-        response = client.index(
-            index='carku_goods_detail',
-            body=car_dict,
-            refresh=True
-        )
+        # 가격/주행거리/연식을 숫자와 날짜로 정규화해 함께 인덱싱
+        document = normalizer.normalize_record(car_dict, normalizer.CARKU_FIELDS)
+        
+        # OpenSearch에 인덱싱 (회로가 열려 있으면 요청 없이 스풀에 기록)
+        try:
+            response = opensearch_breaker.call(
+                client.index,
+                index='carku_goods_detail',
+                body=document,
+                refresh=True
+            )
+        except CircuitOpenError:
+            spool_car(document, car_index)
+            return False
+        except Exception as e:
+            if not opensearch_handler.is_retryable_error(e):
+                # 다시 보내도 같은 오류가 나므로 스풀에 기록하지 않고 실패로 처리
+                logging.error(f"차량 {car_index} 문서 오류로 인덱싱 실패: {str(e)}")
+                return False
+            logging.error(f"차량 {car_index} 인덱싱 중 오류 발생: {str(e)}")
+            spool_car(document, car_index)
+            return False
         
         if response['result'] == 'created':
             logging.info(f"차량 {car_index} 인덱싱 성공. ID: {response['_id']}")
@@ -508,7 +558,17 @@ def index_car_to_opensearch(client, car_dict, car_index):
         logging.error(f"차량 {car_index} 인덱싱 중 오류 발생: {str(e)}")
         return False
 
-def scrape_and_index_data(client):
+def index_parsed_car(client, car_data, car_index, parsed_car_dict):
+    """파싱 워커에서 돌아온 차량 데이터 인덱싱"""
+    # 파싱에 실패하면 목록 페이지의 기본 정보만으로 인덱싱
+    if parsed_car_dict is not None:
+        car_data[car_index] = parsed_car_dict
+    
+    if index_car_to_opensearch(client, car_data[car_index], car_index+1):
+        return 1
+    return 0
+
+def scrape_and_index_data(client, parse_stage=None):
     """Selenium을 사용하여 모든 페이지 스크랩 및 인덱싱"""
     base_url = 'https://www.carku.kr/search/search.html'
     
@@ -517,14 +577,16 @@ def scrape_and_index_data(client):
     
     # 웹드라이버 생성
     driver = None
+    policy = RecyclePolicy()
     try:
         driver = create_webdriver()
+        policy.start(driver)
         
         while True:
             url = f"{base_url}?wCurPage={page}&wKmS=&wKmE=&wPageSize="
             logging.info(f"Scraping page {page}: {url}")
             
-            car_data, indexed_count = scrape_page(driver, url, client)
+            car_data, indexed_count = scrape_page(driver, url, client, parse_stage, page=page)
             
             if car_data is None:
                 # 페이지가 없거나 오류 발생 시
@@ -546,11 +608,12 @@ def scrape_and_index_data(client):
             
             page += 1
             
-            # 드라이버 세션 리프레시 (10페이지마다)
-            if page % 10 == 0:
+            # 메모리 사용량이나 실행 시간이 기준을 넘으면 드라이버 재시작
+            if policy.check(driver):
                 logging.info("웹드라이버 세션 리프레시를 위해 재시작 중...")
                 driver.quit()
                 driver = create_webdriver()
+                policy.start(driver)
                 time.sleep(5)
         
     except KeyboardInterrupt:
@@ -567,7 +630,16 @@ def scrape_and_index_data(client):
             
     return total_indexed
 
-def scrape_page(driver, url, client):
+def finish_detail_task(task_queue, task, error=None):
+    """작업 큐의 상세 페이지 작업 완료 처리 (오류가 있으면 나중에 다시 시도)"""
+    if task is None:
+        return
+    if error is None:
+        task_queue.ack(task)
+    else:
+        task_queue.nack(task, error=error)
+
+def scrape_page(driver, url, client, parse_stage=None, task_queue=None, page=None):
     """Selenium을 사용하여 페이지 스크랩 및 데이터 인덱싱"""
     try:
         logging.info(f"URL 요청 시작: {url}")
@@ -617,6 +689,11 @@ def scrape_page(driver, url, client):
             logging.warning("추출된 차량 데이터가 없습니다.")
             return None, 0
         
+        # 작업 큐를 쓰면 다음 페이지를 바로 추가해 다른 크롤러가 상세 페이지 수집과 동시에 가져가게 함
+        detail_tasks = {}
+        if task_queue is not None:
+            task_queue.put(work_queue.CARKU_PAGE, task_queue.key(page + 1), {"page": page + 1}, priority=-(page + 1))
+        
         # 상세 페이지 데이터 수집 및 OpenSearch 인덱싱
         logging.info(f"{len(car_data)}개의 차량에 대한 상세 정보 수집 및 인덱싱 시작...")
         indexed_count = 0
@@ -629,22 +706,41 @@ def scrape_page(driver, url, client):
                     logging.warning(f"차량 {car_index+1}/{len(car_data)}: 상세 페이지 URL이 없습니다.")
                     continue
                 
+                # 다른 크롤러가 처리 중이거나 이미 처리한 차량은 건너뜀
+                if task_queue is not None:
+                    detail_task = task_queue.claim(
+                        work_queue.CARKU_DETAIL, task_queue.key(detail_page), payload=car_dict,
+                        priority=config.WORK_QUEUE_DETAIL_PRIORITY,
+                        visibility_timeout=config.WORK_QUEUE_DETAIL_VISIBILITY_TIMEOUT
+                    )
+                    if detail_task is None:
+                        logging.info(f"차량 {car_index+1}/{len(car_data)}: 다른 크롤러가 처리하는 차량입니다.")
+                        continue
+                    detail_tasks[car_index] = detail_task
+                
                 # 상세 페이지 데이터 가져오기
                 detail_html = fetch_detail_page(driver, detail_page, car_index+1)
                 
                 # 상세 페이지 데이터 추출
-                if detail_html:
+                if detail_html and parse_stage:
+                    # 워커 프로세스에서 파싱하고, 완료된 차량부터 인덱싱
+                    for parsed_index, parsed_car_dict in parse_stage.submit('carku_detail', detail_html, car_dict, car_index+1, context=car_index):
+                        indexed_count += index_parsed_car(client, car_data, parsed_index, parsed_car_dict)
+                        finish_detail_task(task_queue, detail_tasks.pop(parsed_index, None))
+                elif detail_html:
                     # 상세 데이터 추출
                     updated_car_dict = extract_detail_page_data(car_dict, detail_html, car_index+1)
                     
                     # OpenSearch에 인덱싱
                     if index_car_to_opensearch(client, updated_car_dict, car_index+1):
                         indexed_count += 1
+                    finish_detail_task(task_queue, detail_tasks.pop(car_index, None))
                 else:
                     logging.warning(f"차량 {car_index+1}/{len(car_data)}: 상세 페이지 HTML을 가져오지 못했습니다.")
                     # 기본 정보만으로 인덱싱 시도
                     if index_car_to_opensearch(client, car_dict, car_index+1):
                         indexed_count += 1
+                    finish_detail_task(task_queue, detail_tasks.pop(car_index, None))
                 
                 # 상세 페이지 요청 사이에 랜덤 지연
                 if car_index < len(car_data) - 1:  # 마지막 항목이 아니면
@@ -654,8 +750,15 @@ def scrape_page(driver, url, client):
             
             except Exception as e:
                 logging.error(f"차량 {car_index+1} 처리 중 오류 발생: {str(e)}")
+                finish_detail_task(task_queue, detail_tasks.pop(car_index, None), error=str(e))
                 continue
         
+        # 파싱 중인 나머지 차량 인덱싱
+        if parse_stage:
+            for parsed_index, parsed_car_dict in parse_stage.drain():
+                indexed_count += index_parsed_car(client, car_data, parsed_index, parsed_car_dict)
+                finish_detail_task(task_queue, detail_tasks.pop(parsed_index, None))
+        
         logging.info(f"총 {indexed_count}/{len(car_data)}개의 차량 데이터 인덱싱 완료")
         return car_data, indexed_count
     
@@ -676,6 +779,91 @@ def scrape_page(driver, url, client):
         logging.error(traceback.format_exc())
         return None, 0
 
+def scrape_queued_detail(driver, client, task_queue, task):
+    """작업 큐에 반환되었거나 종료된 크롤러가 남긴 상세 페이지 작업 처리"""
+    car_dict = task.payload
+    try:
+        detail_html = fetch_detail_page(driver, car_dict['detail_page'], task.id)
+        if detail_html:
+            car_dict = extract_detail_page_data(car_dict, detail_html, task.id)
+        indexed = index_car_to_opensearch(client, car_dict, task.id)
+        task_queue.ack(task)
+        return 1 if indexed else 0
+    except Exception as e:
+        logging.error(f"큐 작업 {task} 처리 중 오류 발생: {str(e)}")
+        task_queue.nack(task, error=str(e))
+        return 0
+
+def scrape_queue(client, task_queue, parse_stage=None):
+    """작업 큐에서 목록 페이지와 상세 페이지 작업을 가져와 스크랩 및 인덱싱 (여러 프로세스가 같은 큐 공유)"""
+    base_url = 'https://www.carku.kr/search/search.html'
+    
+    total_indexed = 0
+    
+    # 첫 페이지만 추가하고, 이후 페이지는 목록을 읽은 크롤러가 추가
+    task_queue.put(work_queue.CARKU_PAGE, task_queue.key(1), {"page": 1}, priority=-1)
+    
+    driver = None
+    policy = RecyclePolicy()
+    try:
+        driver = create_webdriver()
+        policy.start(driver)
+        
+        while True:
+            task = work_queue.wait_for_task(task_queue, [work_queue.CARKU_PAGE, work_queue.CARKU_DETAIL])
+            if task is None:
+                logging.info("작업 큐에 남은 작업이 없습니다. 크롤링을 종료합니다.")
+                break
+            
+            if task.kind == work_queue.CARKU_DETAIL:
+                total_indexed += scrape_queued_detail(driver, client, task_queue, task)
+                continue
+            
+            page = task.payload["page"]
+            url = f"{base_url}?wCurPage={page}&wKmS=&wKmE=&wPageSize="
+            logging.info(f"Scraping page {page}: {url}")
+            
+            car_data, indexed_count = scrape_page(driver, url, client, parse_stage, task_queue, page)
+            
+            if car_data is None:
+                if page > 1:  # 첫 페이지가 아니면 목록의 끝
+                    logging.info(f"페이지 {page}에서 데이터를 찾을 수 없습니다.")
+                    task_queue.ack(task)
+                else:  # 첫 페이지에서 오류 발생 시 나중에 재시도
+                    logging.warning("첫 페이지에서 오류 발생. 2분 후 재시도...")
+                    task_queue.nack(task, delay=120, error="first page failed")
+                continue
+            
+            task_queue.ack(task)
+            total_indexed += indexed_count
+            logging.info(f"Indexed {indexed_count} cars from page {page}")
+            
+            # 다음 페이지 요청 전 긴 지연 (봇 감지 방지)
+            page_delay = random.uniform(10, 20)
+            logging.info(f"Waiting {page_delay:.2f} seconds before next page...")
+            time.sleep(page_delay)
+            
+            # 메모리 사용량이나 실행 시간이 기준을 넘으면 드라이버 재시작
+            if policy.check(driver):
+                logging.info("웹드라이버 세션 리프레시를 위해 재시작 중...")
+                driver.quit()
+                driver = create_webdriver()
+                policy.start(driver)
+                time.sleep(5)
+        
+    except KeyboardInterrupt:
+        logging.info("사용자에 의해 크롤링이 중단되었습니다.")
+    except Exception as e:
+        logging.error(f"크롤링 중 예상치 못한 오류 발생: {str(e)}")
+        import traceback
+        logging.error(traceback.format_exc())
+    finally:
+        if driver:
+            driver.quit()
+            logging.info("웹드라이버 종료")
+            
+    return total_indexed
+
 def main():
     """메인 함수"""
     logging.info("Starting data collection and indexing to OpenSearch using Selenium...")
@@ -690,8 +878,22 @@ def main():
         client = create_opensearch_client()
         create_carku_index(client)
         
-        # 데이터 수집 및 인덱싱
-        total_indexed = scrape_and_index_data(client)
+        # 데이터 수집 및 인덱싱 (상세 페이지 파싱은 프로세스 풀에서 처리)
+        parse_stage = ParseStage() if config.USE_PARSE_POOL else None
+        # 작업 큐를 쓰면 같은 큐를 공유하는 여러 프로세스가 페이지를 나누어 처리
+        task_queue = work_queue.open_work_queue() if config.CARKU_WORK_QUEUE else None
+        try:
+            if task_queue:
+                total_indexed = scrape_queue(client, task_queue, parse_stage)
+            else:
+                total_indexed = scrape_and_index_data(client, parse_stage)
+        finally:
+            if parse_stage:
+                parse_stage.close()
+            if task_queue:
+                task_queue.close()
+            if car_spool:
+                car_spool.close()
         
         logging.info(f"Total cars indexed: {total_indexed}")
         
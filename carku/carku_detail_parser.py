@@ -0,0 +1,205 @@
+"""
+Fast parser for Carku detail pages.
+
+Builds a single lxml tree per page and reads it with precompiled XPath
+expressions. Labels of the .detail2 table are resolved to field setters through
+a lookup table that is filled once per distinct label, instead of running the
+chain of substring tests for every row. The resulting car_dict is identical to
+the one produced by the BeautifulSoup based extract_detail_page_data.
+"""
+
+import logging
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = None
+    lxml_html = None
+
+def _has_class(name):
+    """CSS 클래스 선택자에 해당하는 XPath 조건"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+if etree is not None:
+    _DETAIL_TOP = etree.XPath(f"(//div[{_has_class('detail-top')}])[1]")
+    _IMAGE_ONCLICK = etree.XPath(f".//div[{_has_class('s_img')}]//li//img/@onclick")
+    _DETAIL_TEXT = etree.XPath(f"(.//div[{_has_class('detail-text')}])[1]")
+    _SALE_PRICE = etree.XPath(f"(.//table[{_has_class('detail1')}]//th[1]//span[{_has_class('red')}])[1]")
+    _CAR_NUMBER = etree.XPath(f"(.//table[{_has_class('detail1')}]//th[2]//span[{_has_class('red')}])[1]")
+    _DETAIL_ROWS = etree.XPath(f".//table[{_has_class('detail2')}]//tr")
+    _SELLER_TABLE = etree.XPath(f"(.//table[{_has_class('detail3')}])[1]")
+    _FIRST_IMG = etree.XPath("(.//img)[1]")
+    _ROWS = etree.XPath(".//tr")
+    _THS = etree.XPath(".//th")
+    _TDS = etree.XPath(".//td")
+    _FIRST_TD = etree.XPath("(.//td)[1]")
+    _ADDRESS = etree.XPath("(.//th[@colspan='3'])[1]")
+
+def is_available():
+    """lxml 설치 여부 확인"""
+    return lxml_html is not None
+
+def _set_field(field):
+    """단순 필드 할당 함수 생성"""
+    def setter(car_dict, value):
+        car_dict[field] = value
+    return setter
+
+def _set_year_registration(car_dict, value):
+    """'년 형 | 등록' 값을 연식과 등록일로 분리"""
+    parts = value.split('|')
+    car_dict['year_model'] = parts[0].strip()
+    if len(parts) >= 2:
+        car_dict['registration_date'] = parts[1].strip()
+
+# .detail2 테이블 라벨 규칙 (기존 파서와 같은 순서의 부분 문자열 매칭)
+FIRST_CELL_RULES = (
+    ('년 형 | 등록', _set_year_registration),
+    ('연료', _set_field('fuel_type')),
+    ('색상', _set_field('color')),
+    ('차대번호', _set_field('vin')),
+    ('압류 | 저당', _set_field('seizure_info')),
+    ('세금미납', _set_field('tax_unpaid')),
+    ('제시번호', _set_field('reference_number')),
+    ('조합정보', _set_field('association_info')),
+)
+
+SECOND_CELL_RULES = (
+    ('변속기', _set_field('transmission_type')),
+    ('주행거리', _set_field('detailed_mileage')),
+    ('성능번호', _set_field('performance_number')),
+    ('사고정보', _set_field('accident_info')),
+)
+
+# 라벨 -> 할당 함수 조회 테이블 (처음 보는 라벨만 규칙을 순회)
+_first_cell_setters = {}
+_second_cell_setters = {}
+
+def _lookup_setter(label, rules, table):
+    """라벨에 해당하는 할당 함수 조회"""
+    try:
+        return table[label]
+    except KeyError:
+        setter = next((func for needle, func in rules if needle in label), None)
+        table[label] = setter
+        return setter
+
+# 누락된 영역별 경고 메시지
+_MISSING_SECTION_MESSAGES = {
+    'detail-top': "상세 페이지 상단 정보를 찾을 수 없습니다.",
+    'detail-text': "detail-text 요소를 찾을 수 없습니다.",
+    'detail3': "판매자 정보 테이블을 찾을 수 없습니다.",
+}
+
+def _text(element):
+    """BeautifulSoup의 .text.strip()과 같은 결과 반환"""
+    return element.text_content().strip()
+
+def parse_detail_fields(html):
+    """
+    Parse the detail fields of a Carku detail page.
+
+    Args:
+        html: HTML text of a detail page
+
+    Returns:
+        tuple: (fields, missing) where fields is None if the detail-top block is
+            missing and missing lists the sections that were not found
+    """
+    document = lxml_html.document_fromstring(html)
+
+    top = _DETAIL_TOP(document)
+    if not top:
+        return None, ['detail-top']
+    top = top[0]
+
+    fields = {}
+    missing = []
+
+    # 'imageShowLarge('URL')' 형식에서 URL 추출
+    all_images = []
+    for onclick_value in _IMAGE_ONCLICK(top):
+        large_img_url = onclick_value.split("'")[1] if "'" in onclick_value else ''
+        if large_img_url:
+            all_images.append(large_img_url)
+    fields['all_images'] = all_images
+
+    # 판매가 및 차량번호
+    detail_text = _DETAIL_TEXT(top)
+    if not detail_text:
+        missing.append('detail-text')
+    else:
+        price_element = _SALE_PRICE(detail_text[0])
+        if price_element:
+            fields['sale_price'] = _text(price_element[0])
+        car_number_element = _CAR_NUMBER(detail_text[0])
+        if car_number_element:
+            fields['car_number'] = _text(car_number_element[0])
+
+    # 차량 상세 정보 (.detail2 테이블)
+    for row in _DETAIL_ROWS(top):
+        ths = _THS(row)
+        tds = _TDS(row)
+
+        if ths and tds:
+            setter = _lookup_setter(_text(ths[0]), FIRST_CELL_RULES, _first_cell_setters)
+            if setter:
+                setter(fields, _text(tds[0]))
+
+        if len(ths) > 1 and len(tds) > 1:
+            setter = _lookup_setter(_text(ths[1]), SECOND_CELL_RULES, _second_cell_setters)
+            if setter:
+                setter(fields, _text(tds[1]))
+
+    # 판매자 정보 (.detail3 테이블)
+    seller_table = _SELLER_TABLE(top)
+    if not seller_table:
+        missing.append('detail3')
+    else:
+        seller_table = seller_table[0]
+        seller_img = _FIRST_IMG(seller_table)
+        if seller_img and seller_img[0].get('src') is not None:
+            fields['seller_img_url'] = seller_img[0].get('src')
+
+        seller_fields = ('seller_name', 'seller_contact', 'seller_company', 'seller_license')
+        for seller_row_index, row in enumerate(_ROWS(seller_table)[:5]):
+            cell = _FIRST_TD(row) if seller_row_index < 4 else _ADDRESS(row)
+            if cell:
+                field = seller_fields[seller_row_index] if seller_row_index < 4 else 'seller_address'
+                fields[field] = _text(cell[0])
+
+    return fields, missing
+
+def extract_detail_page_data(car_dict, html, car_index):
+    """
+    Update car_dict with the data of a Carku detail page.
+
+    Args:
+        car_dict: Car data dictionary built from the listing page
+        html: HTML text of the detail page
+        car_index: Index of the car on the listing page (for logging)
+
+    Returns:
+        dict: The updated car_dict
+    """
+    if not html:
+        return car_dict
+
+    try:
+        fields, missing = parse_detail_fields(html)
+    except Exception as e:
+        logging.error(f"[차량 {car_index}] 상세 페이지 데이터 추출 중 오류: {str(e)}")
+        return car_dict
+
+    for section in missing:
+        logging.warning(f"[차량 {car_index}] {_MISSING_SECTION_MESSAGES[section]}")
+
+    if fields is None:
+        return car_dict
+
+    car_dict.update(fields)
+    logging.info(
+        f"[차량 {car_index}] 상세 정보 추출 완료: 이미지 {len(car_dict['all_images'])}개, "
+        f"판매가: {car_dict.get('sale_price', '')}, 차대번호: {car_dict.get('vin', '')}"
+    )
+    return car_dict
@@ -0,0 +1,123 @@
+"""
+Module for a circuit breaker around calls to an external service.
+
+After a number of consecutive failures the breaker opens and calls are
+refused immediately instead of each one waiting for a timeout. Once the
+reset timeout has passed it becomes half-open and lets calls through as
+probes: a successful probe closes it again, a failed one reopens it with a
+doubled reset timeout (up to a maximum). Callers divert their work (e.g. to
+the disk spool) while the breaker refuses calls, so an outage of the service
+does not slow down the crawl.
+"""
+
+import logging
+import threading
+import time
+import config
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised by CircuitBreaker.call while the breaker refuses calls"""
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker"""
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, max_reset_timeout=None, is_failure=None):
+        """
+        Create a closed breaker.
+
+        Args:
+            name: Name used in log messages
+            failure_threshold: Consecutive failures that open the breaker
+                (default: config.CIRCUIT_FAILURE_THRESHOLD)
+            reset_timeout: Seconds the breaker stays open before the first probe
+                (default: config.CIRCUIT_RESET_TIMEOUT)
+            max_reset_timeout: Upper bound of the reset timeout after failed probes
+                (default: config.CIRCUIT_MAX_RESET_TIMEOUT)
+            is_failure: Function telling whether an exception raised through call()
+                means the service is unavailable (default: every exception does); other
+                exceptions are answers from a working service and count as successes
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.base_reset_timeout = reset_timeout or config.CIRCUIT_RESET_TIMEOUT
+        self.max_reset_timeout = max_reset_timeout or config.CIRCUIT_MAX_RESET_TIMEOUT
+        self.reset_timeout = self.base_reset_timeout
+        self.is_failure = is_failure
+
+        self._state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Current state; an open breaker turns half-open once the reset timeout has passed"""
+        with self.lock:
+            if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                logging.info(f"{self.name} 회로 반개방: 연결 상태 확인을 위해 요청 허용")
+            return self._state
+
+    def allow(self):
+        """
+        Check whether a call may be made now.
+
+        Returns:
+            bool: False while the breaker is open
+        """
+        return self.state != OPEN
+
+    def record_success(self):
+        """Record a successful call; a half-open breaker closes"""
+        with self.lock:
+            if self._state != CLOSED:
+                logging.info(f"{self.name} 회로 닫힘: 정상 동작 재개")
+            self._state = CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+
+    def record_failure(self):
+        """Record a failed call; opens the breaker at the threshold or after a failed probe"""
+        with self.lock:
+            self.failures += 1
+            if self._state == HALF_OPEN:
+                self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+                self._open()
+            elif self._state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self.opened_at = time.monotonic()
+        self.open_count += 1
+        logging.warning(f"{self.name} 회로 열림: 연속 실패 {self.failures}회, {self.reset_timeout:.0f}초 후 재확인")
+
+    def call(self, func, *args, **kwargs):
+        """
+        Call func through the breaker.
+
+        Raises:
+            CircuitOpenError: If the breaker is open (func is not called)
+            Exception: Whatever func raises, after it was recorded (as a failure
+                unless is_failure says otherwise)
+
+        Returns:
+            The return value of func
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure is None or self.is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
@@ -3,6 +3,7 @@ Configuration settings for the Encar crawler.
 """
 
 import os
+import tempfile
 from datetime import datetime
 import random
 
@@ -35,12 +36,155 @@ USER_AGENTS = [
 WINDOW_SIZE = "1920,1080"
 HEADLESS_MODE = False  # Set to True to run in headless mode
 
+# ChromeDriver Configuration
+CHROMEDRIVER_PATH = None  # chromedriver 경로를 직접 지정 (None이면 자동 확인 후 캐시)
+CHROME_BINARY = None  # 버전 확인에 사용할 Chrome 실행 파일 (None이면 플랫폼 기본 위치)
+
+def get_chromedriver_cache_filename():
+    """
+    Get the file the resolved chromedriver path and Chrome version are cached in.
+    
+    Returns:
+        str: Path of the JSON cache file
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    return os.path.join(DATA_DIR, "chromedriver.json")
+
+def get_process_registry_dir():
+    """
+    Get the directory where crawlers record the Chrome processes they spawned.
+    
+    Returns:
+        str: Path of the process registry directory
+    """
+    registry_dir = os.path.join(DATA_DIR, "processes")
+    if not os.path.exists(registry_dir):
+        os.makedirs(registry_dir)
+    
+    return registry_dir
+
+# Chrome Profile Configuration
+CHROME_PROFILE_POOL_SIZE = 4  # 재사용할 Chrome 프로필 디렉토리 수 (사용 중 + 대기 세션 + 종료 중인 세션)
+CHROME_PROFILE_MAX_MB = 300  # 반환할 때 이 크기를 넘은 프로필은 초기화 (MB)
+CHROME_PROFILE_ORPHAN_AGE = 6 * 3600  # 이 시간 동안 사용되지 않은 이전 방식의 임시 프로필 삭제 (초)
+
+def get_chrome_profile_dir():
+    """
+    Get the directory holding the reusable Chrome profiles.
+    
+    Returns:
+        str: Path of the profile pool directory
+    """
+    profile_dir = os.path.join(tempfile.gettempdir(), "encar_chrome_profiles")
+    if not os.path.exists(profile_dir):
+        os.makedirs(profile_dir)
+    
+    return profile_dir
+
+# Browser Pool Configuration
+BROWSER_POOL_STANDBY = 1  # 미리 실행해 두는 대기 브라우저 세션 수 (0이면 재설정할 때마다 새로 생성)
+BROWSER_POOL_WARM_URL = "http://www.encar.com"  # 대기 세션이 미리 열어 두는 페이지
+BROWSER_POOL_ACQUIRE_TIMEOUT = 120  # 생성 중인 대기 세션을 기다리는 최대 시간 (초)
+
+# Watchdog Configuration
+WATCHDOG_DEADLINES = {  # 작업 종류별 최대 실행 시간 (초), 넘으면 세션을 중단하고 페이지를 다시 크롤링
+    "navigate": 60,  # 목록 페이지 이동
+    "extract": 150,  # 차량 한 대의 기본 정보와 상세 정보 추출 (대기 시간 포함)
+    "click": 40,  # 상세 페이지의 세부정보 버튼 대기 및 클릭
+    "close_tab": 15,  # 상세 페이지 탭 닫기
+}
+WATCHDOG_POLL_INTERVAL = 1.0  # 기한 확인 간격 (초)
+WATCHDOG_MAX_PAGE_RETRIES = 2  # 기한 초과로 같은 페이지를 다시 크롤링하는 최대 횟수
+
+# Browser Recycling Configuration (0이면 해당 조건 사용 안 함)
+RECYCLE_MAX_RSS_MB = 1500  # 브라우저 프로세스 트리 전체 메모리가 이 값을 넘으면 교체 (MB, psutil 필요)
+RECYCLE_MAX_HEAP_MB = 512  # 현재 페이지의 JS 힙이 이 값을 넘으면 교체 (MB)
+RECYCLE_MAX_AGE = 2 * 3600  # 브라우저를 이 시간보다 오래 사용하지 않음 (초)
+RECYCLE_MAX_PAGES = 0  # 브라우저당 최대 페이지 수
+
+# Resource Blocking Configuration
+BLOCK_RESOURCES = True  # CDP로 이미지, 폰트, 광고/추적 스크립트 요청 차단
+BLOCKED_URL_PATTERNS = [  # 차단할 URL 패턴 (CDP 와일드카드와 URLPattern 문법 모두에서 유효한 형태)
+    "*://*/*.jpg*", "*://*/*.jpeg*", "*://*/*.png*", "*://*/*.gif*", "*://*/*.webp*", "*://*/*.svg*", "*://*/*.ico*",  # 이미지 (img src 속성은 그대로 읽을 수 있음)
+    "*://*/*.woff*", "*://*/*.ttf*", "*://*/*.otf*", "*://*/*.eot*",  # 폰트
+    "*://*/*.mp4*", "*://*/*.webm*",  # 동영상
+    "*://*.doubleclick.net/*", "*://*.google-analytics.com/*", "*://*.googletagmanager.com/*",  # 광고/추적
+    "*://*.googlesyndication.com/*", "*://*.facebook.net/*", "*://*.facebook.com/tr*", "*://*.criteo.com/*",
+]
+ALLOWED_URL_PATTERNS = []  # 차단 패턴과 겹쳐도 항상 허용할 URL 패턴
+PAGE_LOAD_STATS = True  # 페이지별 로드 시간과 전송 바이트 수집 (Chrome 성능 로그 사용)
+
+def get_page_load_stats_filename(blocking):
+    """
+    Get the file the page load statistics of a run are saved to.
+    
+    Args:
+        blocking: Whether resource blocking was enabled in the run
+        
+    Returns:
+        str: Path of the JSON statistics file
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    return os.path.join(DATA_DIR, f"page_load_{'blocked' if blocking else 'unblocked'}{get_worker_suffix()}.json")
+
 # Crawler Configuration
 MAX_PAGES = 1500  # Maximum number of pages to crawl
 MAX_RETRIES = 3  # Maximum number of retries for the entire crawling process
 MAX_DETAIL_RETRIES = 2  # Maximum number of retries for detail page extraction
 RETRY_DELAY = 5  # Retry delay between attempts
 
+# Parallel Crawling Configuration
+CRAWL_WORKERS = 1  # 동시에 실행할 크롤러 프로세스 수 (run.py --workers, 1이면 병렬 실행 안 함)
+CRAWL_LEASE_PAGES = 10  # 워커에 한 번에 할당하는 페이지 수
+CRAWL_LEASE_TIMEOUT = 1800  # 이 시간 동안 다음 페이지를 요청하지 않은 워커는 종료하고 페이지를 재할당 (초)
+CRAWL_WORKER_MAX_RESTARTS = 5  # 비정상 종료된 워커를 대신해 새 워커를 시작하는 최대 횟수
+CRAWL_PAGE_MAX_ATTEMPTS = 3  # 워커가 비정상 종료된 페이지를 다시 할당하는 최대 횟수 (넘으면 건너뜀)
+WORKER_ID = None  # 현재 프로세스의 워커 번호 (코디네이터가 시작한 워커에서 설정, 파일 이름에 사용)
+
+def get_worker_suffix():
+    """
+    Get the file name suffix that keeps the files of parallel workers apart.
+    
+    Returns:
+        str: "_worker<N>" in a worker started by the coordinator, "" otherwise
+    """
+    return f"_worker{WORKER_ID}" if WORKER_ID is not None else ""
+
+# Work Queue Configuration
+WORK_QUEUE_URL = None  # 작업 큐 주소 (None이면 data/work_queue.db의 SQLite 큐, 예: "sqlite:////var/lib/crawler/queue.db")
+WORK_QUEUE_CRAWL_ID = None  # 작업 키의 크롤링 구분자 (None이면 큐를 열 때 남은 작업이 있는 크롤링, 없으면 날짜로 정함, 같은 구분자 안에서는 같은 페이지/차량을 한 번만 처리)
+WORK_QUEUE_VISIBILITY_TIMEOUT = 3600  # 임대한 목록 페이지 작업이 다른 크롤러에 보이지 않는 시간 (초, 페이지 처리 시간보다 길게)
+WORK_QUEUE_DETAIL_VISIBILITY_TIMEOUT = 300  # 임대한 상세 페이지 작업이 다른 크롤러에 보이지 않는 시간 (초)
+WORK_QUEUE_DETAIL_PRIORITY = 100  # 상세 페이지 작업 우선순위 (목록 페이지는 -페이지 번호, 높을수록 먼저 처리)
+WORK_QUEUE_MAX_ATTEMPTS = 3  # 작업당 최대 시도 횟수 (넘으면 실패 처리)
+WORK_QUEUE_RETRY_DELAY = 60  # 실패한 작업을 다시 시도하기까지의 시간 (초)
+WORK_QUEUE_RETENTION_DAYS = 7  # 완료/실패한 작업 보관 기간 (일)
+WORK_QUEUE_BUSY_TIMEOUT = 30  # 다른 프로세스가 쓰기 잠금을 잡고 있을 때 기다리는 시간 (초)
+WORK_QUEUE_POLL_INTERVAL = 10  # 다른 크롤러가 작업을 추가하기를 기다리는 확인 간격 (초)
+CARKU_WORK_QUEUE = False  # Carku 크롤러가 작업 큐에서 페이지를 가져옴 (같은 큐로 여러 프로세스 실행 가능)
+
+def get_work_queue_filename():
+    """
+    Get the path of the SQLite work queue.
+    
+    Returns:
+        str: Path of the queue database
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    return os.path.join(DATA_DIR, "work_queue.db")
+
+# Parsing Configuration
+USE_PARSE_POOL = True  # HTML 파싱을 별도 프로세스 풀에서 실행
+PARSE_WORKERS = None  # 파싱 워커 프로세스 수 (None이면 CPU 수)
+PARSE_MAX_IN_FLIGHT = None  # 파싱 대기 중인 최대 페이지 수 (None이면 워커 수의 2배)
+NORMALIZE_VECTORIZED_MIN_RECORDS = 2000  # 이 수 이상인 배치만 pandas로 정규화 (작은 배치는 레코드 단위 파싱이 더 빠름)
+
 # Wait Times
 def get_page_load_wait():
     """Random wait time for page loading"""
@@ -155,10 +299,13 @@ def get_page_filename(page_number):
     date_str = datetime.now().strftime("%Y%m%d")
     return os.path.join(DATA_DIR, f"encar_data_page{page_number}_{date_str}.csv")
 
-def get_all_data_filename():
+def get_all_data_filename(extension="csv"):
     """
     Generate a filename for saving all collected data.
     
+    Args:
+        extension: File extension without the dot
+    
     Returns:
         str: Filename for all data
     """
@@ -168,7 +315,47 @@ def get_all_data_filename():
     
     # 현재 날짜와 시간을 이용한 파일명 생성
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    return os.path.join(DATA_DIR, f"encar_all_data_{timestamp}.csv")
+    return os.path.join(DATA_DIR, f"encar_all_data_{timestamp}{get_worker_suffix()}.{extension}")
+
+def get_checkpoint_log_filename():
+    """
+    Get the path of the append-only checkpoint log.
+    
+    The name is fixed (per worker in parallel runs) so that a run started
+    after a crash finds the log of the previous run and continues it.
+    
+    Returns:
+        str: Checkpoint log path
+    """
+    return os.path.join(DATA_DIR, f"encar_checkpoint{get_worker_suffix()}.log.jsonl")
+
+def get_checkpoint_filename():
+    """
+    Generate a filename for the compacted checkpoint of a finished run.
+    
+    Returns:
+        str: Filename for the compacted checkpoint
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(DATA_DIR, f"encar_checkpoint_{timestamp}{get_worker_suffix()}.jsonl")
+
+def get_crawl_state_filename():
+    """
+    Get the path of the saved crawl position (cursor, pending cars and sink offsets).
+
+    The name is fixed so that run.py --resume finds the state of the
+    interrupted run.
+
+    Returns:
+        str: Crawl state path
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+
+    return os.path.join(DATA_DIR, f"crawl_state{get_worker_suffix()}.json")
 
 def get_error_screenshot_filename():
     """Generate filename for error screenshots"""
@@ -183,11 +370,167 @@ OPENSEARCH_PASSWORD = "Myopensearch!1"
 OPENSEARCH_INDEX_NAME = "encar_vehicles"
 OPENSEARCH_USE_SSL = False
 OPENSEARCH_VERIFY_CERTS = False
+ENCAR_INDEX_ALIAS = "encar_cars_detail"  # 읽기/쓰기에 사용하는 별칭 (기존 인덱스 이름)
+ENCAR_INDEX_VERSION = 2  # 현재 Encar 인덱스 매핑 버전
+ENCAR_INDEX_SHARDS = 2  # Encar 인덱스 샤드 수
+ENCAR_INDEX_REPLICAS = 1  # Encar 인덱스 복제본 수
+
+def get_encar_index_name(version=None):
+    """
+    Get the name of a versioned Encar index behind ENCAR_INDEX_ALIAS.
+    
+    Args:
+        version: Mapping version (default: ENCAR_INDEX_VERSION)
+        
+    Returns:
+        str: Index name such as encar_cars_detail_v2
+    """
+    return f"{ENCAR_INDEX_ALIAS}_v{version or ENCAR_INDEX_VERSION}"
+
+ENCAR_INDEX_PARTITION = "weekly"  # 인덱스 분할 주기 ("daily", "weekly", None이면 단일 인덱스)
+ENCAR_RETENTION_DAYS = 90  # 분할 인덱스 보관 기간 (일, 기간이 지난 인덱스는 통째로 삭제)
+PARTITION_FORMATS = {"daily": "%Y.%m.%d", "weekly": "%Gw%V"}  # 분할 주기별 인덱스 이름 날짜 형식
+
+def get_encar_partition_name(when=None):
+    """
+    Get the name of the Encar partition index that holds documents crawled at a given time.
+    
+    Args:
+        when: datetime of the crawl (default: now)
+        
+    Returns:
+        str: Index name such as encar_cars_detail_v2-2026w43 (weekly) or
+            encar_cars_detail_v2-2026.10.19 (daily)
+    """
+    when = when or datetime.now()
+    return f"{get_encar_index_name()}-{when.strftime(PARTITION_FORMATS[ENCAR_INDEX_PARTITION])}"
+
+CARKU_INDEX_ALIAS = "carku_goods_detail"  # Carku 인덱스 별칭 (기존 인덱스 이름)
+CARKU_INDEX_VERSION = 2  # 현재 Carku 인덱스 매핑 버전
+
+def get_carku_index_name(version=None):
+    """
+    Get the name of a versioned Carku index behind CARKU_INDEX_ALIAS.
+    
+    Args:
+        version: Mapping version (default: CARKU_INDEX_VERSION)
+        
+    Returns:
+        str: Index name such as carku_goods_detail_v2
+    """
+    return f"{CARKU_INDEX_ALIAS}_v{version or CARKU_INDEX_VERSION}"
+
+# Reindex Configuration
+REINDEX_SLICES = 8  # 스크롤 슬라이스 수 (재개 단위)
+REINDEX_WORKERS = 4  # 동시에 복사할 슬라이스 수
+REINDEX_BATCH_SIZE = 500  # 스크롤 페이지 및 bulk 요청당 문서 수
+REINDEX_SCROLL = "5m"  # 스크롤 컨텍스트 유지 시간
+
+def get_reindex_state_filename(target):
+    """
+    Get the resume state file of a reindex into target.
+    
+    Args:
+        target: Target index name
+        
+    Returns:
+        str: Path of the JSON state file
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    return os.path.join(DATA_DIR, f"reindex_{target}.json")
+
+# Bulk Load Profile Configuration
+BULK_LOAD_REFRESH_INTERVAL = "-1"  # 대량 적재 중 refresh 간격 (-1이면 비활성화)
+BULK_LOAD_REPLICAS = 0  # 대량 적재 중 복제본 수
+BULK_LOAD_MAX_SEGMENTS = 1  # 적재 후 force merge 세그먼트 수
+BULK_LOAD_FORCE_MERGE_TIMEOUT = 3600  # force merge 요청 제한 시간 (초)
+
+def get_bulk_load_state_filename(index):
+    """
+    Get the file holding the settings to restore after a bulk load of index.
+    
+    Args:
+        index: Index or alias name
+        
+    Returns:
+        str: Path of the JSON state file
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    return os.path.join(DATA_DIR, f"bulk_load_{index}.json")
+
+# Bulk Indexing Configuration
+BULK_BATCH_SIZE = 100  # 초기 bulk 요청당 문서 수
+BULK_MIN_BATCH_SIZE = 10  # 최소 bulk 요청당 문서 수
+BULK_MAX_BATCH_SIZE = 2000  # 최대 bulk 요청당 문서 수
+BULK_BATCH_STEP = 50  # 응답이 목표 지연 시간보다 빠를 때 늘릴 문서 수
+BULK_TARGET_LATENCY = 1.0  # bulk 요청 목표 지연 시간 (초)
+BULK_REQUEST_TIMEOUT = 60  # bulk 요청 제한 시간 (초)
+BULK_MAX_RETRIES = 5  # 거부된(429) 문서 재시도 횟수
+BULK_BACKOFF_BASE = 1.0  # 재시도 대기 시간 기준값 (초, 시도마다 2배)
+BULK_BACKOFF_MAX = 30.0  # 재시도 최대 대기 시간 (초)
+BULK_FLUSH_INTERVAL = 30.0  # 버퍼에 쌓인 문서를 보내는 최대 간격 (초)
+
+def get_bulk_metrics_filename():
+    """
+    Get the file the bulk indexer writes its metrics to.
+    
+    Returns:
+        str: Path of the JSON metrics file
+    """
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    
+    return os.path.join(DATA_DIR, f"bulk_metrics{get_worker_suffix()}.json")
+
+# Circuit Breaker Configuration
+CIRCUIT_FAILURE_THRESHOLD = 3  # 회로를 여는 연속 실패 횟수
+CIRCUIT_RESET_TIMEOUT = 30  # 회로가 열린 뒤 연결을 다시 확인할 때까지의 시간 (초)
+CIRCUIT_MAX_RESET_TIMEOUT = 600  # 확인 실패 시 두 배씩 늘어나는 대기 시간의 상한 (초)
+
+# Carku OpenSearch Client Configuration
+CARKU_OPENSEARCH_TIMEOUT = 30  # 요청 제한 시간 (초, 기존 180)
+CARKU_OPENSEARCH_MAX_RETRIES = 3  # 요청 재시도 횟수 (기존 30)
+
+# Spool Configuration
+SPOOL_ENABLED = True  # OpenSearch에 색인하지 못한 문서를 디스크 스풀에 기록
+SPOOL_SEGMENT_RECORDS = 5000  # 스풀 세그먼트 파일당 문서 수
+SPOOL_FSYNC_EVERY = 50  # fsync 사이에 기록할 최대 문서 수
+SPOOL_REPLAY_WORKERS = 4  # 동시에 재전송할 세그먼트 수
+SPOOL_REPLAY_CHUNK_SIZE = 1000  # 재전송 bulk 요청당 문서 수
+
+def get_spool_dir():
+    """
+    Get the directory of the OpenSearch spool.
+    
+    Returns:
+        str: Path of the spool directory
+    """
+    spool_dir = os.path.join(DATA_DIR, "spool")
+    if not os.path.exists(spool_dir):
+        os.makedirs(spool_dir)
+    
+    return spool_dir
 
 # Data Storage Configuration
 DATA_DIR = "data"  # Directory to save data
 SCREENSHOTS_DIR = "screenshots"  # Directory to save screenshots
 
+# Parquet Output Configuration
+PARQUET_ROW_GROUP_SIZE = 500  # 행 그룹당 차량 수
+PARQUET_COMPRESSION = "zstd"  # 압축 코덱
+
+# Checkpoint Configuration
+CHECKPOINT_FSYNC_EVERY = 20  # fsync 사이에 기록할 최대 차량 수
+CHECKPOINT_FSYNC_INTERVAL = 5.0  # fsync 사이의 최대 시간 (초)
+
+# Summary Configuration
+SUMMARY_LOG_EVERY = 100  # 실행 중 요약을 기록할 차량 수 간격 (None이면 종료 시에만)
+SUMMARY_QUANTILES = (0.1, 0.5, 0.9)  # 가격/주행거리 분위수
+
 # Logging Configuration
 LOG_DIR = "logs"
 LOG_LEVEL = "INFO"
@@ -0,0 +1,402 @@
+"""
+Module for crawling the listing with several crawler processes.
+
+A crawler spends most of its time waiting for page loads and human-like
+pauses, so one machine can run several browsers side by side. The
+coordinator reads the number of listing pages with
+pagination_handler.get_total_pages, splits the page range into leases of
+config.CRAWL_LEASE_PAGES pages and hands them to worker processes, each
+running its own EncarCrawler with its own browser. Workers ask the
+coordinator for every next page over a pipe, so progress is known page by
+page: when a worker dies or does not ask for a page for
+config.CRAWL_LEASE_TIMEOUT seconds, the unfinished part of its lease goes
+back to the front of the queue and a replacement worker is started. An empty
+listing page marks the end of the listing and drops the pages after it;
+pages with listings near the end of the estimated range extend it, because
+the pagination may show only part of the page numbers.
+"""
+
+import contextlib
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+import config
+import driver_setup
+import profile_pool
+import pagination_handler
+import opensearch_handler
+import main
+
+# 워커 프로세스에 전달하는 설정 (spawn으로 시작한 프로세스는 config를 새로 읽음)
+WORKER_CONFIG = ("MAX_PAGES", "HEADLESS_MODE", "MAX_RETRIES", "BLOCK_RESOURCES")
+
+# 워커가 종료 신호를 받은 뒤 정리를 마칠 때까지 기다리는 시간 (초)
+WORKER_STOP_TIMEOUT = 60
+
+class PageLeases:
+    """Worker side of the lease protocol: asks the coordinator for every next page"""
+
+    def __init__(self, conn):
+        """
+        Create the page source of a worker.
+
+        Args:
+            conn: Worker end of the pipe to the coordinator
+        """
+        self.conn = conn
+
+    def next_page(self, finished_page=None, listing_count=None):
+        """
+        Report a finished page and get the next page to crawl.
+
+        Args:
+            finished_page: Page that was just crawled or given up on (None for the first request)
+            listing_count: Listings found on the finished page (0 marks the end of the listing,
+                None if the page was skipped)
+
+        Returns:
+            int or None: Next page number, or None when there is no more work
+        """
+        self.conn.send(("next", finished_page, listing_count))
+        return self.conn.recv()
+
+def _exit_on_signal(signum, frame):
+    """SIGTERM을 받으면 finally 블록이 실행되도록 예외로 종료"""
+    raise SystemExit(128 + signum)
+
+def _worker_main(worker_id, conn, overrides, crawler_options):
+    """워커 프로세스: 코디네이터가 할당한 페이지를 크롤링"""
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    config.WORKER_ID = worker_id
+    signal.signal(signal.SIGTERM, _exit_on_signal)
+
+    # 같은 로그 파일에 기록하는 워커를 구분
+    formatter = logging.Formatter(f"%(asctime)s - worker{worker_id} - %(levelname)s - %(message)s")
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(formatter)
+
+    crawler = main.EncarCrawler(page_leases=PageLeases(conn), **crawler_options)
+    collected = crawler.run()
+    conn.send(("done", collected))
+    conn.close()
+
+def probe_total_pages(start_page):
+    """
+    Open one browser and read the number of listing pages.
+
+    Args:
+        start_page: Page whose pagination is read
+
+    Returns:
+        int or None: Largest page number shown, or None if it could not be read
+    """
+    driver = None
+    try:
+        driver = driver_setup.setup_driver()
+        if not pagination_handler.navigate_to_page(driver, start_page):
+            return None
+        return pagination_handler.get_total_pages(driver)
+    except Exception as e:
+        logging.error(f"총 페이지 수 확인 중 오류 발생: {e}")
+        return None
+    finally:
+        if driver:
+            driver_setup.cleanup_driver(driver)
+
+class Coordinator:
+    """Hands out page leases to crawler processes and reassigns the leases of dead workers"""
+
+    def __init__(self, workers, start_page, end_page, max_end_page=None, crawler_options=None,
+                 lease_pages=None, lease_timeout=None, max_restarts=None):
+        """
+        Create the coordinator.
+
+        Args:
+            workers: Number of crawler processes
+            start_page: First page to crawl
+            end_page: Last page of the estimated listing
+            max_end_page: Last page the range may be extended to (default: end_page)
+            crawler_options: Keyword arguments for each worker's EncarCrawler
+            lease_pages: Pages per lease (default: config.CRAWL_LEASE_PAGES)
+            lease_timeout: Seconds without a page request after which a worker is killed
+                (default: config.CRAWL_LEASE_TIMEOUT)
+            max_restarts: Replacement workers started for dead ones (default: config.CRAWL_WORKER_MAX_RESTARTS)
+        """
+        self.worker_count = workers
+        self.end_page = end_page
+        self.max_end_page = max(max_end_page or end_page, end_page)
+        self.crawler_options = crawler_options or {}
+        self.lease_pages = lease_pages or config.CRAWL_LEASE_PAGES
+        self.lease_timeout = config.CRAWL_LEASE_TIMEOUT if lease_timeout is None else lease_timeout
+        self.max_restarts = config.CRAWL_WORKER_MAX_RESTARTS if max_restarts is None else max_restarts
+
+        self.context = multiprocessing.get_context("spawn")
+        self.workers = {}  # 워커 번호 -> 프로세스, 파이프, 현재 리스, 마지막 요청 시각
+        self.pending = []  # 다시 할당할 (시작, 끝) 페이지 범위
+        self.next_start = start_page
+        self.page_attempts = {}
+        self.restarts = 0
+        self.failed_workers = 0
+        self.collected = 0
+        self.pages_done = 0
+        self.pages_skipped = 0
+
+    def has_work(self):
+        """할당할 페이지가 남아 있는지 확인"""
+        return bool(self.pending) or self.next_start <= self.end_page
+
+    def _start_worker(self, worker_id):
+        """워커 프로세스 시작"""
+        conn, child_conn = self.context.Pipe()
+        overrides = {name: getattr(config, name) for name in WORKER_CONFIG}
+        process = self.context.Process(
+            target=_worker_main,
+            args=(worker_id, child_conn, overrides, self.crawler_options),
+            name=f"crawler-worker{worker_id}"
+        )
+        process.start()
+        child_conn.close()
+        self.workers[worker_id] = {
+            "process": process,
+            "conn": conn,
+            "connected": True,
+            "lease": None,
+            "last_request": time.time(),
+            "done": False,
+            "killed": False,
+        }
+        logging.info(f"워커 {worker_id} 시작 (PID {process.pid})")
+
+    def _fill_workers(self):
+        """할당할 페이지가 있으면 워커가 worker_count개가 되도록 시작"""
+        for worker_id in range(1, self.worker_count + 1):
+            if not self.has_work() or len(self.workers) >= self.worker_count:
+                return
+            if worker_id in self.workers:
+                continue
+            if self.failed_workers > self.restarts:
+                if self.restarts >= self.max_restarts:
+                    return
+                self.restarts += 1
+            self._start_worker(worker_id)
+
+    def _take_lease(self):
+        """다시 할당할 범위를 먼저, 없으면 새 범위를 리스로 꺼냄"""
+        if self.pending:
+            return list(self.pending.pop(0))
+        if self.next_start > self.end_page:
+            return None
+        lease = [self.next_start, min(self.next_start + self.lease_pages - 1, self.end_page)]
+        self.next_start = lease[1] + 1
+        return lease
+
+    def _truncate(self, last_page):
+        """목록의 끝 이후 페이지를 할당 대상에서 제외"""
+        self.end_page = self.max_end_page = min(self.end_page, last_page)
+        self.pending = [(start, min(end, last_page)) for start, end in self.pending if start <= last_page]
+
+    def _extend(self, page):
+        """예상 범위의 끝 근처에도 차량이 있으면 범위를 늘림"""
+        if self.end_page >= self.max_end_page or page < self.end_page - self.lease_pages:
+            return
+        self.end_page = min(self.max_end_page, self.end_page + self.lease_pages * self.worker_count)
+        logging.info(f"목록이 예상보다 길어 {self.end_page}페이지까지 크롤링합니다.")
+
+    def _next_page(self, worker_id, finished_page, listing_count):
+        """완료된 페이지를 기록하고 워커가 다음에 크롤링할 페이지를 결정"""
+        worker = self.workers[worker_id]
+        lease = worker["lease"]
+
+        if finished_page is not None:
+            if listing_count is None:
+                self.pages_skipped += 1
+            else:
+                self.pages_done += 1
+            if listing_count == 0 and finished_page <= self.end_page:
+                logging.info(f"{finished_page}페이지에 차량이 없어 목록의 끝으로 판단합니다.")
+                self._truncate(finished_page - 1)
+            elif listing_count:
+                self._extend(finished_page)
+            if lease:
+                lease[0] = finished_page + 1
+
+        if lease and lease[0] <= min(lease[1], self.end_page):
+            return lease[0]
+
+        worker["lease"] = lease = self._take_lease()
+        if lease is None:
+            return None
+        logging.info(f"워커 {worker_id}에 {lease[0]}~{lease[1]}페이지 할당")
+        return lease[0]
+
+    def _receive(self, worker_id):
+        """워커 메시지 처리"""
+        worker = self.workers[worker_id]
+        try:
+            message = worker["conn"].recv()
+        except (EOFError, OSError):
+            worker["connected"] = False
+            return
+
+        worker["last_request"] = time.time()
+        if message[0] == "next":
+            page = self._next_page(worker_id, message[1], message[2])
+            try:
+                worker["conn"].send(page)
+            except OSError:
+                worker["connected"] = False
+        elif message[0] == "done":
+            worker["done"] = True
+            self.collected += message[1] or 0
+            logging.info(f"워커 {worker_id} 완료: 차량 {message[1]}대 수집")
+
+    def _handle_exit(self, worker_id):
+        """종료된 워커 정리, 비정상 종료면 남은 리스를 다시 할당"""
+        worker = self.workers.pop(worker_id)
+        worker["process"].join()
+        worker["conn"].close()
+
+        # EncarCrawler.run()은 크롤링 오류를 기록하고 정상 반환하므로 완료 보고만으로는 판단할 수 없음
+        lease = worker["lease"]
+        unfinished = bool(lease) and lease[0] <= min(lease[1], self.end_page)
+        if worker["done"] and not unfinished:
+            return
+
+        self.failed_workers += 1
+        if worker["done"]:
+            logging.error(f"워커 {worker_id}가 {lease[0]}~{lease[1]}페이지 리스를 끝내지 못하고 종료되었습니다.")
+        else:
+            logging.error(f"워커 {worker_id}가 비정상 종료되었습니다 (종료 코드 {worker['process'].exitcode}).")
+
+        if unfinished:
+            page = lease[0]
+            self.page_attempts[page] = self.page_attempts.get(page, 0) + 1
+            if self.page_attempts[page] >= config.CRAWL_PAGE_MAX_ATTEMPTS:
+                logging.error(f"{page}페이지에서 워커가 {self.page_attempts[page]}번 종료되어 건너뜁니다.")
+                self.pages_skipped += 1
+                lease[0] += 1
+            if lease[0] <= min(lease[1], self.end_page):
+                self.pending.insert(0, (lease[0], min(lease[1], self.end_page)))
+                logging.info(f"{lease[0]}~{min(lease[1], self.end_page)}페이지를 다른 워커에 다시 할당합니다.")
+
+        # 종료된 워커가 남긴 Chrome 프로세스와 임시 프로필 정리 (다른 워커의 브라우저는 건드리지 않음)
+        driver_setup.kill_chrome_processes()
+        profile_pool.sweep_orphans()
+
+    def _check_progress(self):
+        """리스를 가진 채 오래 응답이 없는 워커 종료"""
+        for worker_id, worker in self.workers.items():
+            if not worker["lease"] or worker["killed"] or not worker["process"].is_alive():
+                continue
+            idle = time.time() - worker["last_request"]
+            if self.lease_timeout and idle > self.lease_timeout:
+                logging.error(f"워커 {worker_id}가 {idle:.0f}초 동안 진행이 없어 종료합니다.")
+                worker["process"].kill()
+                worker["killed"] = True
+
+    def _stop_workers(self):
+        """남은 워커에 종료 신호를 보내고 정리를 기다림"""
+        for worker in self.workers.values():
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+        deadline = time.time() + WORKER_STOP_TIMEOUT
+        for worker in self.workers.values():
+            worker["process"].join(max(deadline - time.time(), 0))
+            if worker["process"].is_alive():
+                worker["process"].kill()
+                worker["process"].join()
+            worker["conn"].close()
+        self.workers.clear()
+        driver_setup.kill_chrome_processes()
+        profile_pool.sweep_orphans()
+
+    def run(self):
+        """
+        Crawl the page range with the worker processes.
+
+        Returns:
+            int: Number of cars collected by all workers
+        """
+        start = time.time()
+        try:
+            self._fill_workers()
+            while self.workers:
+                waitables = [worker["process"].sentinel for worker in self.workers.values()]
+                waitables += [worker["conn"] for worker in self.workers.values() if worker["connected"]]
+                ready = wait(waitables, timeout=config.WATCHDOG_POLL_INTERVAL)
+
+                for worker_id in list(self.workers):
+                    worker = self.workers[worker_id]
+                    if worker["connected"] and worker["conn"] in ready:
+                        self._receive(worker_id)
+                    if not worker["process"].is_alive():
+                        # 종료 직전에 보낸 메시지를 먼저 처리
+                        while worker["connected"] and worker["conn"].poll():
+                            self._receive(worker_id)
+                        self._handle_exit(worker_id)
+
+                self._check_progress()
+                self._fill_workers()
+        finally:
+            self._stop_workers()
+
+        elapsed = time.time() - start
+        logging.info(f"병렬 크롤링 완료: {self.pages_done}페이지, 차량 {self.collected}대, {elapsed:.0f}초 "
+                     f"(건너뛴 페이지 {self.pages_skipped}개, 비정상 종료된 워커 {self.failed_workers}개)")
+        if self.has_work():
+            logging.warning(f"워커 재시작 횟수를 넘어 크롤링하지 못한 페이지가 남았습니다 (다음 페이지: "
+                            f"{self.pending[0][0] if self.pending else self.next_start})")
+        return self.collected
+
+def crawl_parallel(workers, start_page=1, max_pages=None, save_all=True, use_opensearch=True, backfill=False):
+    """
+    Crawl Encar listings with several crawler processes.
+
+    Args:
+        workers: Number of crawler processes
+        start_page: Page number to start crawling from
+        max_pages: Maximum number of pages to crawl
+        save_all: Whether each worker saves its data to a file
+        use_opensearch: Whether to use OpenSearch for indexing
+        backfill: Whether to index with the bulk load profile (applied once around all workers)
+
+    Returns:
+        int: Number of cars collected
+    """
+    max_end_page = start_page + (max_pages or config.MAX_PAGES) - 1
+    lease_pages = config.CRAWL_LEASE_PAGES
+
+    # 페이지네이션에는 일부 페이지 번호만 보일 수 있으므로 모든 워커가 시작할 수 있는 범위는 확보
+    total_pages = probe_total_pages(start_page)
+    end_page = min(max_end_page, max(total_pages or 0, start_page + lease_pages * workers - 1))
+    logging.info(f"워커 {workers}개로 {start_page}~{end_page}페이지 크롤링 시작 (최대 {max_end_page}페이지, 리스당 {lease_pages}페이지)")
+
+    coordinator = Coordinator(
+        workers, start_page, end_page, max_end_page,
+        crawler_options={
+            "save_all": save_all,
+            "use_opensearch": use_opensearch,
+            "backfill": backfill,
+            "manage_load_profile": False,
+        },
+        lease_pages=lease_pages
+    )
+
+    # 대량 적재 설정은 워커마다 바꾸지 않고 전체 실행에 한 번만 적용
+    load_profile = contextlib.nullcontext()
+    if use_opensearch and backfill:
+        try:
+            client = opensearch_handler.create_opensearch_client()
+            opensearch_handler.create_encar_index(client)
+            load_profile = opensearch_handler.bulk_load_profile(
+                client,
+                opensearch_handler.get_write_index(client, config.ENCAR_INDEX_ALIAS) or config.ENCAR_INDEX_ALIAS
+            )
+        except Exception as e:
+            logging.error(f"대량 적재 설정 중 오류 발생: {e}")
+
+    with load_profile:
+        return coordinator.run()
@@ -0,0 +1,156 @@
+"""
+Module for persisting the position of a sequential crawl so it can be resumed.
+
+When run.py was stopped, the page it was on and the car whose details were
+being fetched were lost, and operators had to guess a start page for the next
+run. CrawlState keeps the crawl frontier in a small JSON file
+(config.get_crawl_state_filename()) that is rewritten atomically after each
+car and each page: the cursor (the page to crawl and the number of pages
+finished so far), the cars whose detail pages were opened but not yet handed
+to the pipeline, and the offsets of the pipeline stages at that point. The
+collected cars themselves are recovered from the checkpoint log, so a resumed
+crawl (python run.py --resume) fetches the pending cars first, continues at
+the saved page and skips every car that is already in the log.
+"""
+
+import json
+import logging
+import os
+import time
+import config
+
+# 상태 파일 형식 버전 (형식이 바뀌면 이전 상태 파일은 이어서 실행하지 않음)
+STATE_VERSION = 1
+
+def _save_json(filename, data):
+    """JSON 파일을 원자적으로 저장 (임시 파일에 쓰고 fsync 후 교체)"""
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filename, filename)
+
+class CrawlState:
+    """Cursor, pending cars and sink offsets of a crawl, saved atomically"""
+
+    def __init__(self, filename=None):
+        """
+        Create the state. Nothing is written until start() is called.
+
+        Args:
+            filename: Path of the JSON state file (default: config.get_crawl_state_filename())
+        """
+        self.filename = filename or config.get_crawl_state_filename()
+        self.state = None
+
+    def load(self):
+        """
+        Read the state left by the previous crawl.
+
+        Returns:
+            dict or None: State of an interrupted crawl, or None if there is none,
+                it finished or it cannot be read
+        """
+        try:
+            with open(self.filename, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"크롤링 상태 파일을 읽을 수 없어 무시합니다: {self.filename} ({e})")
+            return None
+
+        if state.get("version") != STATE_VERSION:
+            logging.warning(f"다른 형식의 크롤링 상태 파일을 무시합니다: {self.filename}")
+            return None
+        if state.get("finished"):
+            return None
+        return state
+
+    @property
+    def pending(self):
+        """차량 ID -> 상세 페이지를 가져오던 차량의 기본 정보"""
+        return self.state["pending"]
+
+    def start(self, start_page, max_pages, resume_from=None):
+        """
+        Begin saving the position of a crawl.
+
+        Args:
+            start_page: Page number the crawl starts from
+            max_pages: Maximum number of pages to crawl
+            resume_from: State returned by load() to continue instead of starting over
+        """
+        if resume_from is not None:
+            self.state = resume_from
+            self.state["resumed"] = self.state.get("resumed", 0) + 1
+        else:
+            self.state = {
+                "version": STATE_VERSION,
+                "start_page": start_page,
+                "max_pages": max_pages,
+                "page": start_page,
+                "pages_crawled": 0,
+                "collected": 0,
+                "pending": {},
+                "sinks": {},
+                "finished": False,
+                "resumed": 0,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+        self.save()
+
+    def set_page(self, page, pages_crawled):
+        """
+        Move the cursor.
+
+        Cars still pending on the previous page are dropped, as a crawl that
+        is not interrupted would not retry them either.
+
+        Args:
+            page: Page to crawl next
+            pages_crawled: Number of pages finished so far
+        """
+        if (page, pages_crawled) == (self.state["page"], self.state["pages_crawled"]):
+            return
+        if page != self.state["page"]:
+            self.state["pending"] = {}
+        self.state["page"] = page
+        self.state["pages_crawled"] = pages_crawled
+        self.save()
+
+    def begin_car(self, car_info):
+        """
+        Record a car whose detail page is about to be opened.
+
+        Args:
+            car_info: Basic car record with 차량ID and 상세페이지URL
+        """
+        self.state["pending"][car_info["차량ID"]] = dict(car_info)
+        self.save()
+
+    def finish_car(self, car_id, sinks=None):
+        """
+        Record a car that was handed to the pipeline.
+
+        Args:
+            car_id: Car ID
+            sinks: Offsets of the pipeline stages after the car was written
+        """
+        self.state["pending"].pop(car_id, None)
+        self.state["collected"] += 1
+        if sinks is not None:
+            self.state["sinks"] = sinks
+        self.save()
+
+    def finish(self):
+        """Mark the crawl as finished so that --resume starts a new one"""
+        self.state["pending"] = {}
+        self.state["finished"] = True
+        self.save()
+
+    def save(self):
+        """Write the state file atomically"""
+        self.state["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        _save_json(self.filename, self.state)
@@ -3,9 +3,152 @@ Module for processing and saving car data.
 """
 
 import pandas as pd
+import json
+import os
 import time
 import logging
+from collections import Counter
+from datetime import datetime
 import config
+import normalizer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# 값의 종류가 적어 사전 인코딩하는 문자열 컬럼
+DICTIONARY_COLUMNS = [
+    "제조사", "모델", "연료", "지역", "가격단위",
+    "상세연료", "변속기", "차종", "색상", "상세지역", "인승", "수입구분",
+]
+
+# 일반 문자열 컬럼
+STRING_COLUMNS = [
+    "차량ID", "인덱스", "세부모델", "연식", "주행거리", "가격", "가격값",
+    "이미지URL", "배지", "광고정보", "상세페이지URL",
+    "차량번호", "상세연식", "상세주행거리", "배기량", "압류저당", "조회수", "찜수",
+]
+
+def build_parquet_schema():
+    """
+    Build the Arrow schema used for Parquet output.
+    
+    Returns:
+        pyarrow.Schema: Schema with typed and dictionary-encoded columns
+    """
+    fields = [pa.field(name, pa.string()) for name in STRING_COLUMNS]
+    fields += [pa.field(name, pa.dictionary(pa.int32(), pa.string())) for name in DICTIONARY_COLUMNS]
+    fields += [
+        pa.field("성능기록여부", pa.bool_()),
+        pa.field("엔카진단여부", pa.bool_()),
+        pa.field("페이지번호", pa.int32()),
+        pa.field("크롤링시간", pa.timestamp("s")),
+    ]
+    
+    # normalizer가 채우는 정규화 컬럼
+    arrow_types = {"Int16": pa.int16(), "Int32": pa.int32(), "datetime64[ns]": pa.date32()}
+    fields += [pa.field(name, arrow_types[dtype]) for name, dtype in normalizer.COLUMN_TYPES.items()]
+    return pa.schema(fields)
+
+def _parse_crawling_time(value):
+    """크롤링시간 문자열을 datetime으로 변환"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+class ParquetSink:
+    """Streams car records to a Parquet file one row group at a time"""
+    
+    def __init__(self, filename, row_group_size=None, compression=None):
+        """
+        Create the sink. The file is opened when the first row group is written.
+        
+        Args:
+            filename: Output Parquet file path
+            row_group_size: Number of records per row group (default: config.PARQUET_ROW_GROUP_SIZE)
+            compression: Parquet compression codec (default: config.PARQUET_COMPRESSION)
+        """
+        if pa is None:
+            raise ImportError("Parquet 저장에는 pyarrow가 필요합니다.")
+        
+        self.filename = filename
+        self.row_group_size = row_group_size or config.PARQUET_ROW_GROUP_SIZE
+        self.compression = compression or config.PARQUET_COMPRESSION
+        self.schema = build_parquet_schema()
+        self.raw_schema = pa.schema([field for field in self.schema if field.name not in normalizer.COLUMN_TYPES])
+        self.writer = None
+        self.buffer = []
+        self.row_count = 0
+    
+    def write(self, record):
+        """
+        Add a car record, writing a row group when the buffer is full.
+        
+        Args:
+            record: Car data dictionary
+        """
+        row = {name: record.get(name) for name in self.raw_schema.names}
+        row["크롤링시간"] = _parse_crawling_time(row["크롤링시간"])
+        self.buffer.append(row)
+        
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+    
+    def flush(self):
+        """Write buffered records as one row group"""
+        if not self.buffer:
+            return
+        
+        table = pa.Table.from_pylist(self.buffer, schema=self.raw_schema)
+        
+        # 행 그룹 단위로 정규화 컬럼 추가
+        typed = normalizer.normalize_frame(pd.DataFrame(self.buffer), normalizer.ENCAR_FIELDS)
+        for name in normalizer.COLUMN_TYPES:
+            field = self.schema.field(name)
+            table = table.append_column(field, pa.array(typed[name], from_pandas=True).cast(field.type))
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(
+                self.filename,
+                self.schema,
+                compression=self.compression,
+                use_dictionary=DICTIONARY_COLUMNS
+            )
+        self.writer.write_table(table)
+        
+        self.row_count += len(self.buffer)
+        logging.info(f"Parquet 행 그룹 저장: {len(self.buffer)}개 (누적 {self.row_count}개) - {self.filename}")
+        self.buffer = []
+    
+    def offset(self):
+        """
+        Get the number of records in the file and in the buffer.
+        
+        Returns:
+            dict: "rows" written to row groups and "buffered" records not written yet
+        """
+        return {"rows": self.row_count, "buffered": len(self.buffer)}
+    
+    def close(self):
+        """
+        Flush remaining records and close the file.
+        
+        Returns:
+            str: Filename where data was saved, or None if nothing was written
+        """
+        self.flush()
+        if self.writer is None:
+            return None
+        
+        self.writer.close()
+        self.writer = None
+        logging.info(f"총 {self.row_count}개의 차량 데이터가 {self.filename}에 저장되었습니다.")
+        return self.filename
 
 def save_page_data(car_data, page_number):
     """
@@ -40,7 +183,7 @@ def save_page_data(car_data, page_number):
 
 def save_all_data(all_car_data):
     """
-    Save all collected data to a CSV file.
+    Save all collected data to a Parquet file.
     
     Args:
         all_car_data: List of all car data dictionaries
@@ -52,76 +195,354 @@ def save_all_data(all_car_data):
         logging.warning("저장할 데이터가 없습니다.")
         return None
     
+    try:
+        sink = ParquetSink(config.get_all_data_filename("parquet"))
+        for car in all_car_data:
+            sink.write(car)
+        return sink.close()
+    except Exception as e:
+        logging.error(f"전체 데이터 저장 중 오류 발생: {e}")
+        return None
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P² algorithm (five markers, O(1) memory)"""
+    
+    def __init__(self, p):
+        """
+        Args:
+            p: Quantile to estimate (0 < p < 1)
+        """
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+    
+    def add(self, x):
+        """Add one observation"""
+        q = self.heights
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+        
+        n = self.positions
+        
+        # 관측값이 속한 구간 찾기 (양 끝 마커는 최소/최대값으로 갱신)
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(1, 5) if x < q[i]) - 1
+        
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        
+        # 중간 마커 위치 조정
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+    
+    def _parabolic(self, i, d):
+        """Piecewise-parabolic prediction of the new marker height"""
+        q = self.heights
+        n = self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+    
+    def value(self):
+        """
+        Returns:
+            float or None: Current estimate (exact while fewer than five values were seen)
+        """
+        if not self.heights:
+            return None
+        if len(self.heights) < 5:
+            return self.heights[round(self.p * (len(self.heights) - 1))]
+        return self.heights[2]
+
+class RunningStats:
+    """Streaming count, mean, min, max and quantile estimates of a numeric field"""
+    
+    def __init__(self, quantiles=None):
+        """
+        Args:
+            quantiles: Quantiles to estimate (default: config.SUMMARY_QUANTILES)
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self.sketches = {p: P2Quantile(p) for p in (quantiles or config.SUMMARY_QUANTILES)}
+    
+    def add(self, x):
+        """Add one observation"""
+        self.count += 1
+        self.mean += (x - self.mean) / self.count
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+        for sketch in self.sketches.values():
+            sketch.add(x)
+    
+    def quantile(self, p):
+        """Current estimate of quantile p, or None if p is not tracked or nothing was added"""
+        sketch = self.sketches.get(p)
+        return sketch.value() if sketch else None
+
+class StreamingSummary:
+    """Pipeline stage that aggregates car records as they arrive"""
+    
+    # 차량 수를 세는 범주형 필드
+    CATEGORY_FIELDS = ("제조사", "연료", "지역")
+    
+    # 통계를 내는 숫자 필드 -> (normalizer 값 종류, 로그 제목)
+    NUMERIC_FIELDS = {
+        "가격값": ("price", "가격 통계 (만원)"),
+        "주행거리": ("mileage", "주행거리 통계 (km)"),
+    }
+    
+    def __init__(self, log_every=None):
+        """
+        Args:
+            log_every: Log the summary every this many records (default: config.SUMMARY_LOG_EVERY,
+                None or 0 logs only on close)
+        """
+        self.log_every = config.SUMMARY_LOG_EVERY if log_every is None else log_every
+        self.record_count = 0
+        self.counters = {field: Counter() for field in self.CATEGORY_FIELDS}
+        self.stats = {field: RunningStats() for field in self.NUMERIC_FIELDS}
+    
+    def write(self, record):
+        """Add one car record"""
+        self.record_count += 1
+        for field, counter in self.counters.items():
+            value = record.get(field)
+            if value:
+                counter[value] += 1
+        for field, stats in self.stats.items():
+            number = normalizer.parse_value(self.NUMERIC_FIELDS[field][0], record.get(field))
+            if number is not None:
+                stats.add(number)
+        
+        if self.log_every and self.record_count % self.log_every == 0:
+            self.log_summary()
+    
+    def snapshot(self):
+        """
+        Return the current summary.
+        
+        Returns:
+            dict: Record count, per-category counts and numeric statistics
+        """
+        return {
+            "record_count": self.record_count,
+            "counts": {field: dict(counter.most_common()) for field, counter in self.counters.items()},
+            "stats": {
+                field: {
+                    "count": stats.count,
+                    "min": stats.min,
+                    "max": stats.max,
+                    "mean": stats.mean if stats.count else None,
+                    "quantiles": {p: stats.quantile(p) for p in stats.sketches},
+                }
+                for field, stats in self.stats.items()
+            },
+        }
+    
+    def log_summary(self):
+        """Log the current summary"""
+        if not self.record_count:
+            logging.warning("요약할 데이터가 없습니다.")
+            return
+        
+        logging.info("\n===== 데이터 요약 =====")
+        logging.info(f"총 차량 수: {self.record_count}")
+        
+        for field, counter in self.counters.items():
+            logging.info(f"\n{field}별 차량 수:")
+            for value, count in counter.most_common():
+                logging.info(f"{value}: {count}")
+        
+        for field, stats in self.stats.items():
+            if not stats.count:
+                continue
+            logging.info(f"\n{self.NUMERIC_FIELDS[field][1]}:")
+            logging.info(f"최소: {stats.min:g}")
+            logging.info(f"최대: {stats.max:g}")
+            logging.info(f"평균: {stats.mean:.2f}")
+            for p in stats.sketches:
+                label = "중앙값" if p == 0.5 else f"{round(p * 100)}% 분위수"
+                logging.info(f"{label}: {stats.quantile(p):g}")
+    
+    def close(self):
+        """Log the final summary"""
+        self.log_summary()
 
 def print_data_summary(car_data):
     """
     Print a summary of the collected data.
     
     Args:
-        car_data: List of car data dictionaries
+        car_data: Iterable of car data dictionaries
     """
-    if not car_data:
-        logging.warning("요약할 데이터가 없습니다.")
-        return
-    
     try:
-        # 데이터프레임으로 변환
-        df = pd.DataFrame(car_data)
-        
-        # 데이터 요약 출력
-        logging.info("\n===== 데이터 요약 =====")
-        logging.info(f"총 차량 수: {len(df)}")
-        
-        # 제조사별 차량 수
-        logging.info("\n제조사별 차량 수:")
-        for manufacturer, count in df["제조사"].value_counts().items():
-            logging.info(f"{manufacturer}: {count}")
-        
-        # 연료별 차량 수
-        logging.info("\n연료별 차량 수:")
-        for fuel, count in df["연료"].value_counts().items():
-            logging.info(f"{fuel}: {count}")
-        
-        # 지역별 차량 수
-        logging.info("\n지역별 차량 수:")
-        for location, count in df["지역"].value_counts().items():
-            logging.info(f"{location}: {count}")
-        
-        # 가격 통계
-        if "가격값" in df.columns:
-            # 숫자로 변환 가능한 가격만 선택
-            numeric_prices = pd.to_numeric(df["가격값"].replace("정보없음", None), errors="coerce")
-            logging.info("\n가격 통계 (만원):")
-            logging.info(f"최소: {numeric_prices.min()}")
-            logging.info(f"최대: {numeric_prices.max()}")
-            logging.info(f"평균: {numeric_prices.mean():.2f}")
-            logging.info(f"중앙값: {numeric_prices.median()}")
-        
+        summary = StreamingSummary(log_every=0)
+        for car in car_data:
+            summary.write(car)
+        summary.log_summary()
     except Exception as e:
         logging.error(f"데이터 요약 출력 중 오류 발생: {e}")
 
-def save_checkpoint(car_data, idx, page_number):
-    """
-    Save a checkpoint of the data at regular intervals.
+class CheckpointLog:
+    """Append-only JSONL checkpoint log that writes each car record once"""
     
-    Args:
-        car_data: List of car data dictionaries
-        idx: Current index
-        page_number: Current page number
+    def __init__(self, filename, key_field="차량ID", fsync_every=None, fsync_interval=None):
+        """
+        Open the log for appending, repairing a torn last line left by a crash.
         
-    Returns:
-        bool: True if checkpoint was saved, False otherwise
-    """
-    # 5개 차량마다 중간 저장
-    if (idx + 1) % 5 == 0:
-        try:
-            temp_df = pd.DataFrame(car_data)
-            checkpoint_filename = f"encar_benz_data_checkpoint_page{page_number}_{idx+1}.csv"
-            temp_df.to_csv(checkpoint_filename, index=False, encoding="utf-8-sig")
-            logging.info(f"중간 저장 완료: 페이지 {page_number}에서 {idx+1}개 차량 처리됨")
-            return True
-        except Exception as e:
-            logging.error(f"중간 저장 중 오류 발생: {e}")
-            return False
-    
-    return False 
\ No newline at end of file
+        Args:
+            filename: Checkpoint log file path
+            key_field: Record field used to deduplicate during compaction
+            fsync_every: Records written between fsync calls (default: config.CHECKPOINT_FSYNC_EVERY)
+            fsync_interval: Maximum seconds between fsync calls (default: config.CHECKPOINT_FSYNC_INTERVAL)
+        """
+        self.filename = filename
+        self.key_field = key_field
+        self.fsync_every = fsync_every or config.CHECKPOINT_FSYNC_EVERY
+        self.fsync_interval = fsync_interval or config.CHECKPOINT_FSYNC_INTERVAL
+        
+        directory = os.path.dirname(filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        self._repair()
+        self.file = open(filename, "a", encoding="utf-8")
+        self.unsynced = 0
+        self.last_sync = time.time()
+    
+    def _repair(self):
+        """마지막 줄이 중간에 끊긴 경우 마지막 완전한 줄까지 잘라냄"""
+        if not os.path.exists(self.filename):
+            return
+        
+        with open(self.filename, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                chunk_start = max(0, position - 4096)
+                f.seek(chunk_start)
+                chunk = f.read(position - chunk_start)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    valid_end = chunk_start + newline + 1
+                    break
+                position = chunk_start
+            else:
+                valid_end = 0
+            
+            if valid_end < end:
+                logging.warning(f"체크포인트 로그의 끊긴 마지막 줄을 제거합니다: {end - valid_end}바이트")
+                f.truncate(valid_end)
+    
+    def write(self, record):
+        """
+        Append a car record.
+        
+        Args:
+            record: Car data dictionary
+        """
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
+        self.unsynced += 1
+        
+        if self.unsynced >= self.fsync_every or time.time() - self.last_sync >= self.fsync_interval:
+            self.sync()
+    
+    def sync(self):
+        """Flush written records to disk"""
+        if self.unsynced:
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+        self.last_sync = time.time()
+    
+    def offset(self):
+        """
+        Get the end of the log.
+        
+        Returns:
+            int: Size of the log in bytes after the last written record
+        """
+        return self.file.tell()
+    
+    def iter_records(self):
+        """
+        Read back the records in the log.
+        
+        Yields:
+            dict: Car data dictionaries in write order
+        """
+        if not os.path.exists(self.filename):
+            return
+        
+        with open(self.filename, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"체크포인트 로그 {line_number}번째 줄을 읽을 수 없습니다.")
+    
+    def close(self):
+        """Sync and close the log file"""
+        if self.file.closed:
+            return
+        self.sync()
+        self.file.close()
+    
+    def compact(self, output_filename):
+        """
+        Write the deduplicated records to output_filename and remove the log.
+        
+        When a car was written more than once, the last record wins. The output
+        is written to a temporary file and renamed, so a crash during
+        compaction leaves the log intact.
+        
+        Args:
+            output_filename: Path of the compacted JSONL file
+            
+        Returns:
+            int: Number of records in the compacted file
+        """
+        self.close()
+        
+        # 첫 번째 읽기: 키별 마지막 줄 번호
+        last_line = {}
+        for line_number, record in enumerate(self.iter_records()):
+            last_line[record.get(self.key_field, line_number)] = line_number
+        keep = set(last_line.values())
+        
+        # 두 번째 읽기: 마지막 줄만 기록
+        temp_filename = output_filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as out:
+            for line_number, record in enumerate(self.iter_records()):
+                if line_number in keep:
+                    out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+        
+        os.replace(temp_filename, output_filename)
+        os.remove(self.filename)
+        logging.info(f"체크포인트 압축 완료: {len(keep)}개 차량 -> {output_filename}")
+        return len(keep)
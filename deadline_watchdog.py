@@ -0,0 +1,157 @@
+"""
+Module for bounding how long a single WebDriver call may hang.
+
+The WebDriver command timeout, page load timeout and implicit wait overlap,
+so one stuck call could block the crawler for minutes without any log line.
+Operations are wrapped in deadline() with a per-type limit
+(config.WATCHDOG_DEADLINES: navigate, extract, click, close_tab). A watchdog
+thread checks the running operations and, once a deadline has passed, aborts
+the session by killing its Chrome and chromedriver processes; the blocked
+call then fails immediately. Every deadline() scope that was active during
+an abort raises DeadlineExceeded when it exits, even if the code inside
+caught the resulting WebDriver error, so the crawler can reset the driver
+and put the page back to be crawled again.
+"""
+
+import contextlib
+import logging
+import threading
+import time
+from collections import Counter
+import config
+import process_registry
+
+class DeadlineExceeded(Exception):
+    """Raised when an operation ran past its deadline and its session was aborted"""
+
+    def __init__(self, operation, seconds):
+        super().__init__(f"{operation} did not finish within {seconds}s")
+        self.operation = operation
+        self.seconds = seconds
+
+class Watchdog:
+    """Deadline monitor thread for WebDriver operations"""
+
+    def __init__(self, deadlines=None, poll_interval=None):
+        """
+        Create the watchdog; its thread starts with the first deadline.
+
+        Args:
+            deadlines: Seconds per operation type, merged over config.WATCHDOG_DEADLINES
+            poll_interval: Seconds between deadline checks (default: config.WATCHDOG_POLL_INTERVAL)
+        """
+        self.deadlines = {**config.WATCHDOG_DEADLINES, **(deadlines or {})}
+        self.poll_interval = poll_interval or config.WATCHDOG_POLL_INTERVAL
+
+        self.active = {}
+        self.aborts = []
+        self.expired_counts = Counter()
+        self.next_token = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def _ensure_thread(self):
+        """감시 스레드가 없으면 시작"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        """기한이 지난 작업의 세션을 중단"""
+        while True:
+            time.sleep(self.poll_interval)
+            now = time.monotonic()
+            expired = []
+            with self.lock:
+                for operation in self.active.values():
+                    if not operation["fired"] and now >= operation["expires_at"]:
+                        operation["fired"] = True
+                        self.aborts.append((operation["name"], operation["seconds"]))
+                        self.expired_counts[operation["name"]] += 1
+                        expired.append(operation)
+
+            for operation in expired:
+                logging.error(f"{operation['name']} 작업이 {operation['seconds']}초 안에 끝나지 않아 세션을 중단합니다.")
+                try:
+                    operation["abort"]()
+                except Exception as e:
+                    logging.error(f"세션 중단 중 오류 발생: {e}")
+
+    @contextlib.contextmanager
+    def deadline(self, operation, driver=None, seconds=None, abort=None):
+        """
+        Run the body under a deadline.
+
+        Args:
+            operation: Operation type, a key of the configured deadlines
+            driver: WebDriver whose processes are killed when the deadline passes
+            seconds: Deadline overriding the configured one
+            abort: Function called instead of killing the driver's processes
+
+        Raises:
+            DeadlineExceeded: If a session was aborted while the body ran
+        """
+        seconds = seconds or self.deadlines[operation]
+        if abort is None:
+            abort = lambda: process_registry.kill_driver_processes(driver)
+
+        with self.lock:
+            self.next_token += 1
+            token = self.next_token
+            mark = len(self.aborts)
+            self.active[token] = {
+                "name": operation,
+                "seconds": seconds,
+                "expires_at": time.monotonic() + seconds,
+                "abort": abort,
+                "fired": False,
+            }
+        self._ensure_thread()
+
+        try:
+            yield
+        except Exception as e:
+            if not isinstance(e, DeadlineExceeded):
+                aborted = self._aborted_since(mark)
+                if aborted:
+                    raise DeadlineExceeded(*aborted) from e
+            raise
+        else:
+            aborted = self._aborted_since(mark)
+            if aborted:
+                raise DeadlineExceeded(*aborted)
+        finally:
+            with self.lock:
+                self.active.pop(token, None)
+
+    def _aborted_since(self, mark):
+        """mark 이후 처음 중단된 작업의 (이름, 기한), 없으면 None"""
+        with self.lock:
+            return self.aborts[mark] if len(self.aborts) > mark else None
+
+# 크롤러 전체에서 공유하는 감시자
+_watchdog = None
+_watchdog_lock = threading.Lock()
+
+def get_watchdog():
+    """
+    Get the watchdog shared by the crawler modules.
+
+    Returns:
+        Watchdog: Shared instance
+    """
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = Watchdog()
+        return _watchdog
+
+def deadline(operation, driver=None, seconds=None):
+    """
+    Run the body under a deadline of the shared watchdog (see Watchdog.deadline).
+
+    Usage:
+        with deadline_watchdog.deadline("navigate", driver):
+            driver.get(url)
+    """
+    return get_watchdog().deadline(operation, driver, seconds)
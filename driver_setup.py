@@ -3,23 +3,136 @@ Module for setting up the Selenium WebDriver with anti-detection measures.
 """
 
 import os
+import json
 import time
 import logging
 import platform
+import re
 import subprocess
+import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import config
-import tempfile
-import uuid
+import process_registry
+import profile_pool
 import random
 
+# 플랫폼별 Chrome 실행 파일 후보
+CHROME_BINARIES = {
+    "Darwin": [
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/Applications/Chromium.app/Contents/MacOS/Chromium",
+    ],
+    "Linux": ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"],
+}
+
+# 프로세스 안에서 한 번 확인한 chromedriver 경로 (드라이버 재설정 시 재사용)
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def get_chrome_version():
+    """
+    Detect the version of the installed Chrome without any network access.
+
+    Returns:
+        str or None: Version such as "120.0.6099.109", or None if Chrome was not found
+    """
+    system = platform.system()
+    if system == "Windows":
+        commands = [["reg", "query", r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon", "/v", "version"]]
+    else:
+        binaries = [config.CHROME_BINARY] if config.CHROME_BINARY else CHROME_BINARIES.get(system, [])
+        commands = [[binary, "--version"] for binary in binaries]
+    
+    for command in commands:
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+        if match:
+            return match.group(1)
+    return None
+
+def _load_chromedriver_cache(filename):
+    """chromedriver 캐시 파일 읽기 (없거나 손상되면 빈 딕셔너리)"""
+    try:
+        with open(filename, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_chromedriver_cache(filename, cache):
+    """chromedriver 캐시 파일을 원자적으로 저장"""
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(temp_filename, filename)
+
+def resolve_chromedriver():
+    """
+    Get the chromedriver path, looking it up online only when Chrome was updated.
+
+    The path resolved by ChromeDriverManager is cached together with the Chrome
+    version it was resolved for (config.get_chromedriver_cache_filename()) and
+    reused as long as the major version of the installed Chrome is unchanged,
+    so starting a browser needs no network requests. If the lookup fails (e.g.
+    offline), the cached driver is used anyway.
+
+    Returns:
+        str: Path of the chromedriver executable
+
+    Raises:
+        Exception: If no driver could be resolved and none is cached
+    """
+    global _chromedriver_path
+    
+    if config.CHROMEDRIVER_PATH:
+        return config.CHROMEDRIVER_PATH
+    
+    with _chromedriver_lock:
+        if _chromedriver_path and os.path.exists(_chromedriver_path):
+            return _chromedriver_path
+        
+        cache_filename = config.get_chromedriver_cache_filename()
+        cache = _load_chromedriver_cache(cache_filename)
+        cached_path = cache.get("driver_path")
+        cached_available = bool(cached_path) and os.path.exists(cached_path)
+        
+        chrome_version = get_chrome_version()
+        chrome_major = chrome_version.split(".")[0] if chrome_version else None
+        cached_major = (cache.get("chrome_version") or "").split(".")[0] or None
+        
+        # Chrome 버전을 확인할 수 없으면 캐시된 드라이버를 그대로 사용
+        if cached_available and (chrome_major is None or chrome_major == cached_major):
+            logging.info(f"캐시된 chromedriver 사용: {cached_path} (Chrome {chrome_version or cache.get('chrome_version')})")
+            _chromedriver_path = cached_path
+            return cached_path
+        
+        try:
+            logging.info(f"Chrome {chrome_version or '버전 미확인'}에 맞는 chromedriver를 확인합니다.")
+            driver_path = ChromeDriverManager().install()
+        except Exception as e:
+            if not cached_available:
+                raise
+            logging.warning(f"chromedriver 확인 실패, 캐시된 드라이버를 사용합니다 ({cached_path}): {e}")
+            _chromedriver_path = cached_path
+            return cached_path
+        
+        _save_chromedriver_cache(cache_filename, {
+            "chrome_version": chrome_version,
+            "driver_path": driver_path,
+            "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        _chromedriver_path = driver_path
+        return driver_path
+
 def setup_driver():
     """
     Set up and configure a Chrome WebDriver with anti-detection measures.
@@ -27,6 +140,8 @@ def setup_driver():
     Returns:
         WebDriver: Configured Chrome WebDriver instance
     """
+    driver = None
+    profile_dir = None
     try:
         # 크롬 옵션 설정
         chrome_options = Options()
@@ -42,9 +157,9 @@ def setup_driver():
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument(f'user-agent={config.USER_AGENT}')
         
-        # 사용자 데이터 디렉토리 관련 오류 방지를 위해 유니크한 사용자 데이터 디렉토리 설정
-        temp_dir = os.path.join(tempfile.gettempdir(), f"chrome_data_{uuid.uuid4().hex}")
-        chrome_options.add_argument(f"--user-data-dir={temp_dir}")
+        # 다른 브라우저와 겹치지 않는 사용자 데이터 디렉토리 (프로필 풀에서 재사용, 캐시 유지)
+        profile_dir = profile_pool.acquire()
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
         
         # 자동화 감지 플래그 제거
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
@@ -57,15 +172,22 @@ def setup_driver():
         chrome_options.add_argument("--browser-test-timeout=60000")  # 브라우저 테스트 타임아웃
         chrome_options.add_argument("--script-timeout=30000")        # 스크립트 타임아웃
         
-        # WebDriver 설정 및 다운로드
-        driver_path = ChromeDriverManager().install()
-        service = Service(driver_path)
+        # 페이지별 전송 바이트 수집을 위한 성능 로그 (Network 이벤트)
+        if config.PAGE_LOAD_STATS:
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        
+        # WebDriver 설정 (캐시된 chromedriver 경로 사용)
+        driver_path = resolve_chromedriver()
+        # chromedriver를 별도 프로세스 그룹으로 실행해 이 크롤러가 띄운 프로세스만 정리할 수 있게 함
+        service = Service(driver_path, popen_kw=process_registry.popen_kwargs())
         
         # 서비스 시작 타임아웃 증가
         service.start_error_message = "Chrome 드라이버 서비스를 시작하지 못했습니다."
         
         # 드라이버 생성
         driver = webdriver.Chrome(service=service, options=chrome_options)
+        process_registry.register(driver)
+        driver.profile_dir = profile_dir
         
         # 타임아웃 설정
         if hasattr(driver, 'command_executor'):
@@ -74,6 +196,10 @@ def setup_driver():
         # 자동화 감지 회피를 위한 추가 설정
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
         
+        # 이미지, 폰트, 광고/추적 스크립트 요청 차단
+        if config.BLOCK_RESOURCES:
+            apply_resource_blocking(driver)
+        
         # 페이지 로드 타임아웃 설정
         driver.set_page_load_timeout(60)  # 30초에서 60초로 증가
         
@@ -85,8 +211,168 @@ def setup_driver():
 
     except Exception as e:
         logging.error(f"WebDriver 설정 중 오류 발생: {e}")
+        # 생성 도중 실패한 브라우저와 프로필 정리
+        if driver:
+            cleanup_driver(driver)
+        elif profile_dir:
+            profile_pool.release(profile_dir)
         raise
 
+def apply_resource_blocking(driver, blocked_patterns=None, allowed_patterns=None):
+    """
+    Block requests for resources the crawler never reads through CDP Network.setBlockedURLs.
+    
+    Only DOM text and attributes such as img src are read, so images, fonts
+    and ad/tracking scripts (config.BLOCKED_URL_PATTERNS) are never
+    downloaded. Allowed patterns take precedence over blocked ones on Chrome
+    versions that support the urlPatterns parameter; older versions get the
+    blocked patterns only.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        blocked_patterns: URL patterns to block (default: config.BLOCKED_URL_PATTERNS)
+        allowed_patterns: URL patterns never to block (default: config.ALLOWED_URL_PATTERNS)
+        
+    Returns:
+        bool: True if blocking was applied, False otherwise
+    """
+    blocked_patterns = config.BLOCKED_URL_PATTERNS if blocked_patterns is None else blocked_patterns
+    allowed_patterns = config.ALLOWED_URL_PATTERNS if allowed_patterns is None else allowed_patterns
+    
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        try:
+            # 먼저 일치하는 패턴이 적용되므로 허용 패턴을 앞에 둠
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urlPatterns": (
+                [{"urlPattern": pattern, "block": False} for pattern in allowed_patterns]
+                + [{"urlPattern": pattern, "block": True} for pattern in blocked_patterns]
+            )})
+        except WebDriverException:
+            # urlPatterns를 지원하지 않는 이전 Chrome 버전
+            if allowed_patterns:
+                logging.warning("이 Chrome 버전은 허용 패턴을 지원하지 않아 차단 패턴만 적용합니다.")
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_patterns})
+        
+        logging.debug(f"리소스 차단 적용: 차단 패턴 {len(blocked_patterns)}개, 허용 패턴 {len(allowed_patterns)}개")
+        return True
+    except Exception as e:
+        logging.error(f"리소스 차단 설정 중 오류 발생: {e}")
+        return False
+
+# 현재 문서의 탐색 시작부터 DOMContentLoaded까지의 시간 (밀리초)
+NAVIGATION_TIMING_SCRIPT = """
+const entry = performance.getEntriesByType('navigation')[0];
+return entry ? entry.domContentLoadedEventEnd - entry.startTime : null;
+"""
+
+class PageLoadStats:
+    """Per-page load time, transferred bytes and blocked request counts"""
+    
+    def __init__(self):
+        self.pages = {}
+    
+    def _read_network_log(self, driver):
+        """성능 로그의 Network 이벤트에서 전송 바이트, 요청 수, 차단된 요청 수 집계"""
+        transferred = requests = blocked = 0
+        for entry in driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method = message.get("method")
+            if method == "Network.loadingFinished":
+                transferred += message["params"].get("encodedDataLength", 0)
+                requests += 1
+            elif method == "Network.loadingFailed" and message["params"].get("blockedReason"):
+                blocked += 1
+        return transferred, requests, blocked
+    
+    def record(self, driver, kind, seconds=None):
+        """
+        Record one page load.
+        
+        Network events are drained from the Chrome performance log, so each
+        call counts the traffic since the previous one.
+        
+        Args:
+            driver: Selenium WebDriver instance
+            kind: Page kind, e.g. "list" or "detail"
+            seconds: Measured load time (default: DOMContentLoaded time of the current document)
+        """
+        if not config.PAGE_LOAD_STATS:
+            return
+        
+        try:
+            if seconds is None:
+                milliseconds = driver.execute_script(NAVIGATION_TIMING_SCRIPT)
+                seconds = milliseconds / 1000 if milliseconds else None
+            transferred, requests, blocked = self._read_network_log(driver)
+        except Exception as e:
+            logging.debug(f"페이지 로드 통계 수집 중 오류: {e}")
+            return
+        
+        page = self.pages.setdefault(kind, {"pages": 0, "timed_pages": 0, "seconds": 0.0, "bytes": 0, "requests": 0, "blocked": 0})
+        page["pages"] += 1
+        if seconds is not None:
+            page["timed_pages"] += 1
+            page["seconds"] += seconds
+        page["bytes"] += transferred
+        page["requests"] += requests
+        page["blocked"] += blocked
+    
+    def summary(self):
+        """
+        Get per-page averages.
+        
+        Returns:
+            dict: Page kind -> pages, avg_load_ms, avg_kb, avg_requests, avg_blocked
+        """
+        return {
+            kind: {
+                "pages": page["pages"],
+                "avg_load_ms": page["seconds"] * 1000 / page["timed_pages"] if page["timed_pages"] else None,
+                "avg_kb": page["bytes"] / 1024 / page["pages"],
+                "avg_requests": page["requests"] / page["pages"],
+                "avg_blocked": page["blocked"] / page["pages"],
+            }
+            for kind, page in self.pages.items()
+        }
+    
+    def log_summary(self):
+        """
+        Log the averages, save them and compare with the last run in the other blocking mode.
+        
+        Runs with and without blocking (python run.py --no-block-resources) are
+        saved to separate files, so the bytes and load time saved per page can
+        be read from the log of either run.
+        """
+        if not self.pages:
+            return
+        
+        summary = self.summary()
+        filename = config.get_page_load_stats_filename(config.BLOCK_RESOURCES)
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        
+        other_filename = config.get_page_load_stats_filename(not config.BLOCK_RESOURCES)
+        other = {}
+        if os.path.exists(other_filename):
+            with open(other_filename, encoding="utf-8") as f:
+                other = json.load(f)
+        
+        for kind, page in summary.items():
+            load_ms = f"{page['avg_load_ms']:.0f}ms" if page["avg_load_ms"] is not None else "-"
+            logging.info(f"페이지 로드 ({kind}, 차단 {'사용' if config.BLOCK_RESOURCES else '안 함'}): {page['pages']}페이지, "
+                         f"평균 {load_ms}, {page['avg_kb']:.1f}KB, 요청 {page['avg_requests']:.1f}개, 차단 {page['avg_blocked']:.1f}개")
+            
+            if kind not in other:
+                continue
+            blocked, unblocked = (page, other[kind]) if config.BLOCK_RESOURCES else (other[kind], page)
+            message = f"리소스 차단 효과 ({kind}): 페이지당 {unblocked['avg_kb'] - blocked['avg_kb']:.1f}KB 절약"
+            if blocked["avg_load_ms"] is not None and unblocked["avg_load_ms"] is not None:
+                message += f", 로드 시간 {unblocked['avg_load_ms']:.0f}ms -> {blocked['avg_load_ms']:.0f}ms"
+            logging.info(message)
+
+# 크롤러 전체에서 공유하는 페이지 로드 통계
+page_load_stats = PageLoadStats()
+
 def navigate_to_url(driver, url):
     """
     Navigate to the specified URL.
@@ -154,6 +440,9 @@ def cleanup_driver(driver):
     """
     Clean up and close the WebDriver.
 
+    Chrome processes left behind by this driver are killed; other drivers
+    (e.g. standby sessions of a BrowserPool or other crawlers) are not touched.
+
     Args:
         driver: Selenium WebDriver instance
     """
@@ -177,40 +466,30 @@ def cleanup_driver(driver):
             except Exception as e:
                 logging.warning(f"WebDriver 종료 중 오류 발생: {e}")
             
-            # Chrome 및 ChromeDriver 프로세스 강제 종료
-            kill_chrome_processes()
+            # 이 드라이버의 Chrome 및 ChromeDriver 프로세스 강제 종료
+            process_registry.kill_driver_processes(driver)
             
     except Exception as e:
         logging.error(f"WebDriver 정리 중 오류 발생: {e}")
         # 오류가 발생해도 프로세스 정리 시도
-        kill_chrome_processes()
+        process_registry.kill_driver_processes(driver)
+    finally:
+        # Chrome이 종료된 뒤 프로필 디렉토리 반환
+        if getattr(driver, "profile_dir", None):
+            profile_pool.release(driver.profile_dir)
 
 def kill_chrome_processes():
     """
-    Kill any remaining Chrome and ChromeDriver processes.
+    Kill the Chrome and ChromeDriver processes spawned by this crawler.
+
+    Processes left behind by crawler processes that no longer exist are
+    cleaned up as well; Chrome instances of other running crawlers and of
+    the user are left alone.
     """
     try:
-        system = platform.system()
-        
-        if system == "Darwin" or system == "Linux":  # macOS 또는 Linux
-            logging.info("Chrome 관련 프로세스 정리 중...")
-            
-            # Chrome 프로세스 종료
-            subprocess.run(["pkill", "-f", "chrome"], check=False)
-            
-            # ChromeDriver 프로세스 종료
-            subprocess.run(["pkill", "-f", "chromedriver"], check=False)
-            
-            logging.info("Chrome 관련 프로세스 정리 완료")
-            
-        elif system == "Windows":  # Windows
-            logging.info("Chrome 관련 프로세스 정리 중...")
-            
-            # Windows에서는 taskkill 명령어 사용
-            subprocess.run(["taskkill", "/F", "/IM", "chrome.exe"], check=False, shell=True)
-            subprocess.run(["taskkill", "/F", "/IM", "chromedriver.exe"], check=False, shell=True)
-            
-            logging.info("Chrome 관련 프로세스 정리 완료")
+        logging.info("Chrome 관련 프로세스 정리 중...")
+        killed = process_registry.kill_registered_processes()
+        logging.info(f"Chrome 관련 프로세스 정리 완료 (드라이버 {killed}개)")
             
     except Exception as e:
         logging.error(f"프로세스 정리 중 오류 발생: {e}")
@@ -4,6 +4,7 @@ Main module for the Encar crawler.
 
 import time
 import logging
+import contextlib
 import sys
 import random
 from selenium.webdriver.common.by import By
@@ -16,10 +17,20 @@ from selenium.common.exceptions import (
 
 import config
 import driver_setup
+import browser_pool
+import profile_pool
+import recycle_policy
+import deadline_watchdog
 import car_detail_extractor
 import pagination_handler
 import data_processor
 import opensearch_handler
+import bulk_indexer
+import circuit_breaker
+import spool
+import pipeline
+import work_queue
+import crawl_state
 
 # Configure logging
 logging.basicConfig(
@@ -34,7 +45,8 @@ logging.basicConfig(
 class EncarCrawler:
     """Class to manage the crawling of Encar website"""
     
-    def __init__(self, start_page=1, max_pages=None, save_all=True, use_opensearch=True):
+    def __init__(self, start_page=1, max_pages=None, save_all=True, use_opensearch=True, backfill=False,
+                 page_leases=None, manage_load_profile=True, task_queue=None, resume=False):
         """
         Initialize the crawler.
         
@@ -43,14 +55,42 @@ class EncarCrawler:
             max_pages: Maximum number of pages to crawl
             save_all: Whether to save all data to a single file
             use_opensearch: Whether to use OpenSearch for indexing
+            backfill: Whether to index with the bulk load profile (no refresh or replicas during the run)
+            page_leases: Source of the pages to crawl (coordinator.PageLeases in a parallel worker);
+                None follows the pagination from start_page
+            manage_load_profile: Whether run() applies the bulk load profile itself
+                (False when a coordinator applies it around all workers)
+            task_queue: work_queue.WorkQueue to take listing pages from and to claim cars
+                through, so several crawlers share the work; None crawls in-process
+            resume: Whether to continue the crawl position saved by an interrupted run
+                (start_page and max_pages are then taken from the saved state)
         """
         self.start_page = start_page
         self.max_pages = max_pages or config.MAX_PAGES
         self.save_all = save_all
         self.use_opensearch = use_opensearch
+        self.backfill = backfill
+        self.task_queue = task_queue
+        self.page_leases = page_leases
+        if task_queue is not None and page_leases is None:
+            self.page_leases = work_queue.QueuePages(task_queue)
+        self.detail_tasks = {}
+        self.resume = resume
+        # Leased pages are tracked by the coordinator or the work queue instead
+        self.crawl_state = crawl_state.CrawlState() if self.page_leases is None else None
+        self.manage_load_profile = manage_load_profile
         self.driver = None
+        self.browser_pool = None
+        self.robot_detected = False
+        self.recycle_policy = recycle_policy.RecyclePolicy()
         self.opensearch_client = None
-        self.all_car_data = []
+        self.data_sink = None
+        self.checkpoint = None
+        self.summary = None
+        self.car_pipeline = None
+        self.seen_car_ids = set()
+        # Exception that stopped the last run() (None if it finished)
+        self.error = None
         
         # Initialize robot detection counters
         if not hasattr(config, 'ROBOT_DETECTION_COUNT'):
@@ -61,8 +101,11 @@ class EncarCrawler:
             config.LAST_ROBOT_DETECTION = 0
 
     def initialize_driver(self):
-        """Initialize and set up the WebDriver"""
-        self.driver = driver_setup.setup_driver()
+        """Take a WebDriver from the browser pool (warm standby sessions are launched in the background)"""
+        if self.browser_pool is None:
+            self.browser_pool = browser_pool.BrowserPool()
+        self.driver = self.browser_pool.acquire()
+        self.recycle_policy.start(self.driver)
         
         # Set WebDriver command timeout
         if hasattr(self.driver, 'command_executor'):
@@ -95,9 +138,51 @@ class EncarCrawler:
             logging.info("OpenSearch setup complete")
         except Exception as e:
             logging.error(f"Error setting up OpenSearch: {e}")
-            logging.warning("Continuing without OpenSearch indexing")
+            if config.SPOOL_ENABLED:
+                logging.warning(f"Continuing without OpenSearch indexing, spooling cars to {config.get_spool_dir()}")
+            else:
+                logging.warning("Continuing without OpenSearch indexing")
             self.opensearch_client = None
     
+    def initialize_data_sink(self):
+        """Open the Parquet sink if saving all data is enabled"""
+        if not self.save_all:
+            return
+        
+        try:
+            self.data_sink = data_processor.ParquetSink(config.get_all_data_filename("parquet"))
+            logging.info(f"Streaming car data to {self.data_sink.filename}")
+        except Exception as e:
+            logging.error(f"Error setting up Parquet sink: {e}")
+            logging.warning("Continuing without saving data to file")
+            self.data_sink = None
+    
+    def initialize_checkpoint(self, index_sink=None):
+        """
+        Open the checkpoint log and recover cars saved by an interrupted run.
+        
+        Args:
+            index_sink: OpenSearch (or spool) stage that recovered cars are sent to again
+        """
+        try:
+            self.checkpoint = data_processor.CheckpointLog(config.get_checkpoint_log_filename())
+        except Exception as e:
+            logging.error(f"Error opening checkpoint log: {e}")
+            self.checkpoint = None
+            return
+        
+        # The bulk sink buffers cars after the checkpoint log recorded them, so a hard kill can lose
+        # them from the index; document IDs are deterministic, so sending them again is idempotent
+        recovery = pipeline.Pipeline([self.data_sink, self.summary, index_sink])
+        recovered = 0
+        for car_info in self.checkpoint.iter_records():
+            self.seen_car_ids.add(car_info.get("차량ID"))
+            recovery.write(car_info)
+            recovered += 1
+        
+        if recovered:
+            logging.info(f"Recovered {recovered} cars from checkpoint log {self.checkpoint.filename}")
+    
     def accept_cookies_and_setup(self):
         """Accept cookies and set up initial page"""
         try:
@@ -141,7 +226,9 @@ class EncarCrawler:
             backoff_time = min(300 * (2 ** config.ROBOT_DETECTION_COUNT), 1800)
             config.ROBOT_DETECTION_COOLDOWN = backoff_time
             
-            logging.info(f"Waiting {backoff_time} seconds after robot detection...")
+            # The wait happens in reset_driver, which every caller runs after an alert
+            self.robot_detected = True
+            logging.info(f"Robot detection: backing off {backoff_time} seconds before the next request")
             
             return True
         except NoAlertPresentException:
@@ -149,37 +236,65 @@ class EncarCrawler:
             return False
     
     def reset_driver(self):
-        """Reset the WebDriver after errors or robot detection"""
+        """Swap to a standby WebDriver session after errors or robot detection"""
         logging.warning("Resetting WebDriver session")
         
-        # Clean up existing driver
-        if self.driver:
-            driver_setup.cleanup_driver(self.driver)
-        
-        # Set up new driver
+        # Switch to a standby session first and quit the broken one in the background
+        broken_driver = self.driver
         self.initialize_driver()
+        self.browser_pool.release(broken_driver)
         
-        # Wait randomly to reduce robot detection chances
-        wait_time = random.uniform(30, 60)
-        logging.info(f"Waiting {wait_time:.0f} seconds after driver reset...")
-        time.sleep(wait_time)
+        # Session errors retry at once, robot detection waits out the cooldown first
+        if self.robot_detected:
+            self.robot_detected = False
+            logging.info(f"Waiting {config.ROBOT_DETECTION_COOLDOWN} seconds after robot detection...")
+            time.sleep(config.ROBOT_DETECTION_COOLDOWN)
+    
+    def skip_page(self, page_number):
+        """
+        Give up on a page.
+        
+        Args:
+            page_number: Page that could not be crawled
+            
+        Returns:
+            int or None: Page to crawl next, or None if there is no more work
+        """
+        if self.page_leases is not None:
+            return self.page_leases.next_page(page_number, None)
+        return page_number + 1
     
     def crawl_page(self, page_number):
+        """
+        Crawl one listing page, yielding each car once its details are merged.
+        
+        Args:
+            page_number: Page number to crawl
+            
+        Yields:
+            dict: Car record with basic and detail information
+            
+        Returns:
+            tuple: (listing_count, reset_needed) where listing_count is the number of
+                listings found on the page
+        """
         logging.info(f"\n===== Starting crawl of page {page_number} =====\n")
         
         # Check session validity
         if not car_detail_extractor.is_session_valid(self.driver):
             logging.error("WebDriver session is invalid. Driver needs to be reset.")
-            return [], True
+            return 0, True
         
         # Navigate to page
         try:
-            if not pagination_handler.navigate_to_page(self.driver, page_number):
-                return [], False
+            with deadline_watchdog.deadline("navigate", self.driver):
+                navigated = pagination_handler.navigate_to_page(self.driver, page_number)
+            if not navigated:
+                return 0, False
         except UnexpectedAlertPresentException:
             if self.handle_alert("page navigation"):
-                return [], True
-            return [], True
+                return 0, True
+            return 0, True
         
         # Get car listings
         try:
@@ -191,77 +306,44 @@ class EncarCrawler:
             logging.info(f"Found {len(car_items)} cars")
         except UnexpectedAlertPresentException:
             if self.handle_alert("getting car list"):
-                return [], True
-            return [], True
+                return 0, True
+            return 0, True
         except Exception as e:
             logging.error(f"Error getting car list: {e}")
-            return [], True
+            return 0, True
         
-        # If no cars found, return empty list
+        # If no cars found, stop here
         if len(car_items) == 0:
             logging.info("No more cars found")
-            return [], False
-        
-        # List to store car data for current page
-        page_car_data = []
+            return 0, False
         
         # Show progress
         total_cars = len(car_items)
-        indexed_count = 0
+        collected_count = 0
         reset_needed = False
         
         for idx, car in enumerate(car_items):
             try:
                 logging.info(f"Processing car {idx+1}/{total_cars}...")
                 
-                # Check session validity again
-                if not car_detail_extractor.is_session_valid(self.driver):
-                    logging.error("WebDriver session is invalid. Stopping car processing.")
-                    reset_needed = True
-                    break
-                
-                # Extract basic car info
-                car_info = car_detail_extractor.extract_car_info(car, self.all_car_data)
-                
-                # Skip if duplicate or extraction failed
+                with deadline_watchdog.deadline("extract", self.driver):
+                    car_info = self.extract_car(car, page_number)
                 if car_info is None:
                     continue
                 
-                # Add page number
-                car_info["페이지번호"] = page_number
-                
-                # Simulate human behavior - variable wait time
-                random_delay = random.uniform(0.5, 2.5)
-                time.sleep(random_delay)
-                
-                # Get detail info
-                logging.info(f"Getting details for car ID {car_info['차량ID']}...")
-                try:
-                    detail_info = car_detail_extractor.get_car_detail_info(self.driver, car_info["상세페이지URL"])
-                except UnexpectedAlertPresentException:
-                    if self.handle_alert("getting car details"):
-                        reset_needed = True
-                        break
-                    reset_needed = True
-                    break
-                
                 # Check for session error
-                if "세션오류" in detail_info:
+                if "세션오류" in car_info:
                     logging.error("Session error detected. Driver needs to be reset.")
+                    self.finish_detail_task(car_info.get("차량ID"), done=False)
                     reset_needed = True
                     break
                 
-                # Merge basic and detail info
-                car_info.update(detail_info)
-                
-                # Add to data lists
-                page_car_data.append(car_info)
-                self.all_car_data.append(car_info)
-                
-                # Index to OpenSearch if client exists
-                if self.opensearch_client:
-                    if opensearch_handler.index_car_to_opensearch(self.opensearch_client, car_info, idx+1):
-                        indexed_count += 1
+                # Remember the car for duplicate checks and hand it to the consumer
+                self.seen_car_ids.add(car_info["차량ID"])
+                collected_count += 1
+                yield car_info
+                self.finish_detail_task(car_info["차량ID"])
+                self.save_collected(car_info["차량ID"])
                 
                 # Simulate human behavior - variable wait time
                 wait_time = config.get_car_processing_wait() * random.uniform(0.8, 1.2)
@@ -273,6 +355,9 @@ class EncarCrawler:
                     break
                 reset_needed = True
                 break
+            except deadline_watchdog.DeadlineExceeded:
+                # The page is crawled again with a fresh session (cars already collected are skipped)
+                raise
             except Exception as e:
                 logging.error(f"Error extracting car info: {e}")
                 # Check for session error
@@ -282,14 +367,228 @@ class EncarCrawler:
                     break
                 continue
         
-        # Log indexing summary
-        if self.opensearch_client and page_car_data:
-            logging.info(f"Page {page_number}: Indexed {indexed_count}/{len(page_car_data)} cars")
+        logging.info(f"Page {page_number}: Collected {collected_count}/{total_cars} cars")
         
-        return page_car_data, reset_needed
+        return total_cars, reset_needed
     
-    def run(self):
-        """Main method to run the crawler"""
+    def extract_car(self, car, page_number):
+        """
+        Extract the basic and detail information of one car listing.
+        
+        Args:
+            car: Selenium WebElement of the listing
+            page_number: Page number the listing is on
+            
+        Returns:
+            dict or None: Car record (with a "세션오류" key if the session broke),
+                or None if the car is a duplicate or could not be extracted
+        """
+        if not car_detail_extractor.is_session_valid(self.driver):
+            logging.error("WebDriver session is invalid. Stopping car processing.")
+            return {"세션오류": "세션이 유효하지 않습니다"}
+        
+        # Extract basic car info
+        car_info = car_detail_extractor.extract_car_info(car, self.seen_car_ids)
+        
+        # Skip if duplicate or extraction failed
+        if car_info is None:
+            return None
+        
+        # Add page number
+        car_info["페이지번호"] = page_number
+        
+        # Claim the car so that other crawlers sharing the queue skip it
+        if self.task_queue is not None and not self.claim_detail_task(car_info):
+            logging.info(f"Car ID {car_info['차량ID']} is handled by another crawler. Skipping.")
+            return None
+        
+        # Remember the car until it is collected so that a resumed crawl fetches it first
+        if self.crawl_state is not None:
+            self.crawl_state.begin_car(car_info)
+        
+        # Simulate human behavior - variable wait time
+        random_delay = random.uniform(0.5, 2.5)
+        time.sleep(random_delay)
+        
+        # Get detail info
+        logging.info(f"Getting details for car ID {car_info['차량ID']}...")
+        detail_info = car_detail_extractor.get_car_detail_info(self.driver, car_info["상세페이지URL"])
+        
+        # Merge basic and detail info
+        car_info.update(detail_info)
+        return car_info
+    
+    def claim_detail_task(self, car_info):
+        """
+        Claim the queue task of a car before its detail page is opened.
+        
+        Args:
+            car_info: Basic car record
+            
+        Returns:
+            bool: True if this crawler may process the car
+        """
+        car_id = car_info["차량ID"]
+        task = self.detail_tasks.get(car_id)
+        if task is not None:
+            # Claimed before the page was retried
+            return self.task_queue.extend(task, config.WORK_QUEUE_DETAIL_VISIBILITY_TIMEOUT)
+        
+        task = self.task_queue.claim(
+            work_queue.ENCAR_DETAIL,
+            self.task_queue.key(car_id),
+            payload=car_info,
+            priority=config.WORK_QUEUE_DETAIL_PRIORITY,
+            visibility_timeout=config.WORK_QUEUE_DETAIL_VISIBILITY_TIMEOUT
+        )
+        if task is None:
+            return False
+        self.detail_tasks[car_id] = task
+        return True
+    
+    def finish_detail_task(self, car_id, done=True):
+        """
+        Ack the queue task of a collected car, or give it back for a retry.
+        
+        Args:
+            car_id: Car ID
+            done: Whether the car was collected
+        """
+        task = self.detail_tasks.pop(car_id, None)
+        if task is None:
+            return
+        if done:
+            self.task_queue.ack(task)
+        else:
+            self.task_queue.nack(task, delay=0, error="session error")
+    
+    def crawl_queued_details(self):
+        """
+        Crawl the detail pages of cars given back to the queue or left by crawlers that died.
+        
+        Yields:
+            dict: Car record with basic and detail information
+        """
+        while True:
+            task = self.task_queue.lease(
+                work_queue.ENCAR_DETAIL,
+                visibility_timeout=config.WORK_QUEUE_DETAIL_VISIBILITY_TIMEOUT
+            )
+            if task is None:
+                return
+            
+            car_info = dict(task.payload)
+            car_id = car_info["차량ID"]
+            if car_id in self.seen_car_ids:
+                self.task_queue.ack(task)
+                continue
+            self.detail_tasks[car_id] = task
+            
+            logging.info(f"Getting details for queued car ID {car_id}...")
+            car_info = self.fetch_car_details(car_info)
+            if car_info is None:
+                self.finish_detail_task(car_id, done=False)
+                self.reset_driver()
+                return
+            
+            self.seen_car_ids.add(car_id)
+            yield car_info
+            self.finish_detail_task(car_id)
+            
+            time.sleep(config.get_car_processing_wait() * random.uniform(0.8, 1.2))
+    
+    def fetch_car_details(self, car_info):
+        """
+        Open the detail page of a car whose basic information is already known.
+        
+        Args:
+            car_info: Basic car record with 상세페이지URL
+            
+        Returns:
+            dict or None: Car record with basic and detail information,
+                or None if the session broke
+        """
+        with deadline_watchdog.deadline("extract", self.driver):
+            detail_info = car_detail_extractor.get_car_detail_info(self.driver, car_info["상세페이지URL"])
+        if "세션오류" in detail_info:
+            logging.error("Session error detected. Driver needs to be reset.")
+            return None
+        
+        car_info.update(detail_info)
+        return car_info
+    
+    def save_collected(self, car_id):
+        """Save the crawl position after a car was written to the pipeline"""
+        if self.crawl_state is None:
+            return
+        sinks = self.car_pipeline.offsets() if self.car_pipeline else None
+        self.crawl_state.finish_car(car_id, sinks)
+    
+    def restore_crawl_state(self):
+        """
+        Start saving the crawl position, continuing the saved one if resuming.
+        
+        Returns:
+            tuple: (page to crawl first, number of pages already crawled)
+        """
+        saved = self.crawl_state.load() if self.resume else None
+        if saved is None:
+            if self.resume:
+                logging.info(f"No interrupted crawl to resume, starting at page {self.start_page}")
+            self.crawl_state.start(self.start_page, self.max_pages)
+            return self.start_page, 0
+        
+        self.start_page = saved["start_page"]
+        self.max_pages = saved["max_pages"]
+        self.crawl_state.start(self.start_page, self.max_pages, resume_from=saved)
+        logging.info(f"Resuming crawl at page {saved['page']}: {saved['pages_crawled']}/{self.max_pages} pages and "
+                     f"{saved['collected']} cars done, {len(saved['pending'])} cars pending")
+        
+        # Records written after the last fsync of the checkpoint log are lost if the machine went down
+        expected = saved["sinks"].get("CheckpointLog")
+        if self.checkpoint and expected and self.checkpoint.offset() < expected:
+            logging.warning(f"Checkpoint log is shorter than when the crawl stopped ({self.checkpoint.offset()} < {expected} bytes); "
+                            f"cars collected on earlier pages may be missing")
+        return saved["page"], saved["pages_crawled"]
+    
+    def crawl_pending_cars(self):
+        """
+        Fetch the cars whose details were being fetched when the previous run stopped.
+        
+        Yields:
+            dict: Car record with basic and detail information
+        """
+        for car_id, car_info in list(self.crawl_state.pending.items()):
+            # Cars already in the checkpoint log reached the pipeline before the state was saved
+            if car_id in self.seen_car_ids:
+                continue
+            
+            logging.info(f"Getting details for pending car ID {car_id}...")
+            car_info = self.fetch_car_details(dict(car_info))
+            if car_info is None:
+                # The remaining cars stay pending until the crawl moves past the saved page
+                self.reset_driver()
+                return
+            
+            self.seen_car_ids.add(car_id)
+            yield car_info
+            self.save_collected(car_id)
+            
+            time.sleep(config.get_car_processing_wait() * random.uniform(0.8, 1.2))
+    
+    def iter_cars(self):
+        """
+        Crawl the listing pages and yield each car as soon as it is collected.
+        
+        The WebDriver is started on the first iteration and cleaned up when the
+        generator is exhausted or closed, so callers may stop early with break.
+        Cars whose IDs are already in seen_car_ids are skipped. With page_leases,
+        every next page is taken from the coordinator instead of the pagination;
+        otherwise the position is saved after each car and page (crawl_state).
+        
+        Yields:
+            dict: Car record with basic and detail information
+        """
         try:
             # Initialize WebDriver
             self.initialize_driver()
@@ -297,18 +596,27 @@ class EncarCrawler:
             # Accept cookies and initial setup
             # self.accept_cookies_and_setup()
             
-            # Initialize OpenSearch
-            self.initialize_opensearch()
-            
             # Crawling state variables
-            current_page = self.start_page
-            pages_crawled = 0
+            if self.page_leases is not None:
+                current_page = self.page_leases.next_page()
+                pages_crawled = 0
+            else:
+                current_page, pages_crawled = self.restore_crawl_state()
+                try:
+                    yield from self.crawl_pending_cars()
+                except Exception as e:
+                    logging.error(f"Error fetching pending cars: {e}")
+                    self.reset_driver()
             continue_crawling = True
+            deadline_retries = {}
             
-            while continue_crawling and (pages_crawled < self.max_pages):
+            while continue_crawling and current_page is not None and (pages_crawled < self.max_pages):
+                if self.crawl_state is not None:
+                    self.crawl_state.set_page(current_page, pages_crawled)
+                
                 # Crawl current page
                 try:
-                    page_car_data, reset_needed = self.crawl_page(current_page)
+                    listing_count, reset_needed = yield from self.crawl_page(current_page)
                     
                     # Reset driver if needed
                     if reset_needed:
@@ -317,13 +625,27 @@ class EncarCrawler:
                         logging.info(f"Retrying page {current_page}")
                         continue
                     
+                    # Leased pages come from the coordinator or the work queue, which also decide where the listing ends
+                    if self.page_leases is not None:
+                        if self.task_queue is not None:
+                            # Finish cars given back by other crawlers before taking the next page
+                            yield from self.crawl_queued_details()
+                        current_page = self.page_leases.next_page(current_page, listing_count)
+                        if current_page is not None:
+                            time.sleep(random.uniform(2, 5))
+                            if self.recycle_policy.check(self.driver):
+                                self.reset_driver()
+                        continue
+                    
                     # Stop if no cars found
-                    if not page_car_data:
+                    if not listing_count:
                         logging.info("No more cars found. Stopping crawl.")
                         break
                     
-                    # Increment page count
+                    # Increment page count (a resumed crawl continues after the finished page)
                     pages_crawled += 1
+                    if self.crawl_state is not None:
+                        self.crawl_state.set_page(current_page + 1, pages_crawled)
                     
                     # Check if max pages reached
                     if pages_crawled >= self.max_pages:
@@ -337,13 +659,18 @@ class EncarCrawler:
                     
                     # Go to next page
                     try:
-                        next_page = pagination_handler.go_to_next_page(self.driver, current_page)
+                        with deadline_watchdog.deadline("navigate", self.driver):
+                            next_page = pagination_handler.go_to_next_page(self.driver, current_page)
                         
                         if next_page is None:
                             logging.info("Reached last page or failed to navigate.")
                             continue_crawling = False
                         else:
                             current_page = next_page
+                            
+                            # Replace the browser between pages if it grew too large or too old
+                            if self.recycle_policy.check(self.driver):
+                                self.reset_driver()
                     except UnexpectedAlertPresentException:
                         if self.handle_alert("navigating to next page"):
                             self.reset_driver()
@@ -362,62 +689,203 @@ class EncarCrawler:
                         continue
                     self.reset_driver()
                     continue
+                except deadline_watchdog.DeadlineExceeded as e:
+                    logging.error(f"Aborted a hung WebDriver call on page {current_page}: {e}")
+                    self.reset_driver()
+                    deadline_retries[current_page] = deadline_retries.get(current_page, 0) + 1
+                    if deadline_retries[current_page] > config.WATCHDOG_MAX_PAGE_RETRIES:
+                        logging.error(f"Page {current_page} kept hanging, skipping it")
+                        current_page = self.skip_page(current_page)
+                    else:
+                        # Put the page back: it is crawled again and cars already collected are skipped
+                        logging.info(f"Retrying page {current_page}")
+                    continue
                 except TimeoutException as e:
                     logging.error(f"Timeout processing page {current_page}: {e}")
                     self.reset_driver()
-                    current_page += 1
+                    current_page = self.skip_page(current_page)
                     continue
                 except WebDriverException as e:
                     if "timeout" in str(e).lower():
                         logging.error(f"WebDriver timeout: {e}")
                         self.reset_driver()
-                        current_page += 1
+                        current_page = self.skip_page(current_page)
                         continue
                     else:
                         raise
             
-            # Save all data if requested
-            if self.all_car_data and self.save_all:
-                data_processor.save_all_data(self.all_car_data)
-                data_processor.print_data_summary(self.all_car_data)
-                
-                logging.info(f"\n===== Crawling complete =====")
-                logging.info(f"Collected information on {len(self.all_car_data)} cars.")
-                
-                # Print OpenSearch index stats if available
-                if self.opensearch_client:
-                    opensearch_handler.get_index_stats(self.opensearch_client)
+            if self.crawl_state is not None:
+                self.crawl_state.finish()
+        
+        finally:
+            self.close_driver()
+            driver_setup.page_load_stats.log_summary()
+    
+    def close_driver(self):
+        """Shut down the WebDriver, force killing Chrome if a clean shutdown fails"""
+        # Random wait before closing browser
+        time.sleep(config.get_browser_close_wait())
+        
+        # Clean up WebDriver
+        try:
+            if self.driver:
+                # Set short timeouts for clean shutdown
+                try:
+                    self.driver.set_page_load_timeout(30)
+                    self.driver.set_script_timeout(30)
+                except Exception:
+                    pass
+                    
+                driver_setup.cleanup_driver(self.driver)
+            
+            expired = deadline_watchdog.get_watchdog().expired_counts
+            if expired:
+                logging.info(f"Aborted hung WebDriver calls: {dict(expired)}")
+            
+            if self.recycle_policy.recycle_count:
+                logging.info(f"Recycled the browser {self.recycle_policy.recycle_count} times "
+                             f"(peak memory {self.recycle_policy.peak_rss_mb:.0f}MB)")
+            
+            # Quit standby sessions, then sweep whatever Chrome processes this crawler left
+            if self.browser_pool:
+                self.browser_pool.close()
+            driver_setup.kill_chrome_processes()
+        except Exception as e:
+            logging.error(f"Error cleaning up WebDriver: {e}")
+            # Force kill processes
+            driver_setup.kill_chrome_processes()
+        finally:
+            self.driver = None
+            self.browser_pool = None
+    
+    def build_pipeline(self):
+        """
+        Set up the consumers of crawled cars.
+        
+        Returns:
+            pipeline.Pipeline: Checkpoint log, Parquet sink, summary and OpenSearch
+                stages, depending on the crawler options
+        """
+        # Initialize OpenSearch
+        self.initialize_opensearch()
+        
+        # Initialize Parquet sink
+        self.initialize_data_sink()
+        
+        # Summary of the collected data
+        if self.save_all:
+            self.summary = data_processor.StreamingSummary()
+        
+        index_sink = None
+        if self.use_opensearch:
+            # Cars that cannot be indexed are spooled to disk for python run.py --replay-spool
+            record_spool = spool.DiskSpool() if config.SPOOL_ENABLED else None
+            if self.opensearch_client:
+                index_sink = bulk_indexer.EncarBulkSink(
+                    self.opensearch_client,
+                    refresh=not self.backfill,
+                    spool=record_spool,
+                    breaker=circuit_breaker.CircuitBreaker("OpenSearch")
+                )
+            elif record_spool:
+                index_sink = spool.SpoolSink(record_spool)
+        
+        # Initialize checkpoint log (recovers cars from an interrupted run)
+        self.initialize_checkpoint(index_sink)
+        
+        return pipeline.Pipeline([self.checkpoint, self.data_sink, self.summary, index_sink])
+    
+    def run(self):
+        """
+        Main method to run the crawler.
+        
+        Errors are logged instead of raised; the exception that stopped the
+        crawl is kept in self.error so callers can retry.
+        
+        Returns:
+            int: Number of cars collected in this run
+        """
+        car_pipeline = None
+        self.error = None
+        try:
+            car_pipeline = self.build_pipeline()
+            self.car_pipeline = car_pipeline
+            
+            # Backfills load the write index without refresh and replicas; settings are restored even if the crawl fails
+            load_profile = contextlib.nullcontext()
+            if self.backfill and self.manage_load_profile and self.opensearch_client:
+                load_profile = opensearch_handler.bulk_load_profile(
+                    self.opensearch_client,
+                    opensearch_handler.get_write_index(self.opensearch_client, config.ENCAR_INDEX_ALIAS) or config.ENCAR_INDEX_ALIAS
+                )
+            
+            with load_profile:
+                collected = car_pipeline.run(self.iter_cars())
+            
+            # Compact checkpoint log now that the run has finished
+            if self.checkpoint:
+                self.checkpoint.compact(config.get_checkpoint_filename())
+            
+            logging.info(f"\n===== Crawling complete =====")
+            logging.info(f"Collected information on {collected} cars.")
+            return collected
         
         except Exception as e:
+            self.error = e
             logging.error(f"Error during crawling: {e}")
             import traceback
             logging.error(traceback.format_exc())
+            return car_pipeline.record_count if car_pipeline else 0
         
         finally:
-            # Random wait before closing browser
-            time.sleep(config.get_browser_close_wait())
-            
-            # Clean up WebDriver
-            try:
-                if self.driver:
-                    # Set short timeouts for clean shutdown
-                    try:
-                        self.driver.set_page_load_timeout(30)
-                        self.driver.set_script_timeout(30)
-                    except Exception:
-                        pass
-                        
-                    driver_setup.cleanup_driver(self.driver)
-            except Exception as e:
-                logging.error(f"Error cleaning up WebDriver: {e}")
-                # Force kill processes
-                driver_setup.kill_chrome_processes()
+            # Close stages (the checkpoint log is kept for recovery if the run did not finish)
+            if car_pipeline:
+                car_pipeline.close()
+
+
+def crawl_encar(start_page=1, max_pages=None, save_all=True, use_opensearch=True, backfill=False, task_queue=None,
+                resume=False):
+    """
+    Crawl Encar listings with the default pipeline.
+    
+    Args:
+        start_page: Page number to start crawling from
+        max_pages: Maximum number of pages to crawl
+        save_all: Whether to save all data to a single file
+        use_opensearch: Whether to use OpenSearch for indexing
+        backfill: Whether to index with the bulk load profile
+        task_queue: work_queue.WorkQueue to take seeded listing pages from (start_page and
+            max_pages are then ignored)
+        resume: Whether to continue the crawl saved by an interrupted run (start_page and
+            max_pages are then taken from the saved state)
+        
+    Returns:
+        int: Number of cars collected
+        
+    Raises:
+        Exception: The error that stopped the crawl (the crawl position is kept,
+            so it can be retried with resume=True)
+    """
+    crawler = EncarCrawler(
+        start_page=start_page,
+        max_pages=max_pages,
+        save_all=save_all,
+        use_opensearch=use_opensearch,
+        backfill=backfill,
+        task_queue=task_queue,
+        resume=resume
+    )
+    collected = crawler.run()
+    if crawler.error is not None:
+        raise crawler.error
+    return collected
 
 
 def cleanup_existing_processes():
-    """Clean up any existing Chrome and ChromeDriver processes before starting"""
-    logging.info("Cleaning up existing Chrome and ChromeDriver processes...")
+    """Clean up Chrome and ChromeDriver processes left behind by crawler runs that died"""
+    logging.info("Cleaning up leftover Chrome and ChromeDriver processes...")
     driver_setup.kill_chrome_processes()
+    profile_pool.sweep_orphans()
     logging.info("Process cleanup complete")
 
 
@@ -435,14 +903,17 @@ def main():
         try:
             # Create and run crawler
             crawler = EncarCrawler(
-                start_page=66,  # Starting page number
+                start_page=1,  # Starting page number
                 max_pages=None,  # Use default from config if None
                 save_all=True,   # Save all data to a single file
-                use_opensearch=True  # Use OpenSearch for indexing
+                use_opensearch=True,  # Use OpenSearch for indexing
+                resume=retry_count > 0  # Continue where the failed attempt stopped
             )
             
             crawler.run()
-            break  # Exit loop if successful
+            if crawler.error is None:
+                break  # Exit loop if successful
+            raise crawler.error
             
         except Exception as e:
             retry_count += 1
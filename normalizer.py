@@ -0,0 +1,455 @@
+"""
+Module for normalizing displayed car fields into typed values.
+
+Prices ("3,450", "2,450만원"), mileage ("12,345km", "3.2만km"), years
+("22/03식", "2019년형") and counts are scraped as display strings. The parsers
+here work on whole pandas Series with vectorized string operations, so a batch
+of records is converted with a handful of regex passes instead of one Python
+call per field per record. When pyarrow is installed the strings are held in
+Arrow arrays, so the regex passes run in Arrow's compute kernels instead of a
+Python loop over objects. Encar and Carku records share the same parsers and
+typed output columns; only the source field names differ.
+
+Every batch pays a fixed cost of a few dozen pandas/Arrow calls, so the
+vectorized path only wins on large batches. normalize_records uses it from
+config.NORMALIZE_VECTORIZED_MIN_RECORDS records on; smaller batches (bulk
+requests, single cars) go through parse_value, which applies the same
+patterns to one value with the re module.
+"""
+
+from datetime import date, datetime
+import math
+import re
+import numpy as np
+import pandas as pd
+import config
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# 배치 파서가 사용하는 문자열 타입 (pyarrow가 없으면 object)
+_TEXT_DTYPE = pd.ArrowDtype(pa.string()) if pa is not None else object
+
+# 정규화 결과 컬럼 -> pandas 타입
+COLUMN_TYPES = {
+    "price_manwon": "Int32",
+    "mileage_km": "Int32",
+    "model_year": "Int16",
+    "first_registration": "datetime64[ns]",
+    "displacement_cc": "Int32",
+    "view_count": "Int32",
+    "favorite_count": "Int32",
+}
+
+def _integer_range(dtype):
+    """정수 컬럼 타입이 담을 수 있는 (최솟값, 최댓값)"""
+    info = np.iinfo(dtype.lower())
+    return info.min, info.max
+
+def _to_integers(values, dtype):
+    """반올림한 float 배열 (유한하지 않거나 타입 범위를 벗어난 값은 NaN)"""
+    low, high = _integer_range(dtype)
+    values = np.round(values)
+    return np.where(np.isfinite(values) & (values >= low) & (values <= high), values, np.nan)
+
+def _to_integer(value, dtype):
+    """반올림한 정수 (유한하지 않거나 타입 범위를 벗어난 값은 None)"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    low, high = _integer_range(dtype)
+    value = round(value)
+    return value if low <= value <= high else None
+
+# 2자리 연도 중 이 값 이하이면 2000년대로 해석
+_CENTURY_PIVOT = datetime.now().year % 100 + 1
+
+# 값 종류별 정규식 (배치 파서와 단일 값 파서가 함께 사용).
+# Arrow(RE2)에서도 동작하도록 이름 있는 그룹만 쓰고 후방 탐색은 쓰지 않음
+_PRICE_PATTERN = r"^(?:(?P<eok>\d+)억)?(?P<man>\d+)?"
+_MILEAGE_PATTERN = r"(?P<number>\d+(?:\.\d+)?)(?P<man>만)?"
+_NUMBER_PATTERN = r"(?P<number>\d+)"
+_YEAR_PATTERN = r"(?:(?P<full>\d{4})년|(?:^|\D)(?P<model>\d{2})년형)"
+_REGISTERED_YEAR_PATTERN = r"^(?P<year>\d{2})/\d{1,2}"
+_YEAR_MONTH_PATTERN = r"^(?P<year>\d{2}|\d{4})[/.-](?P<month>\d{1,2})"
+_DATE_PATTERN = r"(?P<year>\d{4})[/.-](?P<month>\d{1,2})[/.-](?P<day>\d{1,2})"
+
+def _text(values):
+    """쉼표와 공백을 제거한 문자열 Series로 변환 (결측값은 NA)"""
+    values = np.asarray(values, dtype=object)
+    texts = [None if missing else str(value) for value, missing in zip(values.tolist(), pd.isna(values).tolist())]
+    return pd.Series(texts, dtype=_TEXT_DTYPE).str.replace(r"[,\s]", "", regex=True)
+
+def _number(values):
+    """숫자 문자열을 float 배열로 변환 (빈 문자열 등 변환할 수 없으면 NaN)"""
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+def _matched(values, text):
+    """추출한 그룹이 text와 같은지 나타내는 bool 배열 (Arrow는 빠진 그룹을 빈 문자열로 반환)"""
+    return (values == text).fillna(False).to_numpy(dtype=bool)
+
+def _expand_year(years):
+    """2자리 연도를 4자리로 변환"""
+    return np.where(years < 100, np.where(years <= _CENTURY_PIVOT, years + 2000, years + 1900), years)
+
+def _to_date(years, months, days=None):
+    """연/월/일 배열로 datetime64[D] 배열 생성 (유효하지 않으면 NaT)"""
+    if days is None:
+        days = np.ones_like(years)
+    valid = (years >= 1900) & (months >= 1) & (months <= 12) & (days >= 1) & (days <= 31)
+    month_index = np.where(valid, (years - 1970) * 12 + months - 1, 0).astype("int64")
+    dates = month_index.astype("datetime64[M]").astype("datetime64[D]") + np.where(valid, days - 1, 0).astype("int64")
+    # 존재하지 않는 날짜 (예: 2월 30일)는 다음 달로 넘어가므로 제외
+    valid &= dates.astype("datetime64[M]").astype("int64") == month_index
+    return np.where(valid, dates, np.datetime64("NaT"))
+
+def _price_of(text):
+    """정리된 문자열 Series에서 가격 파싱"""
+    parts = text.str.extract(_PRICE_PATTERN)
+    eok = _number(parts["eok"])
+    man = _number(parts["man"])
+    total = np.nan_to_num(eok) * 10000 + np.nan_to_num(man)
+    return np.where(np.isnan(eok) & np.isnan(man), np.nan, total)
+
+def _mileage_of(text):
+    """정리된 문자열 Series에서 주행거리 파싱"""
+    parts = text.str.extract(_MILEAGE_PATTERN)
+    number = _number(parts["number"])
+    return np.where(_matched(parts["man"], "만"), number * 10000, number)
+
+def _number_of(text):
+    """정리된 문자열 Series에서 첫 정수 파싱"""
+    return _number(text.str.extract(_NUMBER_PATTERN)["number"])
+
+def _year_of(text):
+    """정리된 문자열 Series에서 연식 파싱"""
+    parts = text.str.extract(_YEAR_PATTERN)
+    registered = text.str.extract(_REGISTERED_YEAR_PATTERN)["year"]
+    full = _number(parts["full"])
+    model = _expand_year(_number(parts["model"]))
+    year = np.where(np.isnan(full), model, full)
+    return np.where(np.isnan(year), _expand_year(_number(registered)), year)
+
+def _year_month_of(text):
+    """정리된 문자열 Series에서 등록 연월 파싱"""
+    parts = text.str.extract(_YEAR_MONTH_PATTERN)
+    return _to_date(_expand_year(_number(parts["year"])), _number(parts["month"]))
+
+def _date_of(text):
+    """정리된 문자열 Series에서 날짜 파싱"""
+    parts = text.str.extract(_DATE_PATTERN)
+    return _to_date(_number(parts["year"]), _number(parts["month"]), _number(parts["day"]))
+
+# 값 종류별 배치 파서 (_text로 정리된 Series를 받음)
+_TEXT_PARSERS = {
+    "price": _price_of,
+    "mileage": _mileage_of,
+    "number": _number_of,
+    "year": _year_of,
+    "year_month": _year_month_of,
+    "date": _date_of,
+}
+
+def parse_price(values):
+    """
+    Parse prices in 만원, e.g. "3,450", "2,450만원" or "1억2,000만원".
+
+    Returns:
+        numpy.ndarray: float64 values in 만원 (NaN if not parsable)
+    """
+    return _price_of(_text(values))
+
+def parse_mileage(values):
+    """
+    Parse mileage in km, e.g. "12,345km" or "3.2만km".
+
+    Returns:
+        numpy.ndarray: float64 values in km (NaN if not parsable)
+    """
+    return _mileage_of(_text(values))
+
+def parse_number(values):
+    """
+    Parse the first integer of each value, e.g. "2,497cc" or "1,234".
+
+    Returns:
+        numpy.ndarray: float64 values (NaN if not parsable)
+    """
+    return _number_of(_text(values))
+
+def parse_year(values):
+    """
+    Parse a model year from "2012년", "2019년형", "19/03식(19년형)" or "22/03식".
+
+    The model year in parentheses wins over the registration year.
+
+    Returns:
+        numpy.ndarray: float64 years (NaN if not parsable)
+    """
+    return _year_of(_text(values))
+
+def parse_year_month(values):
+    """
+    Parse a registration month such as "22/03식" or "2019/03" to the first day of that month.
+
+    Returns:
+        numpy.ndarray: datetime64[D] values (NaT if not parsable)
+    """
+    return _year_month_of(_text(values))
+
+def parse_date(values):
+    """
+    Parse dates such as "2019-03-12" or "2019.03.12".
+
+    Returns:
+        numpy.ndarray: datetime64[D] values (NaT if not parsable)
+    """
+    return _date_of(_text(values))
+
+# 값 종류별 파서
+PARSERS = {
+    "price": parse_price,
+    "mileage": parse_mileage,
+    "number": parse_number,
+    "year": parse_year,
+    "year_month": parse_year_month,
+    "date": parse_date,
+}
+
+def _text_value(value):
+    """단일 값을 쉼표와 공백을 제거한 문자열로 변환 (결측값은 None)"""
+    if value is None or (not isinstance(value, str) and pd.isna(value) is True):
+        return None
+    return re.sub(r"[,\s]", "", str(value))
+
+def _expand_year_value(year):
+    """2자리 연도를 4자리로 변환 (단일 값)"""
+    if year >= 100:
+        return year
+    return year + 2000 if year <= _CENTURY_PIVOT else year + 1900
+
+def _date_value(year, month, day=1):
+    """연/월/일로 date 생성 (유효하지 않으면 None)"""
+    if year < 1900:
+        return None
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def _price_value(text):
+    """단일 가격 파싱 (만원)"""
+    match = re.match(_PRICE_PATTERN, text)
+    if match["eok"] is None and match["man"] is None:
+        return None
+    return int(match["eok"] or 0) * 10000 + int(match["man"] or 0)
+
+def _mileage_value(text):
+    """단일 주행거리 파싱 (km)"""
+    match = re.search(_MILEAGE_PATTERN, text)
+    if not match:
+        return None
+    number = float(match["number"])
+    return number * 10000 if match["man"] else number
+
+def _number_value(text):
+    """단일 값의 첫 정수 파싱"""
+    match = re.search(_NUMBER_PATTERN, text)
+    return int(match["number"]) if match else None
+
+def _year_value(text):
+    """단일 연식 파싱 (괄호 안 연형 우선)"""
+    match = re.search(_YEAR_PATTERN, text)
+    if match and match["full"]:
+        return int(match["full"])
+    if match:
+        return _expand_year_value(int(match["model"]))
+    match = re.match(_REGISTERED_YEAR_PATTERN, text)
+    return _expand_year_value(int(match["year"])) if match else None
+
+def _year_month_value(text):
+    """단일 등록 연월 파싱 (해당 월 1일)"""
+    match = re.match(_YEAR_MONTH_PATTERN, text)
+    if not match:
+        return None
+    return _date_value(_expand_year_value(int(match["year"])), int(match["month"]))
+
+def _date_value_of(text):
+    """단일 날짜 파싱"""
+    match = re.search(_DATE_PATTERN, text)
+    if not match:
+        return None
+    return _date_value(int(match["year"]), int(match["month"]), int(match["day"]))
+
+# 값 종류별 단일 값 파서
+_VALUE_PARSERS = {
+    "price": _price_value,
+    "mileage": _mileage_value,
+    "number": _number_value,
+    "year": _year_value,
+    "year_month": _year_month_value,
+    "date": _date_value_of,
+}
+
+def parse_value(kind, value):
+    """
+    Parse a single displayed value without pandas.
+
+    Gives the same result as the batch parser of the same kind (see PARSERS)
+    for one value.
+
+    Args:
+        kind: Value kind ("price", "mileage", "number", "year", "year_month" or "date")
+        value: Displayed value, e.g. "2,450만원"
+
+    Returns:
+        float, int, datetime.date or None: Parsed value, or None if not parsable
+    """
+    text = _text_value(value)
+    if text is None:
+        return None
+    return _VALUE_PARSERS[kind](text)
+
+# (결과 컬럼, 값 종류, 원본 필드) - 원본 필드는 앞쪽이 우선
+ENCAR_FIELDS = (
+    ("price_manwon", "price", ("가격값",)),
+    ("mileage_km", "mileage", ("상세주행거리", "주행거리")),
+    ("model_year", "year", ("상세연식", "연식")),
+    ("first_registration", "year_month", ("상세연식", "연식")),
+    ("displacement_cc", "number", ("배기량",)),
+    ("view_count", "number", ("조회수",)),
+    ("favorite_count", "number", ("찜수",)),
+)
+
+# OpenSearch 문서(영문 필드명) 기준 Encar 필드
+ENCAR_DOCUMENT_FIELDS = (
+    ("price_manwon", "price", ("price_value",)),
+    ("mileage_km", "mileage", ("detailed_mileage", "mileage")),
+    ("model_year", "year", ("detailed_year", "year")),
+    ("first_registration", "year_month", ("detailed_year", "year")),
+    ("displacement_cc", "number", ("engine_displacement",)),
+    ("view_count", "number", ("view_count",)),
+    ("favorite_count", "number", ("favorite_count",)),
+)
+
+CARKU_FIELDS = (
+    ("price_manwon", "price", ("sale_price", "price")),
+    ("mileage_km", "mileage", ("detailed_mileage", "mileage")),
+    ("model_year", "year", ("year_model", "year")),
+    ("first_registration", "date", ("registration_date",)),
+)
+
+def _typed_columns(column, fields, size):
+    """
+    원본 필드별 값 목록으로 결과 컬럼 계산 (정수 컬럼은 float, 날짜 컬럼은 datetime64[D] 배열).
+    column(source)은 값 목록을 반환하고, 배치에 없는 필드는 None을 반환
+    """
+    texts = {}
+    typed = {}
+    for target, kind, sources in fields:
+        result = None
+        for source in sources:
+            if source not in texts:
+                values = column(source)
+                # 같은 원본 필드 (예: 연식 -> model_year, first_registration)는 한 번만 정리
+                texts[source] = None if values is None else _text(values)
+            if texts[source] is None:
+                continue
+            parsed = _TEXT_PARSERS[kind](texts[source])
+            result = parsed if result is None else np.where(pd.isna(result), parsed, result)
+
+        dtype = COLUMN_TYPES[target]
+        if dtype.startswith("datetime64"):
+            typed[target] = np.full(size, np.datetime64("NaT"), dtype="datetime64[D]") if result is None else result
+        else:
+            typed[target] = np.full(size, np.nan) if result is None else _to_integers(result, dtype)
+    return typed
+
+def normalize_frame(frame, fields=ENCAR_FIELDS):
+    """
+    Parse the source columns of a batch into typed columns.
+
+    Args:
+        frame: pandas.DataFrame of raw records
+        fields: Field specification (ENCAR_FIELDS, ENCAR_DOCUMENT_FIELDS or CARKU_FIELDS)
+
+    Returns:
+        pandas.DataFrame: One typed column per target (see COLUMN_TYPES), aligned with frame's
+            index; values that do not fit the column type (e.g. a view count of
+            "99999999999") are missing
+    """
+    typed = _typed_columns(
+        lambda source: frame[source].to_numpy(dtype=object) if source in frame.columns else None,
+        fields, len(frame)
+    )
+    return pd.DataFrame(
+        {name: pd.Series(values, index=frame.index).astype(COLUMN_TYPES[name]) for name, values in typed.items()},
+        index=frame.index
+    )
+
+def _python_values(values):
+    """결과 컬럼 배열을 JSON 직렬화 가능한 Python 값 목록으로 변환 (결측값은 None)"""
+    if values.dtype.kind == "M":
+        # datetime64[D]의 tolist()는 datetime.date와 None(NaT)을 반환
+        return values.astype("datetime64[D]").tolist()
+    return [None if value != value else int(value) for value in values.tolist()]
+
+def normalize_records(records, fields=ENCAR_FIELDS):
+    """
+    Add typed fields to a batch of records.
+
+    Batches of config.NORMALIZE_VECTORIZED_MIN_RECORDS records or more are
+    parsed column by column with the vectorized parsers (the source fields are
+    read straight from the dictionaries, without a DataFrame of the whole
+    records); smaller ones record by record with normalize_record, which is
+    faster below that size. Both give the same result.
+
+    Args:
+        records: List of car data dictionaries
+        fields: Field specification (ENCAR_FIELDS or CARKU_FIELDS)
+
+    Returns:
+        list: New dictionaries with the typed fields added (int, datetime.date or None)
+    """
+    if len(records) < config.NORMALIZE_VECTORIZED_MIN_RECORDS:
+        return [normalize_record(record, fields) for record in records]
+
+    def column(source):
+        if not any(source in record for record in records):
+            return None
+        return [record.get(source) for record in records]
+
+    typed = _typed_columns(column, fields, len(records))
+    columns = {name: _python_values(values) for name, values in typed.items()}
+    return [
+        {**record, **{name: values[i] for name, values in columns.items()}}
+        for i, record in enumerate(records)
+    ]
+
+def normalize_record(record, fields=ENCAR_FIELDS):
+    """
+    Add typed fields to a single record.
+
+    Uses parse_value instead of a one-row DataFrame; the result is the same
+    as normalize_records([record], fields)[0].
+
+    Args:
+        record: Car data dictionary
+        fields: Field specification (ENCAR_FIELDS or CARKU_FIELDS)
+
+    Returns:
+        dict: New dictionary with the typed fields added (int, datetime.date or None)
+    """
+    typed = {}
+    for target, kind, sources in fields:
+        value = None
+        for source in sources:
+            if source in record:
+                value = parse_value(kind, record[source])
+                if value is not None:
+                    break
+        if value is not None and not isinstance(value, date):
+            value = _to_integer(value, COLUMN_TYPES[target])
+        typed[target] = value
+    return {**record, **typed}
@@ -0,0 +1,146 @@
+"""
+Module for parsing saved Encar pages without a live WebDriver.
+
+The listing and detail extractors in car_detail_extractor work on Selenium
+WebElements. The wrappers here expose the same small subset of the WebElement
+API (find_element, find_elements, get_attribute, text) over parsed HTML trees,
+so the same extraction code can run on recorded pages with any parser backend.
+"""
+
+import logging
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+import config
+import car_detail_extractor
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# 지원하는 파서 백엔드
+BACKENDS = ("html.parser", "lxml", "selectolax")
+
+def _collapse_whitespace(text):
+    """WebElement.text처럼 연속된 공백을 하나로 합침"""
+    return " ".join(text.split())
+
+class SoupElement:
+    """WebElement-compatible wrapper around a BeautifulSoup tag"""
+
+    def __init__(self, tag):
+        self._tag = tag
+
+    @property
+    def text(self):
+        return _collapse_whitespace(self._tag.get_text())
+
+    def get_attribute(self, name):
+        value = self._tag.get(name)
+        # class 같은 다중 값 속성은 문자열로 합침
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+    def find_element(self, by, selector):
+        tag = self._tag.select_one(selector)
+        if tag is None:
+            raise NoSuchElementException(f"요소를 찾을 수 없습니다: {selector}")
+        return SoupElement(tag)
+
+    def find_elements(self, by, selector):
+        return [SoupElement(tag) for tag in self._tag.select(selector)]
+
+class SelectolaxElement:
+    """WebElement-compatible wrapper around a selectolax node"""
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def text(self):
+        return _collapse_whitespace(self._node.text(deep=True))
+
+    def get_attribute(self, name):
+        return self._node.attributes.get(name)
+
+    def find_element(self, by, selector):
+        node = self._node.css_first(selector)
+        if node is None:
+            raise NoSuchElementException(f"요소를 찾을 수 없습니다: {selector}")
+        return SelectolaxElement(node)
+
+    def find_elements(self, by, selector):
+        return [SelectolaxElement(node) for node in self._node.css(selector)]
+
+def parse_document(html, backend="html.parser"):
+    """
+    Parse an HTML document with the given backend.
+
+    Args:
+        html: HTML text
+        backend: One of BACKENDS
+
+    Returns:
+        SoupElement or SelectolaxElement: Wrapper around the document root
+    """
+    if backend == "selectolax":
+        if LexborHTMLParser is None:
+            raise ImportError("selectolax가 설치되어 있지 않습니다.")
+        return SelectolaxElement(LexborHTMLParser(html).root)
+
+    if backend not in BACKENDS:
+        raise ValueError(f"지원하지 않는 파서 백엔드입니다: {backend}")
+
+    return SoupElement(BeautifulSoup(html, backend))
+
+def parse_encar_list_html(html, backend="html.parser"):
+    """
+    Extract basic car information from a saved Encar listing page.
+
+    Args:
+        html: HTML text of a listing page
+        backend: Parser backend (see BACKENDS)
+
+    Returns:
+        list: Car data dictionaries, one per listing row
+    """
+    document = parse_document(html, backend)
+    car_items = document.find_elements(By.CSS_SELECTOR, config.SELECTORS["car_items"])
+
+    car_data = []
+    seen_car_ids = set()
+    for car in car_items:
+        car_info = car_detail_extractor.extract_car_info(car, seen_car_ids)
+        if car_info is not None:
+            car_data.append(car_info)
+            seen_car_ids.add(car_info["차량ID"])
+
+    logging.debug(f"저장된 목록 페이지에서 {len(car_data)}개의 차량을 추출했습니다.")
+    return car_data
+
+def parse_encar_detail_html(html, backend="html.parser"):
+    """
+    Extract the detail spec items from a saved Encar detail page.
+
+    Args:
+        html: HTML text of a detail page with the spec popup rendered
+        backend: Parser backend (see BACKENDS)
+
+    Returns:
+        dict: Detail information keyed by mapped field name
+    """
+    document = parse_document(html, backend)
+    detail_info = {}
+
+    for item in document.find_elements(By.CSS_SELECTOR, config.SELECTORS["detail_items"]):
+        try:
+            key = item.find_element(By.CSS_SELECTOR, config.SELECTORS["detail_key"]).text
+            value = item.find_element(By.CSS_SELECTOR, config.SELECTORS["detail_value"]).text
+            detail_info[car_detail_extractor.map_detail_key(key)] = value
+        except NoSuchElementException as e:
+            logging.warning(f"세부 정보 항목 추출 중 오류: {e}")
+            continue
+
+    return detail_info
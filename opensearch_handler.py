@@ -2,12 +2,20 @@
 Module for handling OpenSearch operations for the Encar crawler.
 """
 
-from opensearchpy import OpenSearch, RequestsHttpConnection
-from datetime import datetime
+from opensearchpy import OpenSearch, RequestsHttpConnection, helpers
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import hashlib
+import json
 import logging
+import os
 import sys
+import threading
+import time
 import config
-from opensearchpy.exceptions import NotFoundError, RequestError
+import normalizer
+from opensearchpy.exceptions import ConnectionError, NotFoundError, RequestError, TransportError
 
 # 로깅 설정
 logging.basicConfig(
@@ -19,6 +27,34 @@ logging.basicConfig(
     ]
 )
 
+def is_unavailable_error(error):
+    """
+    Tell whether an OpenSearch error means the cluster is unavailable.
+    
+    Args:
+        error: Exception raised by an OpenSearch call
+        
+    Returns:
+        bool: True for connection errors, timeouts and 5xx responses
+    """
+    if isinstance(error, ConnectionError):
+        return True
+    status = getattr(error, 'status_code', None)
+    return isinstance(error, TransportError) and isinstance(status, int) and status >= 500
+
+def is_retryable_error(error):
+    """
+    Tell whether a failed OpenSearch write may succeed later (and is worth spooling).
+    
+    Args:
+        error: Exception raised by an OpenSearch call
+        
+    Returns:
+        bool: True if the cluster was unavailable or rejected the request with 429;
+            False for other 4xx errors such as mapping or parse errors of the document
+    """
+    return is_unavailable_error(error) or getattr(error, 'status_code', None) == 429
+
 def create_opensearch_client():
     """
     Create and configure an OpenSearch client.
@@ -43,179 +79,1048 @@ def create_opensearch_client():
         logging.error(f"OpenSearch 클라이언트 생성 중 오류 발생: {e}")
         raise
 
+# Field name mapping (Korean to English)
+FIELD_MAPPING = {
+    '차량ID': 'car_id',
+    '인덱스': 'index',
+    '제조사': 'manufacturer',
+    '모델': 'model',
+    '세부모델': 'detailed_model',
+    '연식': 'year',
+    '주행거리': 'mileage',
+    '연료': 'fuel_type',
+    '지역': 'location',
+    '가격': 'price',
+    '가격값': 'price_value',
+    '가격단위': 'price_unit',
+    '이미지URL': 'image_url',
+    '배지': 'badge',
+    '성능기록여부': 'performance_record',
+    '엔카진단여부': 'encar_diagnosis',
+    '광고정보': 'ad_info',
+    '상세페이지URL': 'detail_page_url',
+    '페이지번호': 'page_number',
+    '차량번호': 'car_number',
+    '상세연식': 'detailed_year',
+    '상세주행거리': 'detailed_mileage',
+    '배기량': 'engine_displacement',
+    '상세연료': 'detailed_fuel_type',
+    '변속기': 'transmission',
+    '차종': 'car_type',
+    '색상': 'color',
+    '상세지역': 'detailed_location',
+    '인승': 'seating_capacity',
+    '수입구분': 'import_type',
+    '압류저당': 'seizure_mortgage',
+    '조회수': 'view_count',
+    '찜수': 'favorite_count',
+    '크롤링시간': 'crawling_time'
+}
+
+# Display strings that are replaced by normalized fields in v2 documents.
+# They are kept unindexed under 'raw'.
+RAW_FIELDS = (
+    'price', 'price_value', 'mileage', 'year', 'detailed_year',
+    'detailed_mileage', 'engine_displacement', 'view_count', 'favorite_count'
+)
+
+def build_encar_index_body():
+    """
+    Build the settings and mappings of a versioned Encar index.
+    
+    Normalized price, mileage, year and count fields are numeric or date
+    fields, so range filters and sorts use BKD trees instead of keyword
+    ordering. The index is sorted on crawling_time (newest first), so
+    "newest first" queries can stop early on each segment.
+    
+    Returns:
+        dict: Index body for indices.create
+    """
+    return {
+        'settings': {
+            'index': {
+                'number_of_shards': config.ENCAR_INDEX_SHARDS,
+                'number_of_replicas': config.ENCAR_INDEX_REPLICAS,
+                'sort.field': 'crawling_time',
+                'sort.order': 'desc'
+            },
+            'similarity': {
+                'scripted_no_idf': {
+                    'type': 'scripted',
+                    'script': {
+                        'source': "double tf = Math.sqrt(doc.freq); double norm = 1/Math.sqrt(doc.length); return query.boost * tf * norm;",
+                    },
+                },
+            },
+        },
+        'mappings': {
+            'properties': {
+                # Basic information fields
+                'car_id': {'type': 'keyword'},
+                'index': {'type': 'keyword'},
+                'manufacturer': {'type': 'keyword'},
+                'model': {'type': 'keyword'},
+                'detailed_model': {
+                    'type': 'text',
+                    'norms': 'false',
+                    'similarity': 'scripted_no_idf'
+                },
+                'fuel_type': {'type': 'keyword'},
+                'location': {'type': 'keyword'},
+                'price_unit': {'type': 'keyword'},
+                'image_url': {'type': 'keyword'},
+                'badge': {'type': 'keyword'},
+                'performance_record': {'type': 'boolean'},
+                'encar_diagnosis': {'type': 'boolean'},
+                'ad_info': {'type': 'keyword'},
+                'detail_page_url': {'type': 'keyword'},
+                'page_number': {'type': 'integer'},
+                
+                # Detailed information fields
+                'car_number': {'type': 'keyword'},
+                'detailed_fuel_type': {'type': 'keyword'},
+                'transmission': {'type': 'keyword'},
+                'car_type': {'type': 'keyword'},
+                'color': {'type': 'keyword'},
+                'detailed_location': {'type': 'keyword'},
+                'seating_capacity': {'type': 'keyword'},
+                'import_type': {'type': 'keyword'},
+                'seizure_mortgage': {'type': 'keyword'},
+                
+                # Normalized fields (for range queries and sorting)
+                'price_manwon': {'type': 'integer'},
+                'mileage_km': {'type': 'integer'},
+                'model_year': {'type': 'short'},
+                'first_registration': {'type': 'date'},
+                'displacement_cc': {'type': 'integer'},
+                'view_count': {'type': 'integer'},
+                'favorite_count': {'type': 'integer'},
+                
+                # Original display strings (stored, not indexed)
+                'raw': {'type': 'object', 'enabled': False},
+                
+                # Metadata
+                'crawling_time': {'type': 'date'}
+            }
+        }
+    }
+
+def get_alias_indices(client, alias):
+    """
+    Get the indices an alias points to.
+    
+    Args:
+        client: OpenSearch client
+        alias: Alias name
+        
+    Returns:
+        list: Index names (empty if the alias does not exist)
+    """
+    try:
+        return sorted(client.indices.get_alias(name=alias).keys())
+    except NotFoundError:
+        return []
+
+def swap_alias(client, alias, index, remove_index=None, read_indices=()):
+    """
+    Point an alias at a single write index (and optional read indices) in one atomic update.
+    
+    Args:
+        client: OpenSearch client
+        alias: Alias name
+        index: Index the alias should write to
+        remove_index: Index to delete in the same update (a legacy index that
+            has the alias name)
+        read_indices: Further indices the alias should read from (e.g. older partitions)
+    """
+    keep = {index, *read_indices}
+    actions = [
+        {'remove': {'index': old_index, 'alias': alias}}
+        for old_index in get_alias_indices(client, alias) if old_index not in keep
+    ]
+    if remove_index:
+        actions.append({'remove_index': {'index': remove_index}})
+    actions.extend(
+        {'add': {'index': read_index, 'alias': alias, 'is_write_index': False}}
+        for read_index in sorted(set(read_indices)) if read_index != index
+    )
+    actions.append({'add': {'index': index, 'alias': alias, 'is_write_index': True}})
+    
+    client.indices.update_aliases(body={'actions': actions})
+    logging.info(f"Alias {alias} now points to {index}")
+
+def get_write_index(client, alias):
+    """
+    Get the index that receives writes through an alias.
+    
+    Args:
+        client: OpenSearch client
+        alias: Alias name
+        
+    Returns:
+        str: Write index name (None if the alias does not exist or has no write index)
+    """
+    try:
+        response = client.indices.get_alias(name=alias)
+    except NotFoundError:
+        return None
+    
+    for index, data in response.items():
+        if data['aliases'].get(alias, {}).get('is_write_index'):
+            return index
+    return next(iter(response)) if len(response) == 1 else None
+
+def get_partition_range(index):
+    """
+    Get the crawl dates covered by a partition index.
+    
+    Args:
+        index: Index name such as encar_cars_detail_v2-2026w43 or encar_cars_detail_v2-2026.10.19
+        
+    Returns:
+        tuple: (first date, date after the last) or None if the index is not a partition
+    """
+    prefix, _, suffix = index.rpartition('-')
+    if not prefix:
+        return None
+    
+    try:
+        if 'w' in suffix:
+            # ISO week: the partition starts on Monday
+            start = datetime.strptime(f"{suffix}-1", f"{config.PARTITION_FORMATS['weekly']}-%u").date()
+            return start, start + timedelta(days=7)
+        start = datetime.strptime(suffix, config.PARTITION_FORMATS['daily']).date()
+        return start, start + timedelta(days=1)
+    except ValueError:
+        return None
+
+def put_encar_index_template(client):
+    """
+    Create or update the index template applied to new Encar partition indices.
+    
+    The template carries the settings and mappings of build_encar_index_body,
+    so every partition created by roll_encar_partition gets the current mapping.
+    
+    Args:
+        client: OpenSearch client
+    """
+    index_body = build_encar_index_body()
+    client.indices.put_index_template(
+        name=config.get_encar_index_name(),
+        body={
+            'index_patterns': [f"{config.get_encar_index_name()}-*"],
+            'template': {
+                'settings': index_body['settings'],
+                'mappings': index_body['mappings']
+            },
+            'priority': config.ENCAR_INDEX_VERSION
+        }
+    )
+
+def roll_encar_partition(client, when=None):
+    """
+    Make the partition for a crawl time the write index of ENCAR_INDEX_ALIAS.
+    
+    The partition is created from the index template if it does not exist yet.
+    Older partitions stay behind the alias for reads until they are dropped
+    by drop_expired_partitions.
+    
+    Args:
+        client: OpenSearch client
+        when: datetime of the crawl (default: now)
+        
+    Returns:
+        str: Name of the write index
+    """
+    alias = config.ENCAR_INDEX_ALIAS
+    index = config.get_encar_partition_name(when)
+    if get_write_index(client, alias) == index:
+        return index
+    
+    if not client.indices.exists(index=index):
+        put_encar_index_template(client)
+        try:
+            client.indices.create(index=index)
+            logging.info(f"Created partition index: {index}")
+        except RequestError as e:
+            # Another crawler created it first
+            if e.error != 'resource_already_exists_exception':
+                raise
+    
+    actions = [
+        {'add': {'index': old_index, 'alias': alias, 'is_write_index': False}}
+        for old_index in get_alias_indices(client, alias) if old_index != index
+    ]
+    actions.append({'add': {'index': index, 'alias': alias, 'is_write_index': True}})
+    client.indices.update_aliases(body={'actions': actions})
+    logging.info(f"Alias {alias} now writes to {index}")
+    return index
+
+def ensure_encar_partition(client, index, alias=True):
+    """
+    Make sure a partition index exists and is readable through ENCAR_INDEX_ALIAS.
+    
+    The partition of the current day or week also becomes the write index.
+    Older partitions (for records written late, e.g. from the spool) are
+    created from the template and added to the alias for reads only.
+    
+    Args:
+        client: OpenSearch client
+        index: Partition index name
+        alias: Whether to add the partition to ENCAR_INDEX_ALIAS (False while
+            migrate_encar_index copies into it; the alias is swapped afterwards)
+    """
+    if alias and index == config.get_encar_partition_name():
+        roll_encar_partition(client)
+        return
+    if client.indices.exists(index=index):
+        return
+    
+    put_encar_index_template(client)
+    try:
+        client.indices.create(index=index)
+        logging.info(f"Created partition index: {index}")
+    except RequestError as e:
+        if e.error != 'resource_already_exists_exception':
+            raise
+    if alias:
+        client.indices.update_aliases(body={'actions': [
+            {'add': {'index': index, 'alias': config.ENCAR_INDEX_ALIAS, 'is_write_index': False}}
+        ]})
+
 def create_encar_index(client):
     """
-    Create Encar index in OpenSearch
+    Create the versioned Encar index behind ENCAR_INDEX_ALIAS if neither exists.
+    
+    With config.ENCAR_INDEX_PARTITION set, the alias writes to the partition
+    of the current day or week instead (see roll_encar_partition).
+    An existing index named like the alias is a pre-v2 index; it is left in
+    place and keeps receiving writes until migrate_encar_index is run.
     
     Args:
         client: OpenSearch client
     """
-    index_name = 'encar_cars_detail'
+    alias = config.ENCAR_INDEX_ALIAS
+    index_name = config.get_encar_index_name()
     
     try:
+        if client.indices.exists(index=alias) and not get_alias_indices(client, alias):
+            logging.warning(f"Index {alias} uses the legacy mapping. Run migrate_encar_index to move it to {index_name}.")
+            return
+        
+        if config.ENCAR_INDEX_PARTITION:
+            roll_encar_partition(client)
+            return
+        
+        if get_alias_indices(client, alias):
+            return
+        
         if not client.indices.exists(index=index_name):
-            index_body = {
-                'settings': {
-                    'index': {
-                        'number_of_shards': 2,
-                        'number_of_replicas': 1
-                    },
-                    'similarity': {
-                        'scripted_no_idf': {
-                            'type': 'scripted',
-                            'script': {
-                                'source': "double tf = Math.sqrt(doc.freq); double norm = 1/Math.sqrt(doc.length); return query.boost * tf * norm;",
-                            },
-                        },
-                    },
-                },
-                'mappings': {
-                    'properties': {
-                        # Basic information fields
-                        'car_id': {'type': 'keyword'},
-                        'index': {'type': 'keyword'},
-                        'manufacturer': {'type': 'keyword'},
-                        'model': {'type': 'keyword'},
-                        'detailed_model': {
-                            'type': 'text',
-                            'norms': 'false',
-                            'similarity': 'scripted_no_idf'
-                        },
-                        'year': {'type': 'keyword'},
-                        'mileage': {'type': 'keyword'},
-                        'fuel_type': {'type': 'keyword'},
-                        'location': {'type': 'keyword'},
-                        'price': {'type': 'keyword'},
-                        'price_value': {'type': 'keyword'},
-                        'price_unit': {'type': 'keyword'},
-                        'image_url': {'type': 'keyword'},
-                        'badge': {'type': 'keyword'},
-                        'performance_record': {'type': 'boolean'},
-                        'encar_diagnosis': {'type': 'boolean'},
-                        'ad_info': {'type': 'keyword'},
-                        'detail_page_url': {'type': 'keyword'},
-                        'page_number': {'type': 'integer'},
-                        
-                        # Detailed information fields
-                        'car_number': {'type': 'keyword'},
-                        'detailed_year': {'type': 'keyword'},
-                        'detailed_mileage': {'type': 'keyword'},
-                        'engine_displacement': {'type': 'keyword'},
-                        'detailed_fuel_type': {'type': 'keyword'},
-                        'transmission': {'type': 'keyword'},
-                        'car_type': {'type': 'keyword'},
-                        'color': {'type': 'keyword'},
-                        'detailed_location': {'type': 'keyword'},
-                        'seating_capacity': {'type': 'keyword'},
-                        'import_type': {'type': 'keyword'},
-                        'seizure_mortgage': {'type': 'keyword'},
-                        'view_count': {'type': 'keyword'},
-                        'favorite_count': {'type': 'keyword'},
-                        
-                        # Metadata
-                        'crawling_time': {'type': 'date'}
-                    }
-                }
-            }
-            client.indices.create(index=index_name, body=index_body)
+            client.indices.create(index=index_name, body=build_encar_index_body())
             logging.info(f"Created index: {index_name}")
+        swap_alias(client, alias, index_name)
     except Exception as e:
         logging.error(f"Error creating index: {str(e)}")
         raise
 
-def index_car_to_opensearch(client, car_dict, car_index):
+def drop_expired_partitions(client, retention_days=None, now=None):
+    """
+    Delete Encar partition indices whose crawl dates are all older than the retention period.
+    
+    Whole indices are deleted, which is much cheaper than a delete-by-query on
+    crawling_time. Partitions of every mapping version are considered; the
+    current write index and indices that are not partitions are never deleted.
+    
+    Args:
+        client: OpenSearch client
+        retention_days: Days to keep (default: config.ENCAR_RETENTION_DAYS)
+        now: datetime the retention period is counted back from (default: now)
+        
+    Returns:
+        list: Names of the deleted indices
+    """
+    retention_days = retention_days or config.ENCAR_RETENTION_DAYS
+    cutoff = (now or datetime.now()).date() - timedelta(days=retention_days)
+    write_index = get_write_index(client, config.ENCAR_INDEX_ALIAS)
+    
+    indices = client.cat.indices(index=f"{config.ENCAR_INDEX_ALIAS}_v*-*", params={'format': 'json', 'h': 'index'})
+    dropped = []
+    for index in sorted(entry['index'] for entry in indices):
+        partition_range = get_partition_range(index)
+        if partition_range is None or index == write_index or partition_range[1] > cutoff:
+            continue
+        client.indices.delete(index=index)
+        dropped.append(index)
+        logging.info(f"Deleted expired partition: {index}")
+    
+    logging.info(f"Retention ({retention_days} days): deleted {len(dropped)} partitions")
+    return dropped
+
+def _as_date(value):
+    """Convert a date, datetime or ISO string to a date"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def select_encar_indices(client, crawled_after=None, crawled_before=None):
     """
-    Index car data to OpenSearch
+    Get the indices behind ENCAR_INDEX_ALIAS that can hold cars crawled in a time range.
+    
+    Partitions entirely outside the range are left out, so a search only
+    touches the shards of the matching days or weeks. Indices that are not
+    partitions are always included.
     
     Args:
         client: OpenSearch client
+        crawled_after: Earliest crawling_time (date, datetime or ISO string)
+        crawled_before: Latest crawling_time (date, datetime or ISO string)
+        
+    Returns:
+        list: Index names (the alias itself if no range is given)
+    """
+    if crawled_after is None and crawled_before is None:
+        return [config.ENCAR_INDEX_ALIAS]
+    
+    after = _as_date(crawled_after) if crawled_after is not None else None
+    before = _as_date(crawled_before) if crawled_before is not None else None
+    selected = []
+    for index in get_alias_indices(client, config.ENCAR_INDEX_ALIAS):
+        partition_range = get_partition_range(index)
+        if partition_range and ((after and partition_range[1] <= after) or (before and partition_range[0] > before)):
+            continue
+        selected.append(index)
+    return selected
+
+def to_english_fields(car_dict):
+    """
+    Convert Korean field names of a crawled car to document field names.
+    
+    Args:
+        car_dict: Dictionary containing car data
+        
+    Returns:
+        dict: Dictionary with English field names (unknown fields are kept as is)
+    """
+    return {FIELD_MAPPING.get(k, k): v for k, v in car_dict.items()}
+
+def build_encar_documents(docs):
+    """
+    Convert documents with English field names to the current (v2) layout.
+    
+    Display strings listed in RAW_FIELDS move under 'raw' and the normalized
+    fields are parsed from them. Documents that are already in v2 layout are
+    rebuilt from their 'raw' values, so the conversion can be repeated.
+    
+    Args:
+        docs: List of documents (crawled cars after to_english_fields, or
+            documents read from an older index)
+        
+    Returns:
+        list: v2 documents
+    """
+    raws = []
+    for doc in docs:
+        raw = {k: doc[k] for k in RAW_FIELDS if doc.get(k) is not None}
+        raw.update(doc.get('raw') or {})
+        raws.append(raw)
+    
+    typed = normalizer.normalize_records(raws, normalizer.ENCAR_DOCUMENT_FIELDS)
+    
+    documents = []
+    for doc, raw, typed_doc in zip(docs, raws, typed):
+        document = {k: v for k, v in doc.items() if k not in RAW_FIELDS and k != 'raw'}
+        document.update({name: typed_doc[name] for name in normalizer.COLUMN_TYPES})
+        document['raw'] = raw
+        documents.append(document)
+    return documents
+
+def to_encar_document(car_dict, car_index):
+    """
+    Convert a crawled car record to an English-field document before normalization.
+    
+    Args:
         car_dict: Dictionary containing car data
-        car_index: Index of the car in the list
+        car_index: Index of the car in the list (for log messages)
+        
+    Returns:
+        dict: Document with English field names and an ISO crawling_time
+    """
+    # Convert Korean field names to English
+    english_car_dict = to_english_fields(car_dict)
+    
+    # Data validation before indexing
+    if not english_car_dict.get('detailed_model'):
+        logging.warning(f"Car {car_index} data missing: detailed_model field is empty")
+    
+    # Validate car_id (important field)
+    if not english_car_dict.get('car_id'):
+        logging.warning(f"Car {car_index} data missing: car_id field is empty")
+    
+    # Convert crawling_time to date format if it's a string
+    if isinstance(english_car_dict.get('crawling_time'), str):
+        try:
+            # Convert to ISO format
+            english_car_dict['crawling_time'] = datetime.fromisoformat(english_car_dict['crawling_time']).isoformat()
+        except:
+            # Use current time if conversion fails
+            english_car_dict['crawling_time'] = datetime.now().isoformat()
+    
+    return english_car_dict
+
+def get_encar_document_id(document):
+    """
+    Get the deterministic ID of an Encar document.
+    
+    The same car crawled at the same time always gets the same ID, so writing
+    a document again (a retried bulk request or a spool replay) overwrites it
+    instead of adding a duplicate.
+    
+    Args:
+        document: Document with English field names
         
     Returns:
-        bool: True if indexing was successful, False otherwise
+        str: Hex digest of car_id and crawling_time (of the whole document if car_id is missing)
+    """
+    if document.get('car_id'):
+        key = f"{document['car_id']}|{document.get('crawling_time')}"
+    else:
+        key = json.dumps(document, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def get_encar_document_index(document):
     """
+    Get the index an Encar document is written to.
+    
+    With partitioning the partition is chosen by crawling_time, so a document
+    always lands in the same index no matter when it is sent.
+    
+    Args:
+        document: Document with an ISO crawling_time
+        
+    Returns:
+        str: Partition index name, or ENCAR_INDEX_ALIAS without partitioning
+    """
+    if not config.ENCAR_INDEX_PARTITION:
+        return config.ENCAR_INDEX_ALIAS
     try:
-        # Field name mapping (Korean to English)
-        field_mapping = {
-            '차량ID': 'car_id',
-            '인덱스': 'index',
-            '제조사': 'manufacturer',
-            '모델': 'model',
-            '세부모델': 'detailed_model',
-            '연식': 'year',
-            '주행거리': 'mileage',
-            '연료': 'fuel_type',
-            '지역': 'location',
-            '가격': 'price',
-            '가격값': 'price_value',
-            '가격단위': 'price_unit',
-            '이미지URL': 'image_url',
-            '배지': 'badge',
-            '성능기록여부': 'performance_record',
-            '엔카진단여부': 'encar_diagnosis',
-            '광고정보': 'ad_info',
-            '상세페이지URL': 'detail_page_url',
-            '페이지번호': 'page_number',
-            '차량번호': 'car_number',
-            '상세연식': 'detailed_year',
-            '상세주행거리': 'detailed_mileage',
-            '배기량': 'engine_displacement',
-            '상세연료': 'detailed_fuel_type',
-            '변속기': 'transmission',
-            '차종': 'car_type',
-            '색상': 'color',
-            '상세지역': 'detailed_location',
-            '인승': 'seating_capacity',
-            '수입구분': 'import_type',
-            '압류저당': 'seizure_mortgage',
-            '조회수': 'view_count',
-            '찜수': 'favorite_count',
-            '크롤링시간': 'crawling_time'
+        crawling_time = datetime.fromisoformat(document['crawling_time'])
+    except (KeyError, TypeError, ValueError):
+        crawling_time = None
+    return config.get_encar_partition_name(crawling_time)
+
+def build_encar_actions(records, first_index=1):
+    """
+    Convert crawled car records to bulk actions.
+    
+    Args:
+        records: List of car data dictionaries
+        first_index: Number of the first car (for log messages)
+        
+    Returns:
+        list: Dictionaries with _index, _id and _source
+    """
+    documents = build_encar_documents([
+        to_encar_document(record, car_index) for car_index, record in enumerate(records, first_index)
+    ])
+    return [
+        {
+            '_index': get_encar_document_index(document),
+            '_id': get_encar_document_id(document),
+            '_source': document
         }
+        for document in documents
+    ]
+
+# Index settings changed by bulk_load_profile
+BULK_LOAD_SETTINGS = ('refresh_interval', 'number_of_replicas')
+
+def _save_json(filename, data):
+    """Write a JSON file atomically"""
+    temp_filename = filename + '.tmp'
+    with open(temp_filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filename, filename)
+
+@contextmanager
+def bulk_load_profile(client, index, max_num_segments=None):
+    """
+    Tune an index (or every index behind an alias) for bulk loading.
+    
+    Inside the block refresh is disabled and replicas are dropped
+    (config.BULK_LOAD_REFRESH_INTERVAL, config.BULK_LOAD_REPLICAS). The
+    previous settings are saved to a state file before they are changed and
+    restored in a finally block, so a failed load gets them back too. If the
+    process dies before that or restoring fails, the state file is kept and
+    the next bulk_load_profile on the same index restores the saved settings
+    instead of the bulk ones. After a successful load the index is refreshed
+    and force-merged before replicas come back, so the replicas copy the
+    merged segments.
+    
+    Args:
+        client: OpenSearch client
+        index: Index or alias to tune
+        max_num_segments: Segments per shard after the force merge
+            (default: config.BULK_LOAD_MAX_SEGMENTS)
+    """
+    state_filename = config.get_bulk_load_state_filename(index)
+    if os.path.exists(state_filename):
+        with open(state_filename, encoding='utf-8') as f:
+            original = json.load(f)
+        logging.warning(f"Restoring settings saved by an interrupted bulk load of {index} afterwards")
+    else:
+        original = {
+            name: {key: data['settings']['index'].get(key) for key in BULK_LOAD_SETTINGS}
+            for name, data in client.indices.get_settings(index=index).items()
+        }
+        _save_json(state_filename, original)
+    
+    indices = ','.join(sorted(original))
+    client.indices.put_settings(index=indices, body={'index': {
+        'refresh_interval': config.BULK_LOAD_REFRESH_INTERVAL,
+        'number_of_replicas': config.BULK_LOAD_REPLICAS
+    }})
+    logging.info(f"Bulk load profile enabled on {indices}")
+    
+    succeeded = False
+    try:
+        yield
+        succeeded = True
+    finally:
+        if succeeded:
+            try:
+                client.indices.refresh(index=indices)
+                client.indices.forcemerge(
+                    index=indices,
+                    max_num_segments=max_num_segments or config.BULK_LOAD_MAX_SEGMENTS,
+                    request_timeout=config.BULK_LOAD_FORCE_MERGE_TIMEOUT
+                )
+                logging.info(f"Force-merged {indices}")
+            except Exception as e:
+                logging.error(f"Error force-merging {indices}: {str(e)}")
         
-        # Convert Korean field names to English
-        english_car_dict = {}
-        for k, v in car_dict.items():
-            if k in field_mapping:
-                english_car_dict[field_mapping[k]] = v
-            else:
-                # Keep original field name if not in mapping
-                english_car_dict[k] = v
+        # None resets a setting that was not set explicitly to its default.
+        # A failed restore must not hide the exception of the load, so errors
+        # are only logged and the state file is kept for the next run.
+        unrestored = []
+        for name, settings in original.items():
+            try:
+                client.indices.put_settings(index=name, body={'index': settings})
+            except Exception as e:
+                logging.error(f"Error restoring settings on {name}: {str(e)}")
+                unrestored.append(name)
+        if unrestored:
+            logging.error(f"Settings of {', '.join(sorted(unrestored))} are restored by the next bulk load of {index} ({state_filename})")
+        else:
+            os.remove(state_filename)
+            logging.info(f"Bulk load profile removed, settings restored on {indices}")
+
+class ReindexState:
+    """Completed slices of a reindex, persisted so an interrupted run can resume"""
+    
+    def __init__(self, filename, source, target, slices):
+        """
+        Load the state file if it belongs to the same source, target and slice count.
         
-        # Data validation before indexing
-        if not english_car_dict.get('detailed_model'):
-            logging.warning(f"Car {car_index} data missing: detailed_model field is empty")
+        Args:
+            filename: Path of the JSON state file
+            source: Source index or alias
+            target: Target index
+            slices: Number of slices
+        """
+        self.filename = filename
+        self.source = source
+        self.target = target
+        self.slices = slices
+        self.completed = {}
+        self.lock = threading.Lock()
         
-        # Validate car_id (important field)
-        if not english_car_dict.get('car_id'):
-            logging.warning(f"Car {car_index} data missing: car_id field is empty")
+        if os.path.exists(filename):
+            with open(filename, encoding='utf-8') as f:
+                state = json.load(f)
+            if (state.get('source'), state.get('target'), state.get('slices')) == (source, target, slices):
+                self.completed = {int(k): v for k, v in state.get('completed', {}).items()}
+                logging.info(f"Resuming reindex {source} -> {target}: {len(self.completed)}/{slices} slices already done")
+            else:
+                logging.warning(f"Ignoring reindex state {filename} for a different source, target or slice count")
+    
+    def mark_completed(self, slice_id, copied):
+        """Record a finished slice and write the state file atomically"""
+        with self.lock:
+            self.completed[slice_id] = copied
+            state = {
+                'source': self.source,
+                'target': self.target,
+                'slices': self.slices,
+                'completed': self.completed
+            }
+            _save_json(self.filename, state)
+    
+    def remove(self):
+        """Delete the state file after a finished reindex"""
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+class ReindexProgress:
+    """Thread-safe document counter that logs throughput"""
+    
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+        self.copied = 0
+        self.start_time = time.time()
+        self.lock = threading.Lock()
+    
+    def add(self, count):
+        """Count copied documents and log the running rate"""
+        with self.lock:
+            self.copied += count
+            copied = self.copied
+        logging.info(f"Reindexed {copied} documents {self.source} -> {self.target} ({self.docs_per_sec():.1f} docs/sec)")
+    
+    def elapsed(self):
+        return time.time() - self.start_time
+    
+    def docs_per_sec(self):
+        elapsed = self.elapsed()
+        return self.copied / elapsed if elapsed > 0 else 0.0
+
+def copy_slice(client, source, target, transform, slice_id, slices, batch_size, progress, route=None):
+    """
+    Copy one slice of a scroll over the source index, keeping document IDs.
+    
+    Args:
+        client: OpenSearch client
+        source: Source index or alias
+        target: Target index
+        transform: Function converting a list of source documents to target documents
+        slice_id: Slice number (0 <= slice_id < slices)
+        slices: Total number of slices
+        batch_size: Number of documents per scroll page and bulk request
+        progress: ReindexProgress shared by all slices
+        route: Function returning the index of a converted document (default: target)
         
-        # Convert crawling_time to date format if it's a string
-        if isinstance(english_car_dict.get('crawling_time'), str):
+    Returns:
+        int: Number of documents copied
+    """
+    body = {'sort': ['_doc'], 'size': batch_size}
+    if slices > 1:
+        body['slice'] = {'id': slice_id, 'max': slices}
+    
+    response = client.search(index=source, body=body, scroll=config.REINDEX_SCROLL)
+    scroll_id = response.get('_scroll_id')
+    copied = 0
+    
+    try:
+        while response['hits']['hits']:
+            hits = response['hits']['hits']
+            documents = transform([hit['_source'] for hit in hits])
+            helpers.bulk(client, (
+                {'_index': route(document) if route else target, '_id': hit['_id'], '_source': document}
+                for hit, document in zip(hits, documents)
+            ))
+            copied += len(hits)
+            progress.add(len(hits))
+            
+            response = client.scroll(scroll_id=scroll_id, scroll=config.REINDEX_SCROLL)
+            scroll_id = response.get('_scroll_id', scroll_id)
+    finally:
+        if scroll_id:
             try:
-                # Convert to ISO format
-                english_car_dict['crawling_time'] = datetime.fromisoformat(english_car_dict['crawling_time']).isoformat()
-            except:
-                # Use current time if conversion fails
-                english_car_dict['crawling_time'] = datetime.now().isoformat()
-        
-        # Index to OpenSearch
-        response = client.index(
-            index='encar_cars_detail',
-            body=english_car_dict,
-            refresh=True
+                client.clear_scroll(scroll_id=scroll_id)
+            except Exception:
+                pass
+    
+    return copied
+
+def reindex_index(client, source, target, transform=None, index_body=None, alias=None,
+                  slices=None, workers=None, batch_size=None, state_filename=None,
+                  route=None, partitions=None):
+    """
+    Copy an index into a new index with parallel sliced scrolls, then optionally swap an alias.
+    
+    Slices run in a thread pool. Finished slices are recorded in a state file,
+    so rerunning the same reindex after an interruption skips them; slices
+    that were in progress are copied again, which is safe because document
+    IDs are kept.
+    
+    Args:
+        client: OpenSearch client
+        source: Source index or alias
+        target: Target index (created with index_body if missing)
+        transform: Function converting a list of source documents to target
+            documents (default: copy unchanged)
+        index_body: Settings and mappings for the target index
+        alias: Alias to point at target when the copy is complete. If source is
+            a concrete index with the alias name, it is deleted in the same update.
+        slices: Number of scroll slices (default: config.REINDEX_SLICES)
+        workers: Number of slices copied at the same time (default: config.REINDEX_WORKERS)
+        batch_size: Documents per scroll page and bulk request (default: config.REINDEX_BATCH_SIZE)
+        state_filename: Resume state file (default: config.get_reindex_state_filename(target))
+        route: Function returning the index of a converted document, for copies
+            spread over several indices (default: every document goes to target)
+        partitions: Index pattern matching the indices route writes to; they are
+            counted against the source and put behind the alias for reads
+        
+    Returns:
+        dict: Copied document count, elapsed seconds and docs/sec
+    """
+    transform = transform or (lambda docs: docs)
+    slices = slices or config.REINDEX_SLICES
+    workers = workers or config.REINDEX_WORKERS
+    batch_size = batch_size or config.REINDEX_BATCH_SIZE
+    state = ReindexState(state_filename or config.get_reindex_state_filename(target), source, target, slices)
+    
+    if not client.indices.exists(index=target):
+        client.indices.create(index=target, body=index_body or {})
+        logging.info(f"Created index: {target}")
+    
+    progress = ReindexProgress(source, target)
+    pending = [slice_id for slice_id in range(slices) if slice_id not in state.completed]
+    failed = []
+    
+    with bulk_load_profile(client, target):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(copy_slice, client, source, target, transform, slice_id, slices, batch_size, progress, route): slice_id
+                for slice_id in pending
+            }
+            for future in as_completed(futures):
+                slice_id = futures[future]
+                try:
+                    state.mark_completed(slice_id, future.result())
+                except Exception as e:
+                    logging.error(f"Slice {slice_id}/{slices} of {source} failed: {e}")
+                    failed.append(slice_id)
+        
+        if failed:
+            raise RuntimeError(f"Reindex {source} -> {target} incomplete: slices {sorted(failed)} failed. Run again to resume.")
+    
+    read_indices = sorted(client.indices.get(index=partitions).keys()) if partitions else []
+    source_count = client.count(index=source)['count']
+    target_count = client.count(index=','.join(read_indices) if partitions else target)['count']
+    if target_count < source_count:
+        raise RuntimeError(f"Reindex incomplete: {target_count}/{source_count} documents in {partitions or target}")
+    
+    if alias:
+        legacy_index = source if source == alias and not get_alias_indices(client, alias) else None
+        swap_alias(client, alias, target, remove_index=legacy_index, read_indices=read_indices)
+    state.remove()
+    
+    result = {
+        'docs': sum(state.completed.values()),
+        'seconds': progress.elapsed(),
+        'docs_per_sec': progress.docs_per_sec()
+    }
+    logging.info(f"Reindexed {source} -> {target}: {result['docs']} documents in {result['seconds']:.1f}s "
+                 f"({result['docs_per_sec']:.1f} docs/sec this run)")
+    return result
+
+def migrate_encar_index(client, slices=None, workers=None, batch_size=None):
+    """
+    Move the Encar data behind ENCAR_INDEX_ALIAS into an index with the current mapping.
+    
+    Documents are converted with build_encar_documents while they are copied,
+    then the alias is switched in one atomic update. A legacy index that has
+    the alias name is deleted in that same update. With partitioning enabled
+    every document is copied into the partition of its own crawling_time
+    (created on first use), so date range pruning and retention keep working
+    for the migrated history; the alias then reads from all partitions and
+    writes to the one of the current day or week.
+    
+    Args:
+        client: OpenSearch client
+        slices: Number of scroll slices
+        workers: Number of slices copied at the same time
+        batch_size: Documents per scroll page and bulk request
+        
+    Returns:
+        str: Name of the index the alias points to
+    """
+    alias = config.ENCAR_INDEX_ALIAS
+    current = get_alias_indices(client, alias)
+    
+    if config.ENCAR_INDEX_PARTITION:
+        target = config.get_encar_partition_name()
+        migrated = bool(current) and all(
+            index.startswith(f"{config.get_encar_index_name()}-") and get_partition_range(index) for index in current
         )
+    else:
+        target = config.get_encar_index_name()
+        migrated = current == [target]
+    
+    if not current and not client.indices.exists(index=alias):
+        # Nothing to migrate yet
+        create_encar_index(client)
+        return target
+    if migrated:
+        logging.info(f"Alias {alias} already points to {', '.join(current)}")
+        return target
+    
+    if config.ENCAR_INDEX_PARTITION:
+        # The partition gets its settings and mappings from the template
+        put_encar_index_template(client)
+    
+    reindex_index(
+        client, alias, target,
+        transform=build_encar_documents,
+        index_body=None if config.ENCAR_INDEX_PARTITION else build_encar_index_body(),
+        alias=alias,
+        slices=slices,
+        workers=workers,
+        batch_size=batch_size,
+        route=_encar_partition_router(client) if config.ENCAR_INDEX_PARTITION else None,
+        partitions=f"{config.get_encar_index_name()}-*" if config.ENCAR_INDEX_PARTITION else None
+    )
+    return target
+
+def _encar_partition_router(client):
+    """Route migrated Encar documents to the partition of their crawling_time, creating each partition once"""
+    created = set()
+    lock = threading.Lock()
+    
+    def route(document):
+        index = get_encar_document_index(document)
+        if index not in created:
+            with lock:
+                if index not in created:
+                    ensure_encar_partition(client, index, alias=False)
+                    created.add(index)
+        return index
+    
+    return route
+
+def build_carku_documents(docs):
+    """Add normalized price/mileage/year fields to Carku documents"""
+    return normalizer.normalize_records(docs, normalizer.CARKU_FIELDS)
+
+def copy_index_body(client, index, extra_properties=None):
+    """
+    Build an index body with the mappings and analysis settings of an existing index.
+    
+    Args:
+        client: OpenSearch client
+        index: Existing index or alias
+        extra_properties: Mapping properties to add or replace
         
-        if response['result'] == 'created':
-            logging.info(f"Car {car_index} indexed successfully. ID: {response['_id']}")
-            return True
-        else:
-            logging.warning(f"Car {car_index} indexing result: {response['result']}")
-            return False
-    except Exception as e:
-        logging.error(f"Error indexing car {car_index}: {str(e)}")
-        return False
+    Returns:
+        dict: Index body for indices.create
+    """
+    mappings = next(iter(client.indices.get_mapping(index=index).values()))['mappings']
+    settings = next(iter(client.indices.get_settings(index=index).values()))['settings']['index']
+    
+    # Only settings that can be given at creation time are copied
+    index_settings = {key: settings[key] for key in ('number_of_shards', 'number_of_replicas', 'similarity', 'analysis') if key in settings}
+    properties = dict(mappings.get('properties', {}))
+    properties.update(extra_properties or {})
+    
+    return {
+        'settings': {'index': index_settings},
+        'mappings': {**mappings, 'properties': properties}
+    }
+
+def migrate_carku_index(client, slices=None, workers=None, batch_size=None):
+    """
+    Reindex the Carku data behind CARKU_INDEX_ALIAS into a versioned index with normalized fields.
+    
+    The target keeps the source mapping and adds integer/date mappings for the
+    normalized fields.
+    
+    Args:
+        client: OpenSearch client
+        slices: Number of scroll slices
+        workers: Number of slices copied at the same time
+        batch_size: Documents per scroll page and bulk request
+        
+    Returns:
+        str: Name of the index the alias points to
+    """
+    alias = config.CARKU_INDEX_ALIAS
+    target = config.get_carku_index_name()
+    
+    if get_alias_indices(client, alias) == [target]:
+        logging.info(f"Alias {alias} already points to {target}")
+        return target
+    
+    index_body = copy_index_body(client, alias, {
+        'price_manwon': {'type': 'integer'},
+        'mileage_km': {'type': 'integer'},
+        'model_year': {'type': 'short'},
+        'first_registration': {'type': 'date'}
+    })
+    reindex_index(
+        client, alias, target,
+        transform=build_carku_documents,
+        index_body=index_body,
+        alias=alias,
+        slices=slices,
+        workers=workers,
+        batch_size=batch_size
+    )
+    return target
+
+def search_encar_cars(client, min_price=None, max_price=None, max_mileage=None,
+                      min_year=None, manufacturer=None, crawled_after=None,
+                      crawled_before=None, size=20):
+    """
+    Search cars by price, mileage and year ranges, newest first.
+    
+    A crawling_time range also limits the search to the partition indices
+    that overlap it (see select_encar_indices).
+    
+    Args:
+        client: OpenSearch client
+        min_price: Minimum price in 만원
+        max_price: Maximum price in 만원
+        max_mileage: Maximum mileage in km
+        min_year: Minimum model year
+        manufacturer: Exact manufacturer name
+        crawled_after: Earliest crawling_time (date, datetime or ISO string)
+        crawled_before: Latest crawling_time (date, datetime or ISO string)
+        size: Number of cars to return
+        
+    Returns:
+        list: Matching documents, most recently crawled first
+    """
+    filters = []
+    if min_price is not None or max_price is not None:
+        price_range = {}
+        if min_price is not None:
+            price_range['gte'] = min_price
+        if max_price is not None:
+            price_range['lte'] = max_price
+        filters.append({'range': {'price_manwon': price_range}})
+    if max_mileage is not None:
+        filters.append({'range': {'mileage_km': {'lte': max_mileage}}})
+    if min_year is not None:
+        filters.append({'range': {'model_year': {'gte': min_year}}})
+    if manufacturer:
+        filters.append({'term': {'manufacturer': manufacturer}})
+    if crawled_after is not None or crawled_before is not None:
+        crawl_range = {}
+        if crawled_after is not None:
+            crawl_range['gte'] = crawled_after if isinstance(crawled_after, str) else crawled_after.isoformat()
+        if crawled_before is not None:
+            crawl_range['lte'] = crawled_before if isinstance(crawled_before, str) else crawled_before.isoformat()
+        filters.append({'range': {'crawling_time': crawl_range}})
+    
+    indices = select_encar_indices(client, crawled_after, crawled_before)
+    if not indices:
+        return []
+    
+    # Same order as the index sort and no total hit count, so shards can terminate early
+    body = {
+        'query': {'bool': {'filter': filters}},
+        'sort': [{'crawling_time': 'desc'}],
+        'size': size,
+        'track_total_hits': False
+    }
+    # A partition dropped by retention after select_encar_indices is skipped
+    response = client.search(index=','.join(indices), body=body, ignore_unavailable=True)
+    return [hit['_source'] for hit in response['hits']['hits']]
 
 def get_index_stats(client):
     """
@@ -228,8 +1133,8 @@ def get_index_stats(client):
         dict: Index statistics
     """
     try:
-        index_stats = client.indices.stats(index='encar_cars_detail')
-        doc_count = index_stats['indices']['encar_cars_detail']['total']['docs']['count']
+        index_stats = client.indices.stats(index=config.ENCAR_INDEX_ALIAS)
+        doc_count = index_stats['_all']['primaries']['docs']['count']
         logging.info(f"Total documents in index: {doc_count}")
         return {
             'doc_count': doc_count,
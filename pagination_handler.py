@@ -9,6 +9,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import config
+import driver_setup
 
 def get_total_pages(driver):
     """
@@ -132,12 +133,14 @@ def navigate_to_page(driver, page_number):
         logging.info(f"페이지 {page_number}로 URL을 통해 직접 이동합니다: {url}")
         
         # 페이지 로드
+        load_start = time.time()
         driver.get(url)
         
         # 페이지가 완전히 로드될 때까지 대기
         WebDriverWait(driver, 10).until(
             EC.presence_of_element_located((By.CSS_SELECTOR, config.SELECTORS["car_list"]))
         )
+        driver_setup.page_load_stats.record(driver, "list", time.time() - load_start)
         
         # 인간처럼 행동하기 위한 랜덤 대기
         time.sleep(config.get_page_load_wait())
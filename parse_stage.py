@@ -0,0 +1,178 @@
+"""
+Module for running HTML parsing in a pool of worker processes.
+
+Fetchers hand raw HTML to a ParseStage and get plain record dictionaries back
+in submission order, so parsing scales across cores instead of sharing the
+GIL with the fetch loop. The number of pages in flight is bounded; when the
+window is full, submit() waits for the oldest page, which applies
+backpressure to the fetcher.
+"""
+
+import collections
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import config
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+CARKU_DIR = os.path.join(ROOT_DIR, "carku")
+
+def _init_worker(log_level):
+    """워커 프로세스 초기화 (모듈 경로 및 로깅 설정)"""
+    for path in (ROOT_DIR, CARKU_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    # 크롤러 모듈의 import 시점 로깅 설정보다 먼저 콘솔 로깅만 설정
+    logging.basicConfig(level=log_level, format=config.LOG_FORMAT, datefmt=config.LOG_DATE_FORMAT)
+
+def _decode(html):
+    """바이트로 전달된 HTML을 문자열로 변환"""
+    if isinstance(html, bytes):
+        return html.decode("utf-8", errors="replace")
+    return html
+
+def _parse_carku_list(html):
+    from bs4 import BeautifulSoup
+    import carku_crawling
+    import carku_detail_parser
+    parser = "lxml" if carku_detail_parser.is_available() else "html.parser"
+    return carku_crawling.scrape_car_data_from_page(BeautifulSoup(html, parser))
+
+def _parse_carku_detail(html, car_dict, car_index):
+    import carku_crawling
+    return carku_crawling.extract_detail_page_data(car_dict, html, car_index)
+
+def _parse_encar_list(html, backend="html.parser"):
+    import offline_parser
+    return offline_parser.parse_encar_list_html(html, backend)
+
+def _parse_encar_detail(html, backend="html.parser"):
+    import offline_parser
+    return offline_parser.parse_encar_detail_html(html, backend)
+
+# 페이지 종류별 파싱 함수
+PARSERS = {
+    "carku_list": _parse_carku_list,
+    "carku_detail": _parse_carku_detail,
+    "encar_list": _parse_encar_list,
+    "encar_detail": _parse_encar_detail,
+}
+
+def parse_html(kind, html, *args):
+    """
+    Parse one page in a worker process.
+
+    Args:
+        kind: Page kind (key of PARSERS)
+        html: Raw HTML as bytes or str
+        *args: Extra arguments for the parser of that kind
+
+    Returns:
+        list or dict: Plain record data produced by the parser
+    """
+    return PARSERS[kind](_decode(html), *args)
+
+class ParseStage:
+    """Bounded process-pool stage between fetchers and sinks"""
+
+    def __init__(self, max_workers=None, max_in_flight=None):
+        """
+        Start the worker pool.
+
+        Args:
+            max_workers: Number of worker processes (default: config.PARSE_WORKERS or CPU count)
+            max_in_flight: Maximum number of pages submitted but not yet returned
+                (default: config.PARSE_MAX_IN_FLIGHT or twice the worker count)
+        """
+        self.max_workers = max_workers or config.PARSE_WORKERS or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or config.PARSE_MAX_IN_FLIGHT or self.max_workers * 2
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(logging.getLogger().getEffectiveLevel(),)
+        )
+        self.pending = collections.deque()
+        logging.info(f"파싱 워커 {self.max_workers}개 시작 (최대 대기 페이지 {self.max_in_flight}개)")
+
+    def _collect(self, block):
+        """완료된 결과를 제출 순서대로 수집"""
+        results = []
+        while self.pending and (block or self.pending[0][0].done()):
+            future, context = self.pending.popleft()
+            try:
+                results.append((context, future.result()))
+            except Exception as e:
+                logging.error(f"페이지 파싱 중 오류 발생 ({context}): {e}")
+                results.append((context, None))
+            block = False
+        return results
+
+    def submit(self, kind, html, *args, context=None):
+        """
+        Submit a page for parsing.
+
+        Blocks while the in-flight window is full.
+
+        Args:
+            kind: Page kind (key of PARSERS)
+            html: Raw HTML as bytes or str
+            *args: Extra arguments for the parser of that kind
+            context: Caller data returned together with the result
+
+        Returns:
+            list: (context, result) pairs that completed so far, in submission order.
+                result is None if parsing failed.
+        """
+        results = []
+        while len(self.pending) >= self.max_in_flight:
+            results.extend(self._collect(block=True))
+
+        self.pending.append((self.executor.submit(parse_html, kind, html, *args), context))
+        results.extend(self._collect(block=False))
+        return results
+
+    def drain(self):
+        """
+        Wait for every submitted page.
+
+        Returns:
+            list: Remaining (context, result) pairs in submission order
+        """
+        results = []
+        while self.pending:
+            results.extend(self._collect(block=True))
+        return results
+
+    def map(self, kind, pages, *args):
+        """
+        Parse an iterable of pages, yielding results in order.
+
+        Args:
+            kind: Page kind (key of PARSERS)
+            pages: Iterable of raw HTML pages
+            *args: Extra arguments passed to the parser for every page
+
+        Yields:
+            list or dict or None: Parser result for each page
+        """
+        for page_index, html in enumerate(pages):
+            for _, result in self.submit(kind, html, *args, context=page_index):
+                yield result
+        for _, result in self.drain():
+            yield result
+
+    def close(self):
+        """Shut down the workers, discarding pages that were not drained"""
+        if self.pending:
+            logging.warning(f"수집되지 않은 파싱 결과 {len(self.pending)}개를 버립니다.")
+            self.pending.clear()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        logging.info("파싱 워커 종료")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,95 @@
+"""
+Module for passing crawled car records through a chain of consumers.
+
+A record source such as EncarCrawler.iter_cars() yields one record at a time.
+Every stage is an object with write(record) and close() methods (ParquetSink,
+CheckpointLog, bulk_indexer.EncarBulkSink, ...), so each car reaches all consumers as soon
+as it is produced and the run never has to keep the full result in memory.
+Stages may also have an offset() method reporting how far they got, which is
+saved with the crawl position (crawl_state).
+"""
+
+import logging
+
+class Pipeline:
+    """Fan-out of car records to a list of stages"""
+
+    def __init__(self, stages=None):
+        """
+        Create the pipeline.
+
+        Args:
+            stages: Stage objects with write(record) and close() methods.
+                None entries are skipped, so optional stages can be passed as is.
+        """
+        self.stages = [stage for stage in (stages or []) if stage is not None]
+        self.record_count = 0
+
+    def add(self, stage):
+        """Append a stage to the end of the pipeline"""
+        if stage is not None:
+            self.stages.append(stage)
+
+    def write(self, record):
+        """
+        Pass one record to every stage.
+
+        An error in one stage is logged and does not keep the record from
+        reaching the remaining stages.
+
+        Args:
+            record: Car data dictionary
+        """
+        for stage in self.stages:
+            try:
+                stage.write(record)
+            except Exception as e:
+                logging.error(f"{type(stage).__name__} 단계에서 레코드 처리 중 오류 발생: {e}")
+        self.record_count += 1
+
+    def run(self, records):
+        """
+        Consume an iterable of records.
+
+        Args:
+            records: Iterable or generator of car data dictionaries
+
+        Returns:
+            int: Total number of records written to this pipeline
+        """
+        for record in records:
+            self.write(record)
+        return self.record_count
+
+    def offsets(self):
+        """
+        Get how far each stage got.
+
+        Returns:
+            dict: Stage class name -> value of its offset() method, plus the
+                number of records written to the pipeline under "Pipeline"
+        """
+        offsets = {"Pipeline": self.record_count}
+        for stage in self.stages:
+            offset = getattr(stage, "offset", None)
+            if callable(offset):
+                try:
+                    offsets[type(stage).__name__] = offset()
+                except Exception as e:
+                    logging.error(f"{type(stage).__name__} 단계의 오프셋 조회 중 오류 발생: {e}")
+        return offsets
+
+    def close(self):
+        """Close every stage in order"""
+        for stage in self.stages:
+            try:
+                stage.close()
+            except Exception as e:
+                logging.error(f"{type(stage).__name__} 단계 종료 중 오류 발생: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
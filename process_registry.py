@@ -0,0 +1,265 @@
+"""
+Module for tracking the Chrome and chromedriver processes a crawler spawned.
+
+Each chromedriver is started in a new session (its own process group, which
+the Chrome processes it launches inherit) and its PID, process group and
+start time are recorded in a registry file owned by the crawler process
+(config.get_process_registry_dir()). Cleanup then kills only the process
+groups of the current crawler, or of crawlers that died without cleaning
+up, instead of every Chrome on the machine, so several crawlers can run on
+the same host. psutil is used when installed to verify that a recorded PID
+was not reused and to kill process trees on Windows; without it, process
+groups are killed directly (POSIX) or with taskkill /T (Windows).
+"""
+
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import config
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 프로세스 그룹에 SIGTERM을 보낸 뒤 SIGKILL까지 기다리는 시간 (초)
+TERMINATE_TIMEOUT = 5
+
+_lock = threading.Lock()
+
+def popen_kwargs():
+    """
+    Get the Popen keyword arguments that put a chromedriver in its own process group.
+
+    Returns:
+        dict: Keyword arguments for selenium's Service(popen_kw=...)
+    """
+    if sys.platform == "win32":
+        return {}
+    return {"start_new_session": True}
+
+def _registry_filename(owner_pid=None):
+    """소유 프로세스의 레지스트리 파일 경로"""
+    return os.path.join(config.get_process_registry_dir(), f"crawler-{owner_pid or os.getpid()}.json")
+
+def _load(filename):
+    """레지스트리 파일 읽기 (없거나 손상되면 빈 목록)"""
+    try:
+        with open(filename, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def _save(filename, entries):
+    """레지스트리 파일을 원자적으로 저장 (항목이 없으면 삭제)"""
+    if not entries:
+        if os.path.exists(filename):
+            os.remove(filename)
+        return
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(temp_filename, filename)
+
+def process_alive(pid):
+    """
+    Check whether a process is running, without ever signalling it.
+
+    psutil is used when installed. Without it, os.kill(pid, 0) is used on
+    POSIX; on Windows os.kill terminates the process, so tasklist is asked instead.
+
+    Args:
+        pid: Process ID
+
+    Returns:
+        bool: True if the process exists
+    """
+    if psutil:
+        return psutil.pid_exists(pid)
+    if sys.platform == "win32":
+        result = subprocess.run(["tasklist", "/FI", f"PID eq {pid}", "/NH", "/FO", "CSV"],
+                                capture_output=True, text=True, check=False)
+        return f'"{pid}"' in result.stdout
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+def _create_time(pid):
+    """프로세스 시작 시각 (psutil이 없거나 확인할 수 없으면 None)"""
+    if not psutil:
+        return None
+    try:
+        return psutil.Process(pid).create_time()
+    except psutil.Error:
+        return None
+
+def driver_pid(driver):
+    """WebDriver가 실행한 chromedriver 프로세스 ID"""
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+def register(driver):
+    """
+    Record the chromedriver (and with it the Chrome processes) of a new WebDriver.
+
+    Args:
+        driver: Selenium WebDriver instance
+
+    Returns:
+        dict or None: Registry entry, or None if the driver process is unknown
+    """
+    pid = driver_pid(driver)
+    if pid is None:
+        return None
+
+    entry = {
+        "pid": pid,
+        "pgid": os.getpgid(pid) if hasattr(os, "getpgid") else None,
+        "create_time": _create_time(pid),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with _lock:
+        filename = _registry_filename()
+        entries = _load(filename)
+        entries.append(entry)
+        _save(filename, entries)
+    return entry
+
+def _unregister(pid, owner_pid=None):
+    """레지스트리에서 chromedriver 항목 제거"""
+    with _lock:
+        filename = _registry_filename(owner_pid)
+        _save(filename, [entry for entry in _load(filename) if entry["pid"] != pid])
+
+def _is_same_process(entry):
+    """기록된 PID가 재사용되지 않고 같은 chromedriver를 가리키는지 확인"""
+    if not process_alive(entry["pid"]):
+        return False
+    if entry.get("create_time") is None or not psutil:
+        return True
+    return _create_time(entry["pid"]) == entry["create_time"]
+
+def _kill_tree(pid):
+    """psutil로 프로세스와 모든 자식 프로세스 종료"""
+    try:
+        parent = psutil.Process(pid)
+        processes = parent.children(recursive=True) + [parent]
+    except psutil.Error:
+        return
+    for process in processes:
+        try:
+            process.terminate()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(processes, timeout=TERMINATE_TIMEOUT)
+    for process in alive:
+        try:
+            process.kill()
+        except psutil.Error:
+            pass
+
+def _kill_group(pgid):
+    """프로세스 그룹 전체에 SIGTERM, 남아 있으면 SIGKILL 전송"""
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return
+    deadline = time.time() + TERMINATE_TIMEOUT
+    while time.time() < deadline:
+        try:
+            os.killpg(pgid, 0)
+        except (ProcessLookupError, PermissionError):
+            return
+        time.sleep(0.1)
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def kill_entry(entry):
+    """
+    Kill the processes of one registry entry.
+
+    On POSIX the whole process group of the chromedriver is killed, which
+    includes Chrome processes whose chromedriver already exited. Elsewhere
+    the process tree under the chromedriver is killed.
+
+    Args:
+        entry: Registry entry returned by register()
+    """
+    pgid = entry.get("pgid")
+    # chromedriver가 먼저 종료되어도 같은 그룹의 Chrome 프로세스는 남아 있을 수 있음
+    if pgid and pgid == entry["pid"] and hasattr(os, "killpg"):
+        if process_alive(entry["pid"]) and not _is_same_process(entry):
+            # PID가 다른 프로세스에 재사용됨
+            return
+        _kill_group(pgid)
+    elif not _is_same_process(entry):
+        return
+    elif psutil:
+        _kill_tree(entry["pid"])
+    elif sys.platform == "win32":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(entry["pid"])], check=False, capture_output=True)
+    else:
+        try:
+            os.kill(entry["pid"], signal.SIGKILL)
+        except OSError:
+            pass
+
+def kill_driver_processes(driver):
+    """
+    Kill the processes spawned for one WebDriver and forget them.
+
+    Args:
+        driver: Selenium WebDriver instance
+    """
+    pid = driver_pid(driver)
+    if pid is None:
+        return
+    for entry in _load(_registry_filename()):
+        if entry["pid"] == pid:
+            kill_entry(entry)
+    _unregister(pid)
+
+def kill_registered_processes(include_orphans=True):
+    """
+    Kill the processes registered by this crawler and, optionally, by crawlers that died.
+
+    Registry files of crawlers that are still running are left alone.
+
+    Args:
+        include_orphans: Whether to also clean up after crawler processes that no longer exist
+
+    Returns:
+        int: Number of chromedriver process groups killed
+    """
+    directory = config.get_process_registry_dir()
+    killed = 0
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("crawler-") and name.endswith(".json")):
+            continue
+        try:
+            owner_pid = int(name[len("crawler-"):-len(".json")])
+        except ValueError:
+            continue
+        if owner_pid != os.getpid() and (not include_orphans or process_alive(owner_pid)):
+            continue
+
+        for entry in _load(os.path.join(directory, name)):
+            kill_entry(entry)
+            _unregister(entry["pid"], owner_pid)
+            killed += 1
+        if owner_pid != os.getpid():
+            logging.info(f"종료된 크롤러(PID {owner_pid})가 남긴 Chrome 프로세스를 정리했습니다.")
+    return killed
@@ -0,0 +1,186 @@
+"""
+Module for a bounded pool of reusable Chrome profile directories.
+
+Every WebDriver used to get a fresh chrome_data_<uuid> directory in the
+system temp dir that was never deleted, so long runs left gigabytes of
+profiles behind and every browser started with a cold cache. Profiles are
+now taken from config.CHROME_PROFILE_POOL_SIZE slots under
+config.get_chrome_profile_dir() and returned when the driver is cleaned up,
+keeping their HTTP cache for the next browser. A slot is held with a lock
+file (flock on POSIX, so a crashed crawler releases it automatically), which
+lets several crawlers on one host share the pool. A profile that grew beyond
+config.CHROME_PROFILE_MAX_MB is wiped when it is returned. When every slot is
+in use, a temporary profile is created and deleted on release; temporary
+profiles of dead crawlers and legacy chrome_data_<uuid> directories are
+removed by sweep_orphans().
+"""
+
+import glob
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import config
+import process_registry
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+TEMP_PREFIX = "chrome_data_"
+
+# Chrome이 비정상 종료되면 남는 프로필 잠금 파일
+SINGLETON_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+# 프로필 디렉토리 -> 잠금 (fcntl: 열린 파일, 그 외: 잠금 파일 경로, 임시 프로필: None)
+_held = {}
+_lock = threading.Lock()
+
+def _try_lock(lock_filename):
+    """프로필 슬롯 잠금 시도 (다른 프로세스나 스레드가 사용 중이면 None)"""
+    if fcntl:
+        lock_file = open(lock_filename, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return None
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        return lock_file
+
+    # flock이 없는 플랫폼: 잠금 파일 생성, 소유 프로세스가 종료되었으면 인수
+    for _ in range(2):
+        try:
+            fd = os.open(lock_filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(lock_filename, encoding="utf-8") as f:
+                    owner_pid = int(f.read().strip())
+            except (OSError, ValueError):
+                return None
+            if process_registry.process_alive(owner_pid):
+                return None
+            os.remove(lock_filename)
+            continue
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return lock_filename
+    return None
+
+def _unlock(lock):
+    """프로필 슬롯 잠금 해제"""
+    if lock is None:
+        return
+    if fcntl:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        lock.close()
+    elif os.path.exists(lock):
+        os.remove(lock)
+
+def _dir_size_mb(directory):
+    """디렉토리 전체 크기 (MB)"""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total / (1024 * 1024)
+
+def acquire():
+    """
+    Take a profile directory for a new browser.
+
+    Returns:
+        str: Profile directory to pass as --user-data-dir
+    """
+    root = config.get_chrome_profile_dir()
+    with _lock:
+        for slot in range(config.CHROME_PROFILE_POOL_SIZE):
+            profile_dir = os.path.join(root, f"profile-{slot}")
+            lock = _try_lock(profile_dir + ".lock")
+            if lock is None:
+                continue
+
+            os.makedirs(profile_dir, exist_ok=True)
+            # 비정상 종료된 Chrome이 남긴 잠금 파일 제거 (슬롯을 잠갔으므로 사용 중인 Chrome은 없음)
+            for name in SINGLETON_FILES:
+                path = os.path.join(profile_dir, name)
+                if os.path.lexists(path):
+                    os.remove(path)
+            _held[profile_dir] = lock
+            return profile_dir
+
+        # 모든 슬롯이 사용 중이면 해제할 때 삭제하는 임시 프로필 사용
+        profile_dir = os.path.join(tempfile.gettempdir(), f"{TEMP_PREFIX}{os.getpid()}_{uuid.uuid4().hex}")
+        os.makedirs(profile_dir)
+        _held[profile_dir] = None
+        logging.warning(f"사용 가능한 Chrome 프로필 슬롯이 없어 임시 프로필을 사용합니다: {profile_dir}")
+        return profile_dir
+
+def release(profile_dir):
+    """
+    Return a profile directory after its browser was shut down.
+
+    Pool profiles keep their cache unless they grew beyond
+    config.CHROME_PROFILE_MAX_MB; temporary profiles are deleted.
+
+    Args:
+        profile_dir: Directory returned by acquire()
+    """
+    with _lock:
+        if profile_dir not in _held:
+            return
+        lock = _held.pop(profile_dir)
+
+        try:
+            if lock is None:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+            else:
+                size_mb = _dir_size_mb(profile_dir)
+                if size_mb > config.CHROME_PROFILE_MAX_MB:
+                    logging.info(f"Chrome 프로필이 {size_mb:.0f}MB로 커져 초기화합니다: {profile_dir}")
+                    shutil.rmtree(profile_dir, ignore_errors=True)
+        finally:
+            _unlock(lock)
+
+def sweep_orphans():
+    """
+    Delete profile directories left in the temp dir by crawlers that are gone.
+
+    Temporary profiles are removed once the crawler that created them no
+    longer runs; legacy chrome_data_<uuid> directories (created before the
+    pool existed) are removed once untouched for config.CHROME_PROFILE_ORPHAN_AGE seconds.
+
+    Returns:
+        int: Number of directories deleted
+    """
+    removed = 0
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), TEMP_PREFIX + "*")):
+        name = os.path.basename(path)
+        temporary = re.fullmatch(re.escape(TEMP_PREFIX) + r"(\d+)_[0-9a-f]{32}", name)
+        legacy = re.fullmatch(re.escape(TEMP_PREFIX) + r"[0-9a-f]{32}", name)
+        try:
+            if temporary:
+                if process_registry.process_alive(int(temporary.group(1))):
+                    continue
+            elif not legacy or time.time() - os.path.getmtime(path) < config.CHROME_PROFILE_ORPHAN_AGE:
+                continue
+        except OSError:
+            continue
+
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+
+    if removed:
+        logging.info(f"남아 있던 Chrome 임시 프로필 {removed}개를 삭제했습니다.")
+    return removed
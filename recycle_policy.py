@@ -0,0 +1,144 @@
+"""
+Module for deciding when a long-running Chrome should be replaced.
+
+Chrome's memory grows over a long crawl. Instead of restarting the browser
+blindly every N pages, RecyclePolicy samples the resident memory of the
+browser's whole process tree (chromedriver, Chrome and its renderers, via
+psutil when installed) and the JS heap of the current page (CDP
+Performance.getMetrics), and asks for a recycle when either exceeds its
+threshold or the browser reached its maximum age. Crawlers call check()
+between pages, so a browser is only ever replaced at a page boundary.
+"""
+
+import logging
+import time
+import config
+import process_registry
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+class RecyclePolicy:
+    """Memory and age based browser recycling decisions"""
+
+    def __init__(self, max_rss_mb=None, max_heap_mb=None, max_age=None, max_pages=None):
+        """
+        Create the policy.
+
+        Args:
+            max_rss_mb: Resident memory of the browser process tree that triggers a recycle
+                (default: config.RECYCLE_MAX_RSS_MB, 0 disables the check)
+            max_heap_mb: JS heap of the current page that triggers a recycle
+                (default: config.RECYCLE_MAX_HEAP_MB, 0 disables the check)
+            max_age: Seconds after which a browser is recycled (default: config.RECYCLE_MAX_AGE, 0 disables the check)
+            max_pages: Pages after which a browser is recycled (default: config.RECYCLE_MAX_PAGES, 0 disables the check)
+        """
+        self.max_rss_mb = config.RECYCLE_MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+        self.max_heap_mb = config.RECYCLE_MAX_HEAP_MB if max_heap_mb is None else max_heap_mb
+        self.max_age = config.RECYCLE_MAX_AGE if max_age is None else max_age
+        self.max_pages = config.RECYCLE_MAX_PAGES if max_pages is None else max_pages
+
+        self.driver = None
+        self.started_at = 0.0
+        self.pages = 0
+        self.performance_enabled = False
+        self.recycle_count = 0
+        self.peak_rss_mb = 0.0
+
+    def start(self, driver):
+        """
+        Start tracking a new browser.
+
+        Args:
+            driver: Selenium WebDriver instance that was just created
+        """
+        self.driver = driver
+        self.started_at = time.time()
+        self.pages = 0
+        self.performance_enabled = False
+
+    def rss_mb(self, driver):
+        """
+        Get the resident memory of the browser's process tree.
+
+        Returns:
+            float or None: Memory in MB, or None if psutil is missing or the process is unknown
+        """
+        pid = process_registry.driver_pid(driver)
+        if not psutil or pid is None:
+            return None
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total / (1024 * 1024)
+
+    def heap_mb(self, driver):
+        """
+        Get the JS heap used by the current page.
+
+        Returns:
+            float or None: Heap in MB, or None if CDP metrics are unavailable
+        """
+        try:
+            if not self.performance_enabled:
+                driver.execute_cdp_cmd("Performance.enable", {})
+                self.performance_enabled = True
+            metrics = driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+        except Exception as e:
+            logging.debug(f"CDP 성능 지표 조회 실패: {e}")
+            return None
+
+        for metric in metrics:
+            if metric["name"] == "JSHeapUsedSize":
+                return metric["value"] / (1024 * 1024)
+        return None
+
+    def check(self, driver):
+        """
+        Count a finished page and decide whether to recycle the browser before the next one.
+
+        Args:
+            driver: Selenium WebDriver instance in use
+
+        Returns:
+            str or None: Reason to recycle, or None to keep the browser
+        """
+        if driver is not self.driver:
+            self.start(driver)
+        self.pages += 1
+
+        reason = None
+        rss = self.rss_mb(driver) if self.max_rss_mb else None
+        heap = self.heap_mb(driver) if self.max_heap_mb else None
+        age = time.time() - self.started_at
+
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        if rss is not None and rss > self.max_rss_mb:
+            reason = f"메모리 {rss:.0f}MB > {self.max_rss_mb}MB"
+        elif heap is not None and heap > self.max_heap_mb:
+            reason = f"JS 힙 {heap:.0f}MB > {self.max_heap_mb}MB"
+        elif self.max_age and age > self.max_age:
+            reason = f"실행 시간 {age / 60:.0f}분 > {self.max_age / 60:.0f}분"
+        elif self.max_pages and self.pages >= self.max_pages:
+            reason = f"{self.pages}페이지 처리"
+
+        rss_text = f"{rss:.0f}MB" if rss is not None else "-"
+        heap_text = f"{heap:.0f}MB" if heap is not None else "-"
+        logging.debug(f"브라우저 상태: 메모리 {rss_text}, JS 힙 {heap_text}, {self.pages}페이지, {age:.0f}초")
+
+        if reason:
+            self.recycle_count += 1
+            logging.info(f"브라우저 교체 필요: {reason}")
+        return reason
@@ -5,6 +5,7 @@ Main entry point for the Encar crawler.
 
 import argparse
 import logging
+import os
 import sys
 import time
 import traceback
@@ -12,23 +13,37 @@ import signal
 import platform
 import subprocess
 from main import crawl_encar
+import coordinator
 import driver_setup
+import profile_pool
+import opensearch_handler
+import spool
+import work_queue
 import config
 
+# 첫 번째 종료 신호를 받았는지 여부
+stop_requested = False
+
 def signal_handler(sig, frame):
     """
     Handle termination signals and clean up resources.
-    """
-    logging.info("프로그램 종료 신호를 받았습니다. 리소스를 정리합니다...")
     
-    # Chrome 관련 프로세스 강제 종료
-    try:
-        driver_setup.kill_chrome_processes()
-        logging.info("Chrome 프로세스 정리 완료")
-    except Exception as e:
-        logging.error(f"프로세스 정리 중 오류: {e}")
+    The first signal raises KeyboardInterrupt in the crawl, so the pipeline
+    is flushed and the crawl position is kept for --resume on the way out.
+    A second signal kills Chrome and exits without waiting for the cleanup.
+    """
+    global stop_requested
+    if stop_requested:
+        logging.warning("종료 신호를 다시 받아 정리를 기다리지 않고 종료합니다.")
+        try:
+            driver_setup.kill_chrome_processes()
+        except Exception as e:
+            logging.error(f"프로세스 정리 중 오류: {e}")
+        os._exit(1)
     
-    sys.exit(0)
+    stop_requested = True
+    logging.info("프로그램 종료 신호를 받았습니다. 진행 상태를 저장하고 리소스를 정리합니다...")
+    raise KeyboardInterrupt
 
 def setup_logging():
     """
@@ -85,6 +100,27 @@ def parse_arguments():
         help='크롤링을 시작할 페이지 번호 (기본값: 1)'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=config.CRAWL_WORKERS,
+        help=f'페이지 범위를 나누어 동시에 크롤링할 프로세스 수 (기본값: {config.CRAWL_WORKERS}, 프로세스마다 브라우저 하나)'
+    )
+    
+    parser.add_argument(
+        '--work-queue',
+        nargs='?',
+        const='',
+        metavar='URL',
+        help='작업 큐에 페이지 범위를 추가하고 큐에서 페이지를 가져와 크롤링 (기본값: WORK_QUEUE_URL, 여러 프로세스가 같은 큐를 공유)'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='중단된 크롤링을 저장된 페이지와 처리 중이던 차량부터 이어서 실행 (--start-page와 --pages 대신 저장된 값 사용)'
+    )
+    
     parser.add_argument(
         '--headless', 
         action='store_true',
@@ -92,6 +128,12 @@ def parse_arguments():
         help='헤드리스 모드로 실행 (UI 없음)'
     )
     
+    parser.add_argument(
+        '--no-block-resources',
+        action='store_true',
+        help='이미지, 폰트, 광고/추적 스크립트 차단 끄기 (차단 효과 비교용 기준 실행)'
+    )
+    
     parser.add_argument(
         '--save-all', 
         action='store_true',
@@ -104,6 +146,12 @@ def parse_arguments():
         help='OpenSearch에 데이터 인덱싱'
     )
     
+    parser.add_argument(
+        '--backfill',
+        action='store_true',
+        help='대량 적재 모드로 인덱싱 (실행 중 refresh와 복제본을 끄고 종료 후 복원)'
+    )
+    
     parser.add_argument(
         '--retries', 
         type=int, 
@@ -111,8 +159,141 @@ def parse_arguments():
         help=f'오류 발생 시 재시도 횟수 (기본값: {config.MAX_RETRIES})'
     )
     
+    parser.add_argument(
+        '--migrate-index',
+        nargs='?',
+        const='encar',
+        choices=['encar', 'carku'],
+        help='인덱스를 현재 매핑 버전으로 재색인하고 별칭을 전환한 뒤 종료 (기본값: encar, 중단된 경우 이어서 실행)'
+    )
+    
+    parser.add_argument(
+        '--reindex-slices',
+        type=int,
+        default=config.REINDEX_SLICES,
+        help=f'재색인 스크롤 슬라이스 수 (기본값: {config.REINDEX_SLICES})'
+    )
+    
+    parser.add_argument(
+        '--reindex-workers',
+        type=int,
+        default=config.REINDEX_WORKERS,
+        help=f'동시에 복사할 슬라이스 수 (기본값: {config.REINDEX_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--apply-retention',
+        nargs='?',
+        const=config.ENCAR_RETENTION_DAYS,
+        type=int,
+        metavar='DAYS',
+        help=f'보관 기간이 지난 Encar 분할 인덱스를 삭제한 뒤 종료 (기본값: {config.ENCAR_RETENTION_DAYS}일)'
+    )
+    
+    parser.add_argument(
+        '--replay-spool',
+        action='store_true',
+        help='OpenSearch에 색인하지 못해 스풀에 기록된 차량을 bulk로 재전송한 뒤 종료'
+    )
+    
     return parser.parse_args()
 
+def crawl_with_retries(logger, args, task_queue=None):
+    """
+    Run crawl_encar, retrying up to config.MAX_RETRIES attempts like main.main().
+    
+    A failed single crawler is retried with resume=True, so it continues
+    where it stopped; a work queue crawler takes the remaining pages anyway.
+    
+    Raises:
+        Exception: The error of the last attempt
+    """
+    resume = args.resume
+    attempts = max(config.MAX_RETRIES, 1)
+    for attempt in range(1, attempts + 1):
+        try:
+            if task_queue is not None:
+                return crawl_encar(
+                    save_all=args.save_all,
+                    use_opensearch=args.use_opensearch,
+                    backfill=args.backfill,
+                    task_queue=task_queue
+                )
+            return crawl_encar(
+                start_page=args.start_page,
+                max_pages=args.pages,
+                save_all=args.save_all,
+                use_opensearch=args.use_opensearch,
+                backfill=args.backfill,
+                resume=resume
+            )
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            logger.error(f"크롤링 실패 ({attempt}/{attempts}): {e}")
+            driver_setup.kill_chrome_processes()
+            wait_time = config.get_retry_wait()
+            logger.info(f"{wait_time:.0f}초 후 이어서 다시 실행합니다...")
+            time.sleep(wait_time)
+            resume = task_queue is None
+
+def replay_spool(logger, args):
+    """
+    Index the cars spooled while OpenSearch was unavailable.
+    
+    Returns:
+        int: Exit code (1 if segments are left over)
+    """
+    try:
+        client = opensearch_handler.create_opensearch_client()
+        result = spool.replay_spool(client)
+        logger.info(f"스풀 재전송 완료: {result['docs']}건 색인, 남은 세그먼트 {result['kept']}개")
+        return 1 if result['kept'] else 0
+    except Exception as e:
+        logger.error(f"스풀 재전송 중 오류 발생: {e}")
+        logger.error(traceback.format_exc())
+        return 1
+
+def apply_retention(logger, args):
+    """
+    Delete Encar partition indices older than the retention period.
+    
+    Returns:
+        int: Exit code
+    """
+    try:
+        client = opensearch_handler.create_opensearch_client()
+        dropped = opensearch_handler.drop_expired_partitions(client, retention_days=args.apply_retention)
+        logger.info(f"보관 기간 정리 완료: 분할 인덱스 {len(dropped)}개 삭제")
+        return 0
+    except Exception as e:
+        logger.error(f"보관 기간 정리 중 오류 발생: {e}")
+        logger.error(traceback.format_exc())
+        return 1
+
+def migrate_index(logger, args):
+    """
+    Reindex the Encar or Carku index behind its alias into the current mapping version.
+    
+    Returns:
+        int: Exit code
+    """
+    migrations = {
+        'encar': (opensearch_handler.migrate_encar_index, config.ENCAR_INDEX_ALIAS),
+        'carku': (opensearch_handler.migrate_carku_index, config.CARKU_INDEX_ALIAS),
+    }
+    migrate, alias = migrations[args.migrate_index]
+    
+    try:
+        client = opensearch_handler.create_opensearch_client()
+        index_name = migrate(client, slices=args.reindex_slices, workers=args.reindex_workers)
+        logger.info(f"인덱스 마이그레이션 완료: {alias} -> {index_name}")
+        return 0
+    except Exception as e:
+        logger.error(f"인덱스 마이그레이션 중 오류 발생: {e}")
+        logger.error(traceback.format_exc())
+        return 1
+
 def main():
     """
     Main function to run the crawler.
@@ -127,14 +308,37 @@ def main():
     # 명령행 인수 파싱
     args = parse_arguments()
     
+    # 인덱스 마이그레이션만 실행
+    if args.migrate_index:
+        return migrate_index(logger, args)
+    
+    # 스풀 재전송만 실행
+    if args.replay_spool:
+        return replay_spool(logger, args)
+    
+    # 보관 기간 정리만 실행
+    if args.apply_retention:
+        return apply_retention(logger, args)
+    
     # 설정 업데이트
     config.MAX_PAGES = args.pages
     config.HEADLESS_MODE = args.headless
     config.MAX_RETRIES = args.retries
+    if args.no_block_resources:
+        config.BLOCK_RESOURCES = False
     
-    # 기존 Chrome 프로세스 정리
+    if args.work_queue is not None and args.workers > 1:
+        logger.error("--work-queue는 프로세스마다 하나의 크롤러로 실행합니다. 같은 큐로 run.py를 여러 번 실행하세요.")
+        return 1
+    
+    if args.resume and (args.work_queue is not None or args.workers > 1):
+        logger.error("--resume은 단일 크롤러 실행에서만 사용합니다. 작업 큐와 병렬 크롤링은 남은 페이지를 자체적으로 이어서 처리합니다.")
+        return 1
+    
+    # 종료된 크롤러가 남긴 Chrome 프로세스와 임시 프로필 정리
     try:
         driver_setup.kill_chrome_processes()
+        profile_pool.sweep_orphans()
         logger.info("기존 Chrome 프로세스 정리 완료")
     except Exception as e:
         logger.error(f"프로세스 정리 중 오류: {e}")
@@ -144,20 +348,37 @@ def main():
     logger.info("Encar 차량 정보 크롤러 시작")
     logger.info(f"최대 페이지 수: {args.pages}")
     logger.info(f"시작 페이지: {args.start_page}")
+    logger.info(f"이어서 실행: {args.resume}")
+    logger.info(f"크롤러 프로세스 수: {args.workers}")
+    logger.info(f"작업 큐: {'사용' if args.work_queue is not None else '사용 안 함'}")
     logger.info(f"헤드리스 모드: {args.headless}")
+    logger.info(f"리소스 차단: {config.BLOCK_RESOURCES}")
     logger.info(f"OpenSearch 사용: {args.use_opensearch}")
+    logger.info(f"대량 적재 모드: {args.backfill}")
     logger.info("=" * 50)
     
     # 크롤링 실행
     start_time = time.time()
+    task_queue = None
     
     try:
-        crawl_encar(
-            start_page=args.start_page,
-            max_pages=args.pages,
-            save_all=args.save_all,
-            use_opensearch=args.use_opensearch
-        )
+        if args.work_queue is not None:
+            # 이미 추가된 페이지는 건너뛰므로 여러 프로세스가 같은 범위로 실행해도 됨
+            task_queue = work_queue.open_work_queue(args.work_queue)
+            work_queue.seed_pages(task_queue, work_queue.ENCAR_PAGE, args.start_page, args.pages)
+            crawl_with_retries(logger, args, task_queue)
+            logger.info(f"작업 큐 상태: {task_queue.counts()}")
+        elif args.workers > 1:
+            coordinator.crawl_parallel(
+                args.workers,
+                start_page=args.start_page,
+                max_pages=args.pages,
+                save_all=args.save_all,
+                use_opensearch=args.use_opensearch,
+                backfill=args.backfill
+            )
+        else:
+            crawl_with_retries(logger, args)
         
         # 크롤링 완료 메시지
         elapsed_time = time.time() - start_time
@@ -166,6 +387,17 @@ def main():
         logger.info(f"소요 시간: {elapsed_time:.2f}초")
         logger.info("=" * 50)
         
+    except KeyboardInterrupt:
+        # 수집한 차량은 체크포인트 로그에, 진행 위치는 크롤링 상태 파일에 남아 있음
+        elapsed_time = time.time() - start_time
+        logger.warning("=" * 50)
+        if args.work_queue is None and args.workers <= 1:
+            logger.warning("크롤링이 중단되었습니다. python run.py --resume으로 이어서 실행할 수 있습니다.")
+        else:
+            logger.warning("크롤링이 중단되었습니다. 같은 옵션으로 다시 실행하면 남은 페이지를 처리합니다.")
+        logger.warning(f"소요 시간: {elapsed_time:.2f}초")
+        logger.warning("=" * 50)
+        return 130
     except Exception as e:
         # 오류 발생 시 처리
         elapsed_time = time.time() - start_time
@@ -176,6 +408,9 @@ def main():
         logger.error("=" * 50)
         return 1
     finally:
+        if task_queue:
+            task_queue.close()
+        
         # 프로그램 종료 전 최종 프로세스 정리
         try:
             driver_setup.kill_chrome_processes()
@@ -0,0 +1,309 @@
+"""
+Module for a durable local spool of OpenSearch bulk actions.
+
+When OpenSearch is unreachable or keeps rejecting requests, bulk actions are
+appended to gzip-compressed JSONL segment files instead of being dropped. A
+segment is written under a ".part" name and renamed when it is sealed, so a
+replay only picks up complete segments; a ".part" file left behind by a
+crashed process is sealed on the next start, and its torn tail is skipped
+when read. Every action carries its target index and a deterministic _id,
+so replaying a segment again (after a failed replay or a crash in the middle
+of one) overwrites the same documents instead of adding duplicates.
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from opensearchpy import helpers
+import config
+import opensearch_handler
+import process_registry
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+PART_SUFFIX = SEGMENT_SUFFIX + ".part"
+
+def make_action(index, document, document_id=None):
+    """
+    Build a bulk action to spool.
+
+    Args:
+        index: Target index or alias
+        document: Document to index
+        document_id: Document ID (default: SHA-1 of the document, so the same
+            document always gets the same ID)
+
+    Returns:
+        dict: Dictionary with _index, _id and _source
+    """
+    if document_id is None:
+        key = json.dumps(document, sort_keys=True, ensure_ascii=False, default=str)
+        document_id = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return {"_index": index, "_id": document_id, "_source": document}
+
+class DiskSpool:
+    """Append-only spool of bulk actions in segmented gzip JSONL files"""
+
+    def __init__(self, directory=None, segment_records=None, fsync_every=None):
+        """
+        Open the spool, sealing segments left unfinished by crashed processes.
+
+        Args:
+            directory: Spool directory (default: config.get_spool_dir())
+            segment_records: Actions per segment file (default: config.SPOOL_SEGMENT_RECORDS)
+            fsync_every: Actions written between fsync calls (default: config.SPOOL_FSYNC_EVERY)
+        """
+        self.directory = directory or config.get_spool_dir()
+        self.segment_records = segment_records or config.SPOOL_SEGMENT_RECORDS
+        self.fsync_every = fsync_every or config.SPOOL_FSYNC_EVERY
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.raw_file = None
+        self.gzip_file = None
+        self.part_filename = None
+        self.segment_count = 0
+        self.segment_size = 0
+        self.unsynced = 0
+        self.record_count = 0
+        self._seal_orphans()
+
+    def _seal_orphans(self):
+        """종료된 프로세스가 남긴 .part 세그먼트를 봉인"""
+        for part_filename in glob.glob(os.path.join(self.directory, "*" + PART_SUFFIX)):
+            match = re.search(r"-(\d+)-\d+" + re.escape(PART_SUFFIX) + "$", part_filename)
+            if match and process_registry.process_alive(int(match.group(1))):
+                continue
+            os.replace(part_filename, part_filename[:-len(".part")])
+            logging.warning(f"중단된 스풀 세그먼트를 봉인합니다: {part_filename}")
+
+    def _open_segment(self):
+        """새 세그먼트 파일 열기"""
+        self.segment_count += 1
+        name = f"spool-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.segment_count:04d}"
+        self.part_filename = os.path.join(self.directory, name + PART_SUFFIX)
+        self.raw_file = open(self.part_filename, "wb")
+        self.gzip_file = gzip.GzipFile(fileobj=self.raw_file, mode="wb")
+        self.segment_size = 0
+
+    def write(self, action):
+        """
+        Append one bulk action.
+
+        Args:
+            action: Dictionary with _index, _id and _source
+        """
+        if self.gzip_file is None:
+            self._open_segment()
+
+        self.gzip_file.write((json.dumps(action, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+        self.segment_size += 1
+        self.record_count += 1
+        self.unsynced += 1
+
+        if self.unsynced >= self.fsync_every:
+            self.sync()
+        if self.segment_size >= self.segment_records:
+            self.seal()
+
+    def sync(self):
+        """Flush written actions to disk (the segment stays readable up to this point)"""
+        if self.gzip_file is None or not self.unsynced:
+            return
+        self.gzip_file.flush()
+        self.raw_file.flush()
+        os.fsync(self.raw_file.fileno())
+        self.unsynced = 0
+
+    def seal(self):
+        """Close the current segment and make it visible to replay"""
+        if self.gzip_file is None:
+            return
+        self.gzip_file.close()
+        self.raw_file.flush()
+        os.fsync(self.raw_file.fileno())
+        self.raw_file.close()
+        os.replace(self.part_filename, self.part_filename[:-len(".part")])
+        self.gzip_file = self.raw_file = self.part_filename = None
+        self.unsynced = 0
+
+    def close(self):
+        """Seal the current segment"""
+        self.seal()
+        if self.record_count:
+            logging.info(f"스풀에 문서 {self.record_count}건 기록: {self.directory}")
+
+def list_segments(directory=None):
+    """
+    List the sealed segments of a spool, oldest first.
+
+    Args:
+        directory: Spool directory (default: config.get_spool_dir())
+
+    Returns:
+        list: Segment file paths
+    """
+    directory = directory or config.get_spool_dir()
+    return sorted(glob.glob(os.path.join(directory, "*" + SEGMENT_SUFFIX)))
+
+def read_segment(filename):
+    """
+    Read the actions of a segment.
+
+    A segment sealed after a crash ends without a gzip trailer and may end with
+    a partial line; everything before that is returned.
+
+    Yields:
+        dict: Bulk actions in write order
+    """
+    with gzip.open(filename, "rt", encoding="utf-8") as f:
+        try:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"스풀 세그먼트 {filename}의 {line_number}번째 줄을 읽을 수 없습니다.")
+        except (EOFError, OSError) as e:
+            logging.warning(f"스풀 세그먼트 {filename}의 끝이 손상되어 이후 내용을 건너뜁니다: {e}")
+
+class SpoolSink:
+    """Pipeline stage that writes Encar records to the spool while OpenSearch is unavailable"""
+
+    def __init__(self, spool):
+        """
+        Create the stage.
+
+        Args:
+            spool: DiskSpool to write to
+        """
+        self.spool = spool
+        self.record_count = 0
+
+    def write(self, record):
+        """Convert one car record to a bulk action and spool it"""
+        self.record_count += 1
+        for action in opensearch_handler.build_encar_actions([record], self.record_count):
+            self.spool.write(action)
+
+    def offset(self):
+        """Number of cars written to the spool"""
+        return self.record_count
+
+    def close(self):
+        """Seal the spool"""
+        self.spool.close()
+        logging.info(f"OpenSearch 대신 스풀에 기록한 차량 {self.record_count}대 (재전송: python run.py --replay-spool)")
+
+def _prepare_encar_index(client, index):
+    """Encar 분할 인덱스가 없으면 템플릿으로 생성"""
+    if index.startswith(f"{config.ENCAR_INDEX_ALIAS}_v") and opensearch_handler.get_partition_range(index):
+        opensearch_handler.ensure_encar_partition(client, index)
+
+def replay_segment(client, filename, chunk_size=None, prepare_index=None):
+    """
+    Bulk-index the actions of one segment.
+
+    Args:
+        client: OpenSearch client
+        filename: Segment file path
+        chunk_size: Actions per bulk request (default: config.SPOOL_REPLAY_CHUNK_SIZE)
+        prepare_index: Function called once per target index before its first action
+
+    Returns:
+        tuple: (indexed count, failed count)
+    """
+    def actions():
+        for action in read_segment(filename):
+            if prepare_index:
+                prepare_index(action['_index'])
+            yield action
+
+    indexed = failed = 0
+    for ok, item in helpers.streaming_bulk(
+        client, actions(),
+        chunk_size=chunk_size or config.SPOOL_REPLAY_CHUNK_SIZE,
+        max_retries=config.BULK_MAX_RETRIES,
+        initial_backoff=config.BULK_BACKOFF_BASE,
+        max_backoff=config.BULK_BACKOFF_MAX,
+        raise_on_error=False,
+        raise_on_exception=False,
+        request_timeout=config.BULK_REQUEST_TIMEOUT
+    ):
+        if ok:
+            indexed += 1
+        else:
+            failed += 1
+            if failed == 1:
+                logging.error(f"스풀 재전송 실패 ({filename}): {item}")
+    return indexed, failed
+
+def replay_spool(client, directory=None, workers=None, chunk_size=None):
+    """
+    Drain a spool into OpenSearch.
+
+    Segments are replayed in parallel and deleted once every action in them
+    was indexed; a segment with failures is kept for the next replay. Because
+    the actions have deterministic IDs, replaying a segment again is safe.
+
+    Args:
+        client: OpenSearch client
+        directory: Spool directory (default: config.get_spool_dir())
+        workers: Segments replayed at the same time (default: config.SPOOL_REPLAY_WORKERS)
+        chunk_size: Actions per bulk request (default: config.SPOOL_REPLAY_CHUNK_SIZE)
+
+    Returns:
+        dict: Replayed and kept segment counts, indexed and failed action counts,
+            elapsed seconds and docs/sec
+    """
+    segments = list_segments(directory)
+    result = {'segments': 0, 'kept': 0, 'docs': 0, 'failed': 0, 'seconds': 0.0, 'docs_per_sec': 0.0}
+    if not segments:
+        logging.info("재전송할 스풀 세그먼트가 없습니다.")
+        return result
+
+    prepared = set()
+    lock = threading.Lock()
+
+    def prepare_index(index):
+        with lock:
+            if index in prepared:
+                return
+            _prepare_encar_index(client, index)
+            prepared.add(index)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers or config.SPOOL_REPLAY_WORKERS) as executor:
+        futures = {
+            executor.submit(replay_segment, client, filename, chunk_size, prepare_index): filename
+            for filename in segments
+        }
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                indexed, failed = future.result()
+            except Exception as e:
+                logging.error(f"스풀 세그먼트 재전송 중 오류 발생 ({filename}): {e}")
+                result['kept'] += 1
+                continue
+
+            result['docs'] += indexed
+            result['failed'] += failed
+            if failed:
+                result['kept'] += 1
+            else:
+                os.remove(filename)
+                result['segments'] += 1
+
+    if prepared:
+        client.indices.refresh(index=','.join(sorted(prepared)))
+    result['seconds'] = time.time() - start
+    result['docs_per_sec'] = result['docs'] / result['seconds'] if result['seconds'] > 0 else 0.0
+    logging.info(f"스풀 재전송 완료: 세그먼트 {result['segments']}개, 문서 {result['docs']}건 "
+                 f"({result['docs_per_sec']:.1f} docs/sec), 실패 {result['failed']}건, 남은 세그먼트 {result['kept']}개")
+    return result
@@ -0,0 +1,540 @@
+"""
+Module for a durable work queue of listing pages and detail URLs.
+
+Crawlers used to loop over pages in-process, so work could not be shared
+between processes or picked up again after a crash. Tasks (listing pages and
+detail URLs) are kept in a queue instead: a crawler leases a task, which
+hides it from other crawlers for a visibility timeout, and acks it when the
+work is done. A task whose crawler died becomes visible again when its lease
+expires, and a task that failed is retried after a delay until it runs out
+of attempts. Tasks are unique per (kind, key), so inserting a page or a car
+that is already queued, leased or done is a no-op; keys are prefixed with a
+crawl ID so that the next crawl starts from a fresh frontier. The crawl ID is
+resolved once when the queue is opened (config.WORK_QUEUE_CRAWL_ID, else the
+crawl that still has unfinished tasks, else today's date) and used for every
+key through WorkQueue.key(), so a crawl that runs past midnight keeps its
+namespace and a crawl left unfinished is continued by the next run. Higher
+priorities are leased first.
+
+WorkQueue defines the interface; SQLiteWorkQueue stores the queue in one
+SQLite database in WAL mode, which needs no broker but must be on a local
+disk shared by the crawler processes of one host. Other backends can be
+registered in BACKENDS and selected with config.WORK_QUEUE_URL.
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+import config
+
+ENCAR_PAGE = "encar_page"
+ENCAR_DETAIL = "encar_detail"
+CARKU_PAGE = "carku_page"
+CARKU_DETAIL = "carku_detail"
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+def default_crawl_id():
+    """설정된 크롤링 구분자, 없으면 오늘 날짜"""
+    return config.WORK_QUEUE_CRAWL_ID or datetime.now().strftime("%Y%m%d")
+
+def crawl_key(value, crawl_id=None):
+    """
+    Build a task key in the namespace of a crawl.
+
+    Args:
+        value: Page number, car ID or URL
+        crawl_id: Crawl namespace (default: default_crawl_id(); crawlers use
+            WorkQueue.key() so that the namespace does not change during a crawl)
+
+    Returns:
+        str: Task key
+    """
+    return f"{crawl_id or default_crawl_id()}:{value}"
+
+class Task:
+    """A leased task; pass it back to ack(), nack() or extend()"""
+
+    def __init__(self, task_id, kind, key, payload, priority, attempts, lease_token):
+        """Create a task (done by the queue backend when it is leased)"""
+        self.id = task_id
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.priority = priority
+        self.attempts = attempts
+        self.lease_token = lease_token
+
+    def __repr__(self):
+        return f"Task({self.kind}, {self.key}, attempts={self.attempts})"
+
+class WorkQueue:
+    """Interface of a work queue backend"""
+
+    # 이 큐로 처리하는 크롤링의 구분자 (백엔드가 큐를 열 때 정함)
+    crawl_id = None
+
+    def key(self, value):
+        """
+        Build a task key in the namespace of this queue's crawl.
+
+        Args:
+            value: Page number, car ID or URL
+
+        Returns:
+            str: Task key
+        """
+        return crawl_key(value, self.crawl_id)
+
+    def put(self, kind, key, payload=None, priority=0, delay=0):
+        """
+        Add a task unless a task with the same kind and key exists.
+
+        Args:
+            kind: Task kind (e.g. ENCAR_PAGE)
+            key: Unique key within the kind (see key())
+            payload: JSON-serializable task data
+            priority: Higher priorities are leased first
+            delay: Seconds before the task becomes visible
+
+        Returns:
+            bool: True if the task was added, False if it was a duplicate
+        """
+        raise NotImplementedError
+
+    def put_many(self, kind, items):
+        """
+        Add several tasks (in one transaction where the backend supports it).
+
+        Args:
+            kind: Task kind
+            items: Iterable of (key, payload, priority) tuples
+
+        Returns:
+            int: Number of tasks added (duplicates are skipped)
+        """
+        return sum(self.put(kind, key, payload, priority) for key, payload, priority in items)
+
+    def lease(self, kinds, visibility_timeout=None):
+        """
+        Take the visible task with the highest priority.
+
+        Args:
+            kinds: Task kinds to take
+            visibility_timeout: Seconds the task stays hidden from other crawlers
+                (default: config.WORK_QUEUE_VISIBILITY_TIMEOUT)
+
+        Returns:
+            Task or None: Leased task, or None if no task is visible
+        """
+        raise NotImplementedError
+
+    def claim(self, kind, key, payload=None, priority=0, visibility_timeout=None):
+        """
+        Add a task and lease it at once, or lease the existing task if it is visible.
+
+        Used for work found while crawling (a car on a listing page) that is
+        processed right away, but must not be processed by another crawler too.
+
+        Returns:
+            Task or None: Leased task, or None if the task is leased by someone else or done
+        """
+        raise NotImplementedError
+
+    def ack(self, task):
+        """
+        Mark a leased task as done.
+
+        Returns:
+            bool: False if the lease expired and the task was taken by someone else
+        """
+        raise NotImplementedError
+
+    def nack(self, task, delay=None, error=None):
+        """
+        Give a leased task back for a retry after a delay, or fail it after its last attempt.
+
+        Args:
+            task: Leased task
+            delay: Seconds before the retry (default: config.WORK_QUEUE_RETRY_DELAY)
+            error: Error message recorded with the task
+        """
+        raise NotImplementedError
+
+    def extend(self, task, visibility_timeout=None):
+        """
+        Extend the lease of a task that is still being worked on.
+
+        Returns:
+            bool: False if the lease already expired and the task was taken by someone else
+        """
+        raise NotImplementedError
+
+    def cancel(self, kind, keys):
+        """
+        Drop pending tasks that are no longer needed (e.g. pages after the end of the listing).
+
+        Returns:
+            int: Number of tasks dropped
+        """
+        raise NotImplementedError
+
+    def counts(self, kinds=None):
+        """
+        Count tasks by kind and state.
+
+        Returns:
+            dict: {kind: {state: count}}
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release the backend's resources"""
+
+class SQLiteWorkQueue(WorkQueue):
+    """Work queue in a SQLite database in WAL mode"""
+
+    def __init__(self, filename=None, max_attempts=None, retention_days=None, crawl_id=None):
+        """
+        Open (and create) the queue database.
+
+        Args:
+            filename: Database path (default: config.get_work_queue_filename())
+            max_attempts: Leases per task before it fails (default: config.WORK_QUEUE_MAX_ATTEMPTS)
+            retention_days: Days finished tasks are kept (default: config.WORK_QUEUE_RETENTION_DAYS)
+            crawl_id: Crawl namespace of the keys (default: config.WORK_QUEUE_CRAWL_ID, else the
+                crawl with unfinished tasks, else today's date)
+        """
+        self.filename = filename or config.get_work_queue_filename()
+        self.max_attempts = max_attempts or config.WORK_QUEUE_MAX_ATTEMPTS
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 트랜잭션은 직접 관리 (BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡아 임대 경쟁 방지)
+        self.conn = sqlite3.connect(self.filename, timeout=config.WORK_QUEUE_BUSY_TIMEOUT,
+                                    isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_token TEXT,
+                leased_by TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (kind, key)
+            );
+            CREATE INDEX IF NOT EXISTS tasks_visible ON tasks (kind, state, priority DESC, available_at);
+        """)
+        self.purge(retention_days)
+        self.crawl_id = crawl_id or config.WORK_QUEUE_CRAWL_ID or self._unfinished_crawl_id() or default_crawl_id()
+        logging.info(f"작업 큐 크롤링 구분자: {self.crawl_id}")
+
+    def _unfinished_crawl_id(self):
+        """처리할 작업이 남아 있는 가장 최근 크롤링의 구분자 (없으면 None)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT key FROM tasks WHERE state IN (?, ?) ORDER BY created_at DESC LIMIT 1",
+                (PENDING, LEASED)
+            ).fetchone()
+        return row[0].partition(":")[0] if row else None
+
+    def _transaction(self, body):
+        """쓰기 잠금을 잡은 트랜잭션에서 body(cursor) 실행"""
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = body(cursor)
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return result
+
+    def _insert(self, cursor, kind, key, payload, priority, available_at):
+        """같은 종류와 키의 작업이 없으면 추가 (추가했으면 True)"""
+        now = time.time()
+        cursor.execute(
+            "INSERT OR IGNORE INTO tasks (kind, key, payload, priority, state, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, key, json.dumps(payload, ensure_ascii=False, default=str) if payload is not None else None,
+             priority, PENDING, available_at, now, now)
+        )
+        return cursor.rowcount == 1
+
+    def _lease_row(self, cursor, row_id, visibility_timeout):
+        """행을 임대 상태로 바꾸고 Task 반환"""
+        now = time.time()
+        token = uuid.uuid4().hex
+        cursor.execute(
+            "UPDATE tasks SET state = ?, attempts = attempts + 1, available_at = ?, lease_token = ?, "
+            "leased_by = ?, updated_at = ? WHERE id = ?",
+            (LEASED, now + (visibility_timeout or config.WORK_QUEUE_VISIBILITY_TIMEOUT), token, self.owner, now, row_id)
+        )
+        row = cursor.execute(
+            "SELECT id, kind, key, payload, priority, attempts FROM tasks WHERE id = ?", (row_id,)
+        ).fetchone()
+        return Task(row[0], row[1], row[2], json.loads(row[3]) if row[3] else None, row[4], row[5], token)
+
+    def _fail_exhausted(self, cursor, now):
+        """임대가 만료된 채 시도 횟수를 모두 쓴 작업을 실패 처리"""
+        cursor.execute(
+            "UPDATE tasks SET state = ?, lease_token = NULL, error = COALESCE(error, 'lease expired'), updated_at = ? "
+            "WHERE state = ? AND available_at <= ? AND attempts >= ?",
+            (FAILED, now, LEASED, now, self.max_attempts)
+        )
+        if cursor.rowcount:
+            logging.warning(f"임대가 만료된 채 최대 시도 횟수를 넘은 작업 {cursor.rowcount}개를 실패 처리했습니다.")
+
+    def put(self, kind, key, payload=None, priority=0, delay=0):
+        def body(cursor):
+            return self._insert(cursor, kind, key, payload, priority, time.time() + delay)
+        return self._transaction(body)
+
+    def put_many(self, kind, items):
+        def body(cursor):
+            now = time.time()
+            return sum(self._insert(cursor, kind, key, payload, priority, now) for key, payload, priority in items)
+        return self._transaction(body)
+
+    def lease(self, kinds, visibility_timeout=None):
+        kinds = [kinds] if isinstance(kinds, str) else list(kinds)
+
+        def body(cursor):
+            now = time.time()
+            self._fail_exhausted(cursor, now)
+            # 대기 중인 작업과 임대가 만료된 작업 모두 보이는 작업
+            row = cursor.execute(
+                f"SELECT id FROM tasks WHERE kind IN ({','.join('?' * len(kinds))}) "
+                "AND state IN (?, ?) AND available_at <= ? ORDER BY priority DESC, available_at, id LIMIT 1",
+                (*kinds, PENDING, LEASED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            return self._lease_row(cursor, row[0], visibility_timeout)
+        return self._transaction(body)
+
+    def claim(self, kind, key, payload=None, priority=0, visibility_timeout=None):
+        def body(cursor):
+            now = time.time()
+            self._insert(cursor, kind, key, payload, priority, now)
+            row = cursor.execute(
+                "SELECT id, attempts FROM tasks WHERE kind = ? AND key = ? AND state IN (?, ?) AND available_at <= ?",
+                (kind, key, PENDING, LEASED, now)
+            ).fetchone()
+            if row is None or row[1] >= self.max_attempts:
+                return None
+            return self._lease_row(cursor, row[0], visibility_timeout)
+        return self._transaction(body)
+
+    def ack(self, task):
+        def body(cursor):
+            cursor.execute(
+                "UPDATE tasks SET state = ?, lease_token = NULL, error = NULL, updated_at = ? WHERE id = ? AND lease_token = ?",
+                (DONE, time.time(), task.id, task.lease_token)
+            )
+            return cursor.rowcount == 1
+        acked = self._transaction(body)
+        if not acked:
+            logging.warning(f"임대가 만료되어 다른 크롤러가 가져간 작업입니다: {task}")
+        return acked
+
+    def nack(self, task, delay=None, error=None):
+        delay = config.WORK_QUEUE_RETRY_DELAY if delay is None else delay
+
+        def body(cursor):
+            state = FAILED if task.attempts >= self.max_attempts else PENDING
+            cursor.execute(
+                "UPDATE tasks SET state = ?, available_at = ?, lease_token = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND lease_token = ?",
+                (state, time.time() + delay, error, time.time(), task.id, task.lease_token)
+            )
+            return state if cursor.rowcount == 1 else None
+        state = self._transaction(body)
+        if state == FAILED:
+            logging.error(f"작업이 {task.attempts}번 실패하여 더 이상 재시도하지 않습니다: {task} ({error})")
+
+    def extend(self, task, visibility_timeout=None):
+        def body(cursor):
+            now = time.time()
+            cursor.execute(
+                "UPDATE tasks SET available_at = ?, updated_at = ? WHERE id = ? AND lease_token = ?",
+                (now + (visibility_timeout or config.WORK_QUEUE_VISIBILITY_TIMEOUT), now, task.id, task.lease_token)
+            )
+            return cursor.rowcount == 1
+        return self._transaction(body)
+
+    def cancel(self, kind, keys):
+        def body(cursor):
+            cancelled = 0
+            for key in keys:
+                cursor.execute(
+                    "UPDATE tasks SET state = ?, error = 'cancelled', updated_at = ? WHERE kind = ? AND key = ? AND state = ?",
+                    (DONE, time.time(), kind, key, PENDING)
+                )
+                cancelled += cursor.rowcount
+            return cancelled
+        return self._transaction(body)
+
+    def counts(self, kinds=None):
+        with self.lock:
+            rows = self.conn.execute("SELECT kind, state, COUNT(*) FROM tasks GROUP BY kind, state").fetchall()
+        result = {}
+        for kind, state, count in rows:
+            if kinds is None or kind in kinds:
+                result.setdefault(kind, {})[state] = count
+        return result
+
+    def purge(self, retention_days=None):
+        """
+        Delete finished tasks older than the retention period.
+
+        Args:
+            retention_days: Days finished tasks are kept (default: config.WORK_QUEUE_RETENTION_DAYS)
+
+        Returns:
+            int: Number of tasks deleted
+        """
+        retention_days = config.WORK_QUEUE_RETENTION_DAYS if retention_days is None else retention_days
+
+        def body(cursor):
+            cursor.execute(
+                "DELETE FROM tasks WHERE state IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, time.time() - retention_days * 86400)
+            )
+            return cursor.rowcount
+        purged = self._transaction(body)
+        if purged:
+            logging.info(f"보관 기간이 지난 작업 {purged}개를 삭제했습니다.")
+        return purged
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# URL 스킴 -> 작업 큐 백엔드
+BACKENDS = {
+    "sqlite": SQLiteWorkQueue,
+}
+
+def open_work_queue(url=None):
+    """
+    Open the work queue selected by a URL.
+
+    Args:
+        url: Queue URL such as "sqlite:///data/work_queue.db" (default: config.WORK_QUEUE_URL,
+            or config.get_work_queue_filename() if that is None); a plain path opens a SQLite queue
+
+    Returns:
+        WorkQueue: Opened queue
+    """
+    url = url or config.WORK_QUEUE_URL
+    if not url:
+        return SQLiteWorkQueue()
+    scheme, separator, location = url.partition("://")
+    if not separator:
+        return SQLiteWorkQueue(url)
+    if scheme not in BACKENDS:
+        raise ValueError(f"지원하지 않는 작업 큐 백엔드입니다: {scheme}")
+    # sqlite:///data/queue.db -> data/queue.db, sqlite:////var/queue.db -> /var/queue.db
+    return BACKENDS[scheme](location[1:] if location.startswith("/") else location)
+
+def seed_pages(queue, kind, start_page, pages):
+    """
+    Queue a range of listing pages (pages queued before are skipped).
+
+    Lower pages get higher priorities so the listing is crawled front to back.
+
+    Returns:
+        int: Number of pages added
+    """
+    added = queue.put_many(kind, ((queue.key(page), {"page": page}, -page) for page in range(start_page, start_page + pages)))
+    logging.info(f"작업 큐에 {start_page}~{start_page + pages - 1}페이지 중 {added}페이지 추가")
+    return added
+
+def wait_for_task(queue, kinds, poll_interval=None):
+    """
+    Lease a task, waiting while other crawlers hold leases that may add or give back tasks.
+
+    Returns:
+        Task or None: Leased task, or None once no task is pending or leased
+    """
+    while True:
+        task = queue.lease(kinds)
+        if task is not None:
+            return task
+        counts = queue.counts(kinds)
+        if not any(states.get(PENDING) or states.get(LEASED) for states in counts.values()):
+            return None
+        time.sleep(poll_interval or config.WORK_QUEUE_POLL_INTERVAL)
+
+class QueuePages:
+    """
+    Page source for EncarCrawler backed by the work queue.
+
+    Implements the same next_page() protocol as coordinator.PageLeases, so a
+    crawler pulls listing pages from the queue instead of following the pagination.
+    """
+
+    def __init__(self, queue, kind=ENCAR_PAGE):
+        """
+        Create the page source.
+
+        Args:
+            queue: WorkQueue with seeded page tasks
+            kind: Task kind of the listing pages
+        """
+        self.queue = queue
+        self.kind = kind
+        self.task = None
+
+    def next_page(self, finished_page=None, listing_count=None):
+        """
+        Ack the finished page and lease the next one.
+
+        Args:
+            finished_page: Page that was just crawled or given up on (None for the first request)
+            listing_count: Listings found on the finished page (0 marks the end of the listing
+                and cancels the pages after it, None retries the page later)
+
+        Returns:
+            int or None: Next page number, or None when the queue has no more pages
+        """
+        if self.task is not None:
+            if listing_count is None:
+                self.queue.nack(self.task, error=f"page {finished_page} skipped")
+            else:
+                self.queue.ack(self.task)
+            if listing_count == 0:
+                cancelled = self.queue.cancel(
+                    self.kind, (self.queue.key(page) for page in range(finished_page + 1, finished_page + 1 + config.MAX_PAGES))
+                )
+                logging.info(f"{finished_page}페이지에 차량이 없어 이후 {cancelled}페이지를 작업 큐에서 제외합니다.")
+            self.task = None
+
+        # 다른 크롤러가 임대 중인 페이지는 그 크롤러가 처리 (종료된 크롤러의 페이지는 같은 크롤링 구분자로 여는 다음 실행에서 처리)
+        self.task = self.queue.lease([self.kind])
+        if self.task is None:
+            return None
+        return self.task.payload["page"]